@@ -0,0 +1,322 @@
+import argparse
+import random
+import sys
+from typing import Iterator, NamedTuple
+
+import openpyxl
+
+from main import IDGenerator, ROW_NAME
+from sect import index
+from sect.landnumber import LandNumberSet
+from sect.landparser import MAX_NUMBER
+
+FULLWIDTH_DIGITS = str.maketrans("0123456789", "０１２３４５６７８９")
+CHINESE_DIGITS = "一二三四五六七八九"
+
+# Categorical columns, weighted roughly like 112.xlsx
+USAGE_ZONES = {
+    "特定農業區": 70,
+    "一般農業區": 20,
+    "山坡地保育區": 5,
+    "特定專用區": 3,
+    "風景區": 2,
+}
+USES = {
+    "農牧用地": 90,
+    "特定目的事業用地": 5,
+    "交通用地": 2,
+    "養殖用地": 2,
+    "水利用地": 1,
+}
+STATUSES = {
+    "裁處罰鍰": 45,
+    "已停止供水供電": 30,
+    "依工廠管理輔導法規定申請納管審核中": 10,
+    "依工廠管理輔導法規定核准納管": 10,
+    "已自行拆除": 5,
+}
+
+
+def chinese_numeral(n: int) -> str | None:
+    """n in Chinese numerals, in the forms Normalizer converts, None otherwise."""
+    if 1 <= n <= 9:
+        return CHINESE_DIGITS[n - 1]
+    if 11 <= n <= 99 and n % 10:
+        return CHINESE_DIGITS[n // 10 - 1] + "十" + CHINESE_DIGITS[n % 10 - 1]
+    return None
+
+
+class SyntheticAddress(NamedTuple):
+    sectname: str
+    # What SectCodeConverter should give for sectname
+    county_code: str
+    town_code: str
+    sect_code: str
+    # Items past MAX_NUMBER are not valid land numbers and are left out
+    land_numbers: LandNumberSet
+
+
+class Town(NamedTuple):
+    name: str
+    code: str
+    county_name: str
+    county_code: str
+    # (sectstr, sectcode)
+    sections: list[tuple[str, str]]
+
+
+class CorpusGenerator:
+    """
+    Plausible sectname strings drawn from the real county, town and section tables.
+
+    Each probability applies per address (`county_prefix`, `lists`, `ranges`) or
+    per land number (`sub`, `zhi`, `fullwidth`, `chinese`). Output is
+    reproducible for a given seed.
+    """
+
+    towns: list[Town]
+
+    def __init__(
+        self,
+        seed: int = 0,
+        county_prefix: float = 0.2,
+        lists: float = 0.15,
+        ranges: float = 0.02,
+        sub: float = 0.3,
+        zhi: float = 0.1,
+        fullwidth: float = 0.05,
+        chinese: float = 0.05,
+    ):
+        self.random = random.Random(seed)
+        self.county_prefix = county_prefix
+        self.lists = lists
+        self.ranges = ranges
+        self.sub = sub
+        self.zhi = zhi
+        self.fullwidth = fullwidth
+        self.chinese = chinese
+
+        sect_index = index.SectIndex()
+        county_names = {
+            code: name for name, code in sect_index.countyname_to_countycode.items()
+        }
+        towncode_to_countycode = dict(sect_index.towncode_to_countycode.items())
+
+        self.towns = []
+        for name, code in sect_index.townname_to_towncode.items():
+            county_code = towncode_to_countycode.get(code, "")
+            table = sect_index.section_table(county_code, code)
+            sections = [
+                (section["sectstr"], section["sectcode"]) for section in table.values()
+            ]
+            if sections:
+                self.towns.append(
+                    Town(
+                        name,
+                        code,
+                        county_names.get(county_code, ""),
+                        county_code,
+                        sections,
+                    )
+                )
+        sect_index.close()
+
+    def _number(self, n: int) -> str:
+        chance = self.random.random()
+        if chance < self.chinese:
+            numeral = chinese_numeral(n)
+            if numeral is not None:
+                return numeral
+        if chance < self.chinese + self.fullwidth:
+            return str(n).translate(FULLWIDTH_DIGITS)
+        return str(n)
+
+    def _main_number(self) -> int:
+        # Mostly small parcel numbers with a long tail, like the real data
+        return min(int(self.random.paretovariate(0.8) * 20), 9999)
+
+    def _land(self) -> tuple[str, LandNumberSet]:
+        if self.random.random() < self.ranges:
+            first = self._main_number()
+            last = first + self.random.randint(1, 10)
+            runs = [(0, first, last)] if last <= MAX_NUMBER else []
+            return f"{first}至{last}", LandNumberSet(runs)
+
+        count = 1
+        while self.random.random() < self.lists and count < 8:
+            count += 1
+
+        tokens = []
+        runs = []
+        main = self._main_number()
+        for _ in range(count):
+            if self.random.random() < self.sub:
+                sub = self.random.randint(1, 60)
+                hyphen = "之" if self.random.random() < self.zhi else "-"
+                tokens.append(f"{self._number(main)}{hyphen}{self._number(sub)}")
+            else:
+                sub = 0
+                tokens.append(self._number(main))
+            if main <= MAX_NUMBER:
+                runs.append((sub, main, main))
+            # Listed parcels are usually neighbours, near the end of the tail a
+            # list can run past MAX_NUMBER
+            main += self.random.randint(0, 3)
+        return "、".join(tokens), LandNumberSet(runs)
+
+    def address(self, town: Town | None = None) -> SyntheticAddress:
+        if town is None:
+            town = self.random.choice(self.towns)
+        sectstr, sectcode = self.random.choice(town.sections)
+        land, land_numbers = self._land()
+
+        prefix = town.county_name if self.random.random() < self.county_prefix else ""
+        return SyntheticAddress(
+            f"{prefix}{town.name}{sectstr}{land}地號",
+            town.county_code,
+            town.code,
+            sectcode,
+            land_numbers,
+        )
+
+    def addresses(self, count: int) -> Iterator[SyntheticAddress]:
+        for _ in range(count):
+            yield self.address()
+
+    def sectnames(self, count: int) -> list[str]:
+        return [address.sectname for address in self.addresses(count)]
+
+    def _choice(self, weights: dict[str, int]) -> str:
+        return self.random.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _statuses(self) -> str:
+        statuses = [self._choice(STATUSES)]
+        if self.random.random() < 0.4:
+            statuses.append(self._choice(STATUSES))
+        return " ".join(dict.fromkeys(statuses))
+
+    def write_workbook(
+        self,
+        file_path: str,
+        months: int = 12,
+        rows: int = 500,
+        repeat: float = 0.8,
+        status_change: float = 0.05,
+        start: str = "11201",
+    ) -> list[str]:
+        """
+        Write a workbook shaped like 112.xlsx, one sheet per month from `start`.
+
+        A `repeat` share of every sheet after the first repeats rows of the month
+        before, keeping their ID, a `status_change` share of which get a new
+        status. New rows get the next ID of their sheet, 112010001 and on, and
+        the county name of their town as the city. Returns the sheet names.
+        """
+        workbook = openpyxl.Workbook(write_only=True)
+        header = list(ROW_NAME.values())
+        year, month = int(start[:3]), int(start[3:])
+
+        sheet_names = []
+        previous: list[list] = []
+        for _ in range(months):
+            sheet_name = f"{year}{month:02d}"
+            sheet_names.append(sheet_name)
+            worksheet = workbook.create_sheet(sheet_name)
+            worksheet.append(header)
+
+            id_generator = IDGenerator(sheet_name)
+            repeated = self.random.sample(
+                previous, min(len(previous), int(rows * repeat))
+            )
+            current = []
+            for row in repeated:
+                row = list(row)
+                if self.random.random() < status_change:
+                    row[6] = self._statuses()
+                current.append(row)
+            while len(current) < rows:
+                town = self.random.choice(self.towns)
+                current.append(
+                    [
+                        int(id_generator.generate_id()),
+                        0,
+                        town.county_name,
+                        self.address(town).sectname,
+                        self._choice(USAGE_ZONES),
+                        self._choice(USES),
+                        self._statuses(),
+                    ]
+                )
+
+            for number, row in enumerate(current, 1):
+                row[1] = number
+                worksheet.append(row)
+            previous = current
+
+            month += 1
+            if month > 12:
+                year, month = year + 1, 1
+
+        workbook.save(file_path)
+        return sheet_names
+
+
+def check(generator: CorpusGenerator, count: int) -> dict[str, int]:
+    """Convert `count` generated addresses and count how many come out as expected."""
+    from sect.sectcode import SectCodeConverter
+
+    addresses = list(generator.addresses(count))
+    results, errors = SectCodeConverter().convert_many(
+        address.sectname for address in addresses
+    )
+
+    summary = {
+        "addresses": count,
+        "errors": len(errors),
+        "warnings": 0,
+        "sect_code": 0,
+        "land_numbers": 0,
+    }
+    for address, code in zip(addresses, results):
+        if code is None:
+            continue
+        if code.warnings:
+            summary["warnings"] += 1
+        if (code.county_code, code.town_code, code.sect_code) == address[1:4]:
+            summary["sect_code"] += 1
+        if code.land_numbers == address.land_numbers:
+            summary["land_numbers"] += 1
+    return summary
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate synthetic sectnames")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    sectnames_parser = commands.add_parser("sectnames", help="one sectname per line")
+    sectnames_parser.add_argument("count", type=int)
+
+    workbook_parser = commands.add_parser("workbook", help="a workbook like 112.xlsx")
+    workbook_parser.add_argument("file_path")
+    workbook_parser.add_argument("--months", type=int, default=12)
+    workbook_parser.add_argument("--rows", type=int, default=500)
+    workbook_parser.add_argument("--repeat", type=float, default=0.8)
+
+    check_parser = commands.add_parser(
+        "check", help="convert generated addresses and compare with the expected codes"
+    )
+    check_parser.add_argument("count", type=int)
+    args = arg_parser.parse_args()
+
+    generator = CorpusGenerator(args.seed)
+    if args.command == "sectnames":
+        for address in generator.addresses(args.count):
+            sys.stdout.write(address.sectname + "\n")
+    elif args.command == "workbook":
+        sheet_names = generator.write_workbook(
+            args.file_path, args.months, args.rows, args.repeat
+        )
+        print(f"Wrote {len(sheet_names)} sheets: {sheet_names[0]} to {sheet_names[-1]}")
+    else:
+        print(check(generator, args.count))
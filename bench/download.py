@@ -0,0 +1,54 @@
+import os
+import tempfile
+import time
+
+from sect import data, index
+from sect.downloader import Downloader
+from sect.stub_server import StubServer, record_fixtures
+
+
+def rebuild(base_url: str, data_dir: str, concurrency: int) -> float:
+    downloader = Downloader(
+        base_url, concurrency=concurrency, rate_limit=0, backoff=0.01
+    )
+    start = time.perf_counter()
+    data.init(downloader, data_dir)
+    return time.perf_counter() - start
+
+
+def index_items(data_dir: str) -> dict[str, list]:
+    sect_index = index.SectIndex(os.path.join(data_dir, "sect.idx"))
+    tables = {
+        "county": sorted(sect_index.countyname_to_countycode.items()),
+        "town": sorted(sect_index.townname_to_towncode.items()),
+        "towncode": sorted(sect_index.towncode_to_countycode.items()),
+        "townname": sorted(sect_index.towncode_to_townname.items()),
+        "sections": sorted(sect_index.sections.items()),
+    }
+    sect_index.close()
+    return tables
+
+
+if __name__ == "__main__":
+    latency = 0.02
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixtures_dir = os.path.join(tmp_dir, "fixtures")
+        print(f"Recorded {record_fixtures(fixtures_dir)} fixtures")
+
+        # Fail the first request of every path once, so retries are exercised too
+        with StubServer(fixtures_dir, latency=latency, fail_first=1) as server:
+            results = {}
+            for concurrency in [1, 8]:
+                data_dir = os.path.join(tmp_dir, f"data_{concurrency}")
+                server.requests = 0
+                server.attempts.clear()
+                elapsed = rebuild(server.base_url, data_dir, concurrency)
+                results[concurrency] = index_items(data_dir)
+                print(
+                    f"concurrency {concurrency}: {elapsed:.2f}s, "
+                    f"{server.requests} requests ({latency * 1000:.0f}ms latency)"
+                )
+
+    assert results[1] == results[8], "Index differs between concurrency levels"
+    print(f"Identical indexes, {len(results[1]['sections'])} sections")
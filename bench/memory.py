@@ -0,0 +1,57 @@
+import gc
+import json
+import tracemalloc
+
+from main import LandUseViolation, Parser
+
+SCALE = 10
+
+
+class DictLandUseViolation:
+    """LandUseViolation as it was before __slots__ and interning, for comparison."""
+
+    def __init__(self, d: dict):
+        self.id = d["id"]
+        self.year = d["year"]
+        self.month = d["month"]
+        self.number = d["number"]
+        self.city = d["city"]
+        self.sectname = d["sectname"]
+        self.sectcode = d["sectcode"]
+        self.land_numbers = d["land_numbers"]
+        self.usage_zone = d["usage_zone"]
+        self.use = d["use"]
+        self.status = d["status"]
+
+
+def load_records(file_path: str = "112.xlsx") -> list[str]:
+    """Every violation and update of the 112 workbook, as JSON lines."""
+    parser = Parser()
+    parser.parse_workbook(file_path)
+    records = list(parser.violation_dict.values()) + parser.update_list
+    return [json.dumps(record.to_dict(), ensure_ascii=False) for record in records]
+
+
+def measure(build, lines: list[str]) -> float:
+    """Bytes retained per record built by `build` from freshly decoded JSON."""
+    gc.collect()
+    tracemalloc.start()
+    records = [build(json.loads(line)) for line in lines]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del records
+    return size / len(lines)
+
+
+if __name__ == "__main__":
+    lines = load_records() * SCALE
+
+    before = measure(DictLandUseViolation, lines)
+    after = measure(LandUseViolation.from_dict, lines)
+
+    print(f"{len(lines)} records (112 dataset x{SCALE})")
+    print(f"dict-backed:        {before:8.1f} bytes/record")
+    print(f"slotted + interned: {after:8.1f} bytes/record")
+    print(f"saved:              {1 - after / before:8.1%}")
@@ -0,0 +1,53 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Runs in a fresh interpreter, times import through the first convert() result
+COLD_START = """
+import time
+start = time.perf_counter()
+from sect.sectcode import SectCodeConverter
+converter = SectCodeConverter(use_snapshot={use_snapshot})
+converter.convert("臺北市中正區公園段一小段1號")
+print((time.perf_counter() - start) * 1000)
+import sys
+print("requests" in sys.modules)
+"""
+
+
+# Measure with cached bytecode, like an installed package would run
+ENV = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+
+
+def cold_start(use_snapshot: bool, repeat: int = 20) -> tuple[float, float, bool]:
+    """Median in-process and whole-process milliseconds, and whether requests loaded."""
+    inner = []
+    outer = []
+    imported_requests = False
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START.format(use_snapshot=use_snapshot)],
+            check=True,
+            env=ENV,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        outer.append((time.perf_counter() - start) * 1000)
+        inner.append(float(output[0]))
+        imported_requests |= output[1] == "True"
+    return statistics.median(inner), statistics.median(outer), imported_requests
+
+
+if __name__ == "__main__":
+    # Warm up the snapshot so the first measured run does not build it
+    cold_start(True, repeat=1)
+
+    for use_snapshot in [False, True]:
+        inner, outer, imported_requests = cold_start(use_snapshot)
+        print(
+            f"snapshot={use_snapshot}: import to first convert {inner:.1f}ms, "
+            f"process {outer:.1f}ms, requests imported: {imported_requests}"
+        )
@@ -0,0 +1,222 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from bench.corpus import CorpusGenerator
+from main import ROW_NAME, Parser, open_xlsx, sheet_name_list, stream_xlsx
+from sect.normalizer import Normalizer
+from sect.sectcode import SectCodeConverter
+
+SUITE_VERSION = 1
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# A benchmark is slower than its baseline when its throughput drops by more
+# than this share, or its peak memory grows by more than it
+DEFAULT_THRESHOLD = 0.15
+
+# Peaks are compared as at least this many bytes. Below it a peak is mostly
+# allocator and freelist noise, e.g. the tuple freelist refilling after
+# gc.collect, and a few hundred kB either way is not a regression
+MEMORY_FLOOR = 1024 * 1024
+
+LAND_NUMBER_RE = re.compile(r"\d+(?=[-、至]|地?號)")
+
+
+def real_sectnames(file_path: str = "112.xlsx") -> list[str]:
+    """The sectname column of every sheet, duplicates included."""
+    return [
+        violation.sectname
+        for _, violations in stream_xlsx(file_path, sheet_name_list)
+        for violation in violations
+    ]
+
+
+def scale_sectnames(sectnames: list[str], scale: int) -> list[str]:
+    """
+    `scale` copies of sectnames, each copy with its land numbers shifted, so the
+    scaled corpus has the same shape but few repeated addresses.
+    """
+    result = list(sectnames)
+    for k in range(1, scale):
+        shift = k * 37
+        result.extend(
+            LAND_NUMBER_RE.sub(
+                lambda m: str((int(m.group()) + shift) % 9999 + 1), sectname
+            )
+            for sectname in sectnames
+        )
+    return result
+
+
+def measure(run: Callable[[], object], items: int, repeat: int) -> dict:
+    """Best wall time over `repeat` runs, then peak traced memory of one more run."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "items": items,
+        "seconds": best,
+        "per_second": items / best,
+        "peak_bytes": peak,
+    }
+
+
+def _convert_all(converter: SectCodeConverter, addresses: list[str]):
+    for address in addresses:
+        try:
+            converter.convert(address)
+        except ValueError:
+            pass
+
+
+def run_suite(scale: int = 10, repeat: int = 3) -> dict:
+    sectnames = real_sectnames()
+    workloads = {
+        "real": sectnames,
+        f"scaled_x{scale}": scale_sectnames(sectnames, scale),
+        f"synthetic_x{scale}": CorpusGenerator().sectnames(len(sectnames) * scale),
+    }
+
+    normalizer = Normalizer()
+    converter = SectCodeConverter()
+    tokenlizer = converter.tokenliizer
+
+    results = {}
+    for workload, addresses in workloads.items():
+        normalized = normalizer.normalize_many(addresses)
+        results[f"normalize/{workload}"] = measure(
+            lambda: [normalizer.execute(address) for address in addresses],
+            len(addresses),
+            repeat,
+        )
+        results[f"tokenize/{workload}"] = measure(
+            lambda: [tokenlizer.execute(address) for address in normalized],
+            len(addresses),
+            repeat,
+        )
+        results[f"convert/{workload}"] = measure(
+            lambda: _convert_all(converter, addresses), len(addresses), repeat
+        )
+        results[f"convert_many/{workload}"] = measure(
+            lambda: converter.convert_many(addresses), len(addresses), repeat
+        )
+
+    xlsx = open_xlsx("112.xlsx", sheet_name_list)
+    rows = sum(
+        len(xlsx[sheet_name][ROW_NAME["sectname"]]) for sheet_name in sheet_name_list
+    )
+    results["ingest/parse_all_sheets"] = measure(
+        lambda: Parser().parse_all_sheets(xlsx), rows, repeat
+    )
+    results["ingest/parse_workbook"] = measure(
+        lambda: Parser().parse_workbook("112.xlsx"), rows, repeat
+    )
+
+    parser = Parser()
+    parser.parse_all_sheets(xlsx)
+    records = len(parser.violation_dict) + len(parser.update_list)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "112.json")
+        results["save/json"] = measure(
+            lambda: parser.save(output_path), records, repeat
+        )
+
+    return {
+        "version": SUITE_VERSION,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "scale": scale,
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """Names of the benchmarks that regressed against the baseline."""
+    regressions = []
+    print(
+        f"{'benchmark':32} {'items/s':>12} {'baseline':>12} {'change':>8} "
+        f"{'peak MB':>8}"
+    )
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:32} {result['per_second']:12.0f} {'-':>12}")
+            continue
+
+        change = result["per_second"] / base["per_second"] - 1
+        memory_change = (
+            max(result["peak_bytes"], MEMORY_FLOOR)
+            / max(base["peak_bytes"], MEMORY_FLOOR)
+            - 1
+        )
+        regressed = change < -threshold or memory_change > threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:32} {result['per_second']:12.0f} {base['per_second']:12.0f} "
+            f"{change:+8.1%} {result['peak_bytes'] / 1e6:8.1f}"
+            + ("  REGRESSED" if regressed else "")
+        )
+    return regressions
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark normalize, tokenize, convert, ingest and save"
+    )
+    arg_parser.add_argument("--scale", type=int, default=10)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--output", help="write the results as JSON to this file")
+    arg_parser.add_argument(
+        "--baseline",
+        nargs="?",
+        const=BASELINE_PATH,
+        help="compare with a stored run, exit with 1 on a regression",
+    )
+    arg_parser.add_argument(
+        "--save-baseline",
+        nargs="?",
+        const=BASELINE_PATH,
+        help="store this run as the baseline",
+    )
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = arg_parser.parse_args()
+
+    report = run_suite(args.scale, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    regressions = compare(report, baseline or {"results": {}}, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
@@ -0,0 +1,53 @@
+import time
+
+import pandas as pd
+
+from main import ROW_NAME, sheet_name_list
+from sect import data
+from sect.normalizer import Normalizer
+from sect.sectcode import SectCodeConverter
+from sect.tokenlizer import Tokenlizer
+
+
+def load_addresses(file_path: str = "112.xlsx") -> list[str]:
+    xlsx = pd.read_excel(file_path, sheet_name=sheet_name_list)
+    normalizer = Normalizer()
+    return [
+        normalizer.execute(str(sectname))
+        for sheet_name in sheet_name_list
+        for sectname in xlsx[sheet_name][ROW_NAME["sectname"]]
+    ]
+
+
+def measure(execute, addresses: list[str], repeat: int = 5) -> float:
+    """Best per-address time in microseconds over `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for address in addresses:
+            execute(address)
+        best = min(best, time.perf_counter() - start)
+    return best / len(addresses) * 1e6
+
+
+if __name__ == "__main__":
+    addresses = load_addresses()
+
+    county_list = list(data.load_county_data().keys())
+    town_list = list(data.load_town_data().keys())
+    regex_tokenlizer = Tokenlizer(county_list, town_list)
+    dict_tokenlizer = SectCodeConverter().tokenliizer
+
+    for address in addresses:
+        expected = regex_tokenlizer.execute(address)
+        actual = dict_tokenlizer.execute(address)
+        if repr(expected) != repr(actual):
+            raise AssertionError(f"{address}: {expected!r} != {actual!r}")
+
+    regex_us = measure(regex_tokenlizer.execute, addresses)
+    dict_us = measure(dict_tokenlizer.execute, addresses)
+
+    print(f"{len(addresses)} addresses from 112.xlsx")
+    print(f"Tokenlizer:     {regex_us:8.2f} us/address")
+    print(f"DictTokenlizer: {dict_us:8.2f} us/address")
+    print(f"speedup:        {regex_us / dict_us:8.2f}x")
@@ -0,0 +1,169 @@
+import argparse
+import csv
+import json
+import os
+from typing import Iterable
+
+from main import LandUseViolation, Parser
+
+# Output file stem for each table
+TABLE_NAMES = ("violations", "updates")
+
+# Columns in output order
+COLUMNS = (
+    "id",
+    "year",
+    "month",
+    "number",
+    "city",
+    "sectname",
+    "sectcode",
+    "land_numbers",
+    "usage_zone",
+    "use",
+    "status",
+)
+
+# List columns are joined with this in CSV, status was split on whitespace
+CSV_LIST_SEPARATOR = " "
+
+
+def _to_int(value: str) -> int | None:
+    # Updates leave unchanged fields empty
+    return int(value) if value.isdigit() else None
+
+
+def _to_str(value: str) -> str | None:
+    return value or None
+
+
+def to_columns(violations: Iterable[LandUseViolation]) -> dict[str, list]:
+    """
+    Column lists of the violations, with None for every empty scalar field.
+
+    Updates leave the fields that did not change empty, they come out as nulls
+    rather than empty strings. land_numbers and status stay lists, empty when
+    there is nothing to list.
+    """
+    columns: dict[str, list] = {name: [] for name in COLUMNS}
+    for violation in violations:
+        columns["id"].append(_to_str(violation.id))
+        columns["year"].append(_to_int(violation.year))
+        columns["month"].append(_to_int(violation.month))
+        columns["number"].append(_to_str(violation.number))
+        columns["city"].append(_to_str(violation.city))
+        columns["sectname"].append(_to_str(violation.sectname))
+        columns["sectcode"].append(_to_str(violation.sectcode))
+        columns["land_numbers"].append(list(violation.land_numbers))
+        columns["usage_zone"].append(_to_str(violation.usage_zone))
+        columns["use"].append(_to_str(violation.use))
+        columns["status"].append(violation.status)
+    return columns
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Parquet and Arrow export needs pyarrow, "
+            "install it with `pip install pyarrow`"
+        ) from e
+    return pyarrow
+
+
+def to_arrow_table(violations: Iterable[LandUseViolation]):
+    pa = _import_pyarrow()
+
+    category = pa.dictionary(pa.int32(), pa.string())
+    schema = pa.schema(
+        [
+            ("id", pa.string()),
+            ("year", pa.int16()),
+            ("month", pa.int8()),
+            ("number", pa.string()),
+            ("city", category),
+            ("sectname", pa.string()),
+            ("sectcode", pa.string()),
+            ("land_numbers", pa.list_(pa.string())),
+            ("usage_zone", category),
+            ("use", category),
+            ("status", pa.list_(category)),
+        ]
+    )
+
+    columns = to_columns(violations)
+    return pa.table(
+        [pa.array(columns[field.name], type=field.type) for field in schema],
+        schema=schema,
+    )
+
+
+def write_parquet(tables: dict[str, Iterable[LandUseViolation]], output_dir: str):
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    for name, violations in tables.items():
+        pq.write_table(
+            to_arrow_table(violations), os.path.join(output_dir, f"{name}.parquet")
+        )
+
+
+def write_arrow(tables: dict[str, Iterable[LandUseViolation]], output_dir: str):
+    pa = _import_pyarrow()
+
+    for name, violations in tables.items():
+        table = to_arrow_table(violations)
+        with pa.OSFile(os.path.join(output_dir, f"{name}.arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+
+def write_csv(tables: dict[str, Iterable[LandUseViolation]], output_dir: str):
+    for name, violations in tables.items():
+        with open(os.path.join(output_dir, f"{name}.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for violation in violations:
+                row = violation.to_dict()
+                row["land_numbers"] = CSV_LIST_SEPARATOR.join(row["land_numbers"])
+                row["status"] = CSV_LIST_SEPARATOR.join(violation.status)
+                writer.writerow([row[column] for column in COLUMNS])
+
+
+def parser_tables(parser: Parser) -> dict[str, Iterable[LandUseViolation]]:
+    return {
+        "violations": parser.violation_dict.values(),
+        "updates": parser.update_list,
+    }
+
+
+def load_json(file_path: str) -> dict[str, list[LandUseViolation]]:
+    """Read the violations and updates written by Parser.save."""
+    with open(file_path) as f:
+        data = json.load(f)
+
+    return {
+        name: [LandUseViolation.from_dict(d) for d in data[name]]
+        for name in TABLE_NAMES
+    }
+
+
+WRITERS = {
+    "parquet": write_parquet,
+    "arrow": write_arrow,
+    "csv": write_csv,
+}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Export the JSON written by main.py as columnar tables"
+    )
+    arg_parser.add_argument("input", nargs="?", default="112.json")
+    arg_parser.add_argument("--format", choices=list(WRITERS), default="parquet")
+    arg_parser.add_argument("--output-dir", default=".")
+    args = arg_parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    WRITERS[args.format](load_json(args.input), args.output_dir)
@@ -1,8 +1,21 @@
+import argparse
+import hashlib
 import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Iterable, Iterator
 
+import openpyxl
 import pandas as pd
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
 
-from sect.sectcode import SectCodeConverter
+from parcels import ParcelIndex
+from sect.instrument import STATS, print_sink
+from sect.landnumber import EMPTY, LandNumberSet
+from sect.sectcode import ConvertError, SectCode, SectCodeConverter
 
 sheet_name_list = [
     "11201",
@@ -18,6 +31,8 @@ sheet_name_list = [
     "11212",
 ]
 
+CHECKPOINT_VERSION = 3
+
 ROW_NAME: dict[str, str] = {
     "id": "ID",
     "number": "編號",
@@ -30,7 +45,53 @@ ROW_NAME: dict[str, str] = {
 }
 
 
+def _file_size(*names: str):
+    """Stats extractor, the total size of the files passed as `names`."""
+    return lambda arguments, result: sum(
+        os.path.getsize(arguments[name]) for name in names
+    )
+
+
+def _saved_rows(arguments: dict, result) -> int:
+    parser = arguments["self"]
+    return len(parser.violation_dict) + len(parser.update_list)
+
+
+class InternPool:
+    """Hands out one shared str object per distinct value."""
+
+    values: dict[str, str]
+
+    def __init__(self):
+        self.values = {}
+
+    def __call__(self, value: str) -> str:
+        return self.values.setdefault(value, value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+# Low-cardinality LandUseViolation fields (city, usage_zone, use, year, month and
+# status entries) go through this pool instead of keeping a copy per row
+CATEGORY_POOL = InternPool()
+
+
 class LandUseViolation:
+    __slots__ = (
+        "id",
+        "year",
+        "month",
+        "number",
+        "city",
+        "sectname",
+        "sectcode",
+        "land_numbers",
+        "usage_zone",
+        "use",
+        "status",
+    )
+
     id: str
     year: str
     month: str
@@ -38,7 +99,7 @@ class LandUseViolation:
     city: str
     sectname: str
     sectcode: str
-    land_numbers: list[str]
+    land_numbers: LandNumberSet
     usage_zone: str
     use: str
     status: list[str]
@@ -52,7 +113,7 @@ class LandUseViolation:
         city: str,
         sectname: str,
         sectcode: str,
-        land_numbers: list[str],
+        land_numbers: LandNumberSet,
         usage_zone: str,
         use: str,
         status: list[str],
@@ -69,39 +130,11 @@ class LandUseViolation:
         self.use = use
         self.status = status
 
-    def diff(self, other: "LandUseViolation") -> "LandUseViolation":
-        if self.id != other.id:
-            raise ValueError(
-                f"Cannot diff two different LandUseViolation {self.id} and {other.id}"
-            )
-
-        id = self.id
-        new_number = other.number if self.number != other.number else ""
-        new_year = other.year if self.year != other.year else ""
-        new_month = other.month if self.month != other.month else ""
-        new_city = other.city if self.city != other.city else ""
-        new_sectname = other.sectname if self.sectname != other.sectname else ""
-        new_sectcode = other.sectcode if self.sectcode != other.sectcode else ""
-        new_land_numbers = list(set(other.land_numbers) - set(self.land_numbers))
-        new_usage_zone = other.usage_zone if self.usage_zone != other.usage_zone else ""
-        new_use = other.use if self.use != other.use else ""
-        new_status = list(set(other.status) - set(self.status))
-
-        return LandUseViolation(
-            id,
-            new_year,
-            new_month,
-            new_number,
-            new_city,
-            new_sectname,
-            new_sectcode,
-            new_land_numbers,
-            new_usage_zone,
-            new_use,
-            new_status,
-        )
-
-    def to_dict(self) -> dict[str, str | list[str]]:
+    def to_dict(self, land_ranges: bool = False) -> dict[str, str | list[str]]:
+        """
+        Land numbers are written as a list of codes, or with `land_ranges` in
+        their compact form with a range as "first~last". from_dict reads both.
+        """
         return {
             "id": self.id,
             "year": self.year,
@@ -110,12 +143,31 @@ class LandUseViolation:
             "city": self.city,
             "sectname": self.sectname,
             "sectcode": self.sectcode,
-            "land_numbers": self.land_numbers,
+            "land_numbers": (
+                self.land_numbers.to_list() if land_ranges else list(self.land_numbers)
+            ),
             "usage_zone": self.usage_zone,
             "use": self.use,
             "status": self.status,
         }
 
+    @classmethod
+    def from_dict(cls, d: dict) -> "LandUseViolation":
+        intern = CATEGORY_POOL
+        return cls(
+            d["id"],
+            intern(d["year"]),
+            intern(d["month"]),
+            d["number"],
+            intern(d["city"]),
+            d["sectname"],
+            d["sectcode"],
+            LandNumberSet.from_list(d["land_numbers"]),
+            intern(d["usage_zone"]),
+            intern(d["use"]),
+            list(map(intern, d["status"])),
+        )
+
 
 # If the year is 11201, the id format will be 112010001, 112010002, 112010003, ...
 class IDGenerator:
@@ -132,100 +184,814 @@ class IDGenerator:
         return id
 
 
+# What a checkpoint remembers about a processed sheet
+class SheetState:
+    name: str
+    hash: str
+    # Sizes of violation_dict and update_list before the sheet was merged
+    violation_offset: int
+    update_offset: int
+
+    def __init__(
+        self,
+        name: str,
+        hash: str,
+        violation_offset: int,
+        update_offset: int,
+    ):
+        self.name = name
+        self.hash = hash
+        self.violation_offset = violation_offset
+        self.update_offset = update_offset
+
+    def to_dict(self) -> dict[str, str | int]:
+        return {
+            "name": self.name,
+            "hash": self.hash,
+            "violation_offset": self.violation_offset,
+            "update_offset": self.update_offset,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "SheetState":
+        return cls(
+            d["name"],
+            d["hash"],
+            d["violation_offset"],
+            d["update_offset"],
+        )
+
+
+# A row whose sectname could not be converted, the row is kept without codes, or
+# a warning about a row that was converted
+class RowError:
+    sheet_name: str
+    id: str
+    sectname: str
+    message: str
+
+    def __init__(self, sheet_name: str, id: str, sectname: str, message: str):
+        self.sheet_name = sheet_name
+        self.id = id
+        self.sectname = sectname
+        self.message = message
+
+    def __repr__(self):
+        return f"{self.sheet_name} {self.id} {self.sectname}: {self.message}"
+
+    def to_dict(self) -> dict[str, str]:
+        return {
+            "sheet_name": self.sheet_name,
+            "id": self.id,
+            "sectname": self.sectname,
+            "message": self.message,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RowError":
+        return cls(d["sheet_name"], d["id"], d["sectname"], d["message"])
+
+
+class ChangeDetector:
+    """
+    Month-over-month changes of repeated violations, computed a sheet at a time.
+
+    The last row seen of every sectname is kept as a tuple of interned fields, so
+    an unchanged row is found by one tuple comparison. The rows that did change
+    are diffed field by field, one column at a time, and only they produce an
+    update. An update holds the new value of changed fields, the statuses added
+    since, and "" for the rest.
+    """
+
+    # sectname -> (year, month, number, city, usage_zone, use, status)
+    last_seen: dict[str, tuple]
+
+    def __init__(self):
+        self.last_seen = {}
+
+    def reset(self):
+        self.last_seen = {}
+
+    @staticmethod
+    def _row(violation: LandUseViolation) -> tuple:
+        return (
+            violation.year,
+            violation.month,
+            violation.number,
+            violation.city,
+            violation.usage_zone,
+            violation.use,
+            tuple(violation.status),
+        )
+
+    def observe(self, sheet_name: str, violations: Iterable[LandUseViolation]):
+        """Remember the rows of a sheet merged earlier, without diffing them."""
+        year = CATEGORY_POOL(sheet_name[:3])
+        month = CATEGORY_POOL(sheet_name[3:])
+        for violation in violations:
+            row = self._row(violation)
+            self.last_seen[violation.sectname] = (year, month) + row[2:]
+
+    @STATS.timed(
+        "diff",
+        rows=lambda arguments, result: len(arguments["violations"]),
+        arguments=("violations",),
+    )
+    def detect(self, violations: list[LandUseViolation]) -> dict[int, LandUseViolation]:
+        """
+        Updates for the rows of a sheet that changed since their sectname was last
+        seen, by position. Ids, year and month must be set on the rows already.
+        """
+        last_seen = self.last_seen
+        positions = []
+        before = []
+        after = []
+        for i, violation in enumerate(violations):
+            row = self._row(violation)
+            previous = last_seen.get(violation.sectname)
+            last_seen[violation.sectname] = row
+            # New sectnames are added as violations, not updates
+            if previous is not None and previous[2:] != row[2:]:
+                positions.append(i)
+                before.append(previous)
+                after.append(row)
+
+        if not positions:
+            return {}
+
+        old_columns = list(zip(*before))
+        new_columns = list(zip(*after))
+        scalars = [
+            [new if new != old else "" for old, new in zip(old_column, new_column)]
+            for old_column, new_column in zip(old_columns[:6], new_columns[:6])
+        ]
+        statuses = [
+            [status for status in new if status not in old]
+            for old, new in zip(old_columns[6], new_columns[6])
+        ]
+
+        updates = {}
+        for j, (year, month, number, city, usage_zone, use, status) in enumerate(
+            zip(*scalars, statuses)
+        ):
+            updates[positions[j]] = LandUseViolation(
+                violations[positions[j]].id,
+                year,
+                month,
+                number,
+                city,
+                "",
+                "",
+                EMPTY,
+                usage_zone,
+                use,
+                status,
+            )
+        return updates
+
+
+@STATS.timed(
+    "hash_sheet",
+    rows=lambda arguments, result: len(arguments["violation_list"]),
+    arguments=("violation_list",),
+)
+def hash_sheet(violation_list: list[LandUseViolation]) -> str:
+    h = hashlib.sha256()
+    for violation in violation_list:
+        row = [
+            violation.number,
+            violation.city,
+            violation.sectname,
+            violation.usage_zone,
+            violation.use,
+            *violation.status,
+        ]
+        h.update("\x1f".join(row).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+@STATS.timed("excel_open", bytes=_file_size("file_path"), arguments=("file_path",))
 def open_xlsx(file_path: str, sheet_name_list: list) -> dict[str, pd.DataFrame]:
     xlsx = pd.read_excel(file_path, sheet_name=sheet_name_list)
     return xlsx
 
 
+def excel_cell(cell):
+    # The value pandas' openpyxl reader hands its parser for a cell
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return float("nan")
+    if cell.data_type == TYPE_NUMERIC and int(cell.value) == cell.value:
+        return int(cell.value)
+    return cell.value
+
+
+@STATS.timed("excel_read", generator=True)
+def parse_rows(rows: Iterator[tuple]) -> Iterator[LandUseViolation]:
+    """
+    The violations of a sheet from its rows of cells, exactly as parse_sheet
+    gives them for the DataFrame pandas.read_excel reads.
+
+    Only the ROW_NAME columns are kept, and they go through the parser
+    read_excel uses, so each column is upcast (e.g. integers to floats when a
+    cell is blank) the same way.
+    """
+    header = [str(excel_cell(cell)) for cell in next(rows, ())]
+    # Resolve the ROW_NAME columns once for the whole sheet
+    index = [header.index(ROW_NAME[field]) for field in ROW_NAME]
+
+    data = []
+    last_row_with_data = -1
+    for row in rows:
+        values = [excel_cell(cell) for cell in row]
+        if any(value != "" for value in values):
+            last_row_with_data = len(data)
+        data.append([values[i] if i < len(values) else "" for i in index])
+    # Like read_excel, blank rows count unless they trail the sheet
+    del data[last_row_with_data + 1 :]
+
+    df = TextParser(
+        [list(ROW_NAME.values())] + data, header=0, skip_blank_lines=False
+    ).read()
+    yield from sheet_violations(sheet_columns(df))
+
+
+@STATS.timed(
+    "excel_workbook",
+    bytes=_file_size("file_path"),
+    generator=True,
+    arguments=("file_path",),
+)
+def stream_xlsx(
+    file_path: str, sheet_name_list: list
+) -> Iterator[tuple[str, Iterator[LandUseViolation]]]:
+    """
+    Yield (sheet_name, violations) with rows read lazily, one sheet after another.
+
+    Unlike open_xlsx the workbook is never loaded whole, only the ROW_NAME
+    columns of one sheet are held at a time. The violations are the same as
+    parse_sheet gives for the sheet read by open_xlsx.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet_name in sheet_name_list:
+            worksheet = workbook[sheet_name]
+            # The stored dimensions can be wrong, read up to the last actual row
+            worksheet.reset_dimensions()
+            yield sheet_name, parse_rows(worksheet.iter_rows())
+    finally:
+        workbook.close()
+
+
+def write_json(
+    f: IO[str], sections: dict[str, Iterable[dict]], indent: int | None = None
+):
+    """
+    Write {name: [record, ...], ...} to f one record at a time.
+
+    Records can come from generators, only one is encoded at a time. With an
+    indent the output matches json.dump(..., indent=indent), without one it is
+    compact.
+    """
+    if indent is None:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        f.write("{")
+        for i, (name, records) in enumerate(sections.items()):
+            f.write(("," if i else "") + encoder.encode(name) + ":[")
+            for j, record in enumerate(records):
+                f.write(("," if j else "") + encoder.encode(record))
+            f.write("]")
+        f.write("}")
+        return
+
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=indent)
+    pad = " " * indent
+    record_pad = "\n" + pad * 2
+    for i, (name, records) in enumerate(sections.items()):
+        f.write(("," if i else "{") + "\n" + pad + encoder.encode(name) + ": [")
+        empty = True
+        for record in records:
+            # A record encoded on its own is indented one level, it sits at level two
+            f.write(("" if empty else ",") + record_pad)
+            f.write(encoder.encode(record).replace("\n", record_pad))
+            empty = False
+        f.write("]" if empty else "\n" + pad + "]")
+    f.write("\n}" if sections else "{}")
+
+
+def write_ndjson(f: IO[str], records: Iterable[dict]):
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for record in records:
+        f.write(encoder.encode(record))
+        f.write("\n")
+
+
 def save_xlsx(xlsx: pd.DataFrame, file_path: str, sheet_name_list: list):
     with pd.ExcelWriter(file_path) as writer:
         for name in sheet_name_list:
             xlsx[name].to_excel(writer, sheet_name=name)
 
 
-def row_to_model(row: pd.Series) -> LandUseViolation:
-    id = str(row[ROW_NAME["id"]])
-    number = str(row[ROW_NAME["number"]])
-    city = str(row[ROW_NAME["city"]])
-    sectname = str(row[ROW_NAME["sectname"]])
-    usage_zone = str(row[ROW_NAME["usage_zone"]])
-    use = str(row[ROW_NAME["use"]])
-    status_str = str(row[ROW_NAME["status"]])
-    status = status_str.split() if status_str != "" else []
+def sheet_columns(df: pd.DataFrame) -> dict[str, list[str]]:
+    # Look up every ROW_NAME column once and convert it to str as a whole
+    return {
+        field: list(map(str, df[column].tolist())) for field, column in ROW_NAME.items()
+    }
 
-    return LandUseViolation(
-        id, "", "", number, city, sectname, "", [], usage_zone, use, status
-    )
+
+def sheet_violations(columns: dict[str, list[str]]) -> list[LandUseViolation]:
+    intern = CATEGORY_POOL
+    # "".split() is [], so empty status cells need no special case
+    statuses = [list(map(intern, status.split())) for status in columns["status"]]
+
+    return [
+        LandUseViolation(
+            id, "", "", number, city, sectname, "", EMPTY, usage_zone, use, status
+        )
+        for id, number, city, sectname, usage_zone, use, status in zip(
+            columns["id"],
+            columns["number"],
+            map(intern, columns["city"]),
+            columns["sectname"],
+            map(intern, columns["usage_zone"]),
+            map(intern, columns["use"]),
+            statuses,
+        )
+    ]
 
 
+@STATS.timed("parse_sheet", rows=lambda arguments, result: len(result))
 def parse_sheet(df: pd.DataFrame) -> list[LandUseViolation]:
-    result: list[LandUseViolation] = []
-    for _, row in df.iterrows():
-        violation = row_to_model(row)
-        result.append(violation)
+    return sheet_violations(sheet_columns(df))
+
+
+# Each worker process of a parallel Parser holds its own converter
+_worker_converter: SectCodeConverter | None = None
+
+
+def _init_worker(memo_size: int, fuzzy_threshold: float):
+    global _worker_converter
+    _worker_converter = SectCodeConverter(
+        memo_size=memo_size, fuzzy_threshold=fuzzy_threshold
+    )
 
-    return result
+
+@STATS.timed(
+    "convert_sectnames",
+    rows=lambda arguments, result: len(arguments["sectnames"]),
+    arguments=("sectnames",),
+)
+def convert_sectnames(
+    converter: SectCodeConverter, sectnames: list[str]
+) -> dict[str, SectCode | ConvertError]:
+    results, errors = converter.convert_many(sectnames)
+    codes: dict[str, SectCode | ConvertError] = dict(zip(sectnames, results))
+    for error in errors:
+        codes[error.address] = error
+    return codes
+
+
+def _convert_sectnames(sectnames: list[str]) -> dict[str, SectCode | ConvertError]:
+    return convert_sectnames(_worker_converter, sectnames)
+
+
+def new_sectnames(
+    violation_list: Iterable[LandUseViolation], seen: set[str] | dict
+) -> list[str]:
+    """Distinct sectnames of violation_list not in `seen`, in order."""
+    return list(
+        dict.fromkeys(
+            violation.sectname
+            for violation in violation_list
+            if violation.sectname not in seen
+        )
+    )
 
 
 class Parser:
     violation_dict: dict[str, LandUseViolation]
     update_list: list[LandUseViolation]
+    # Sheets merged so far, in order
+    sheet_states: list[SheetState]
+    # Rows that could not be converted, a bad row no longer stops the run
+    errors: list[RowError]
+    # Rows converted with a problem, e.g. invalid land number items left out
+    warnings: list[RowError]
+    # Violation ids by parcel, city, usage zone and status
+    parcels: ParcelIndex
+    changes: ChangeDetector
     converter: SectCodeConverter
+    memo_size: int
+    fuzzy_threshold: float
+    workers: int
+    chunk_size: int
 
-    def __init__(self):
+    def __init__(
+        self,
+        memo_size: int = 0,
+        workers: int = 1,
+        chunk_size: int = 256,
+        fuzzy_threshold: float = 0.0,
+    ):
         self.violation_dict = {}
         self.update_list = []
-        self.converter = SectCodeConverter()
+        self.sheet_states = []
+        self.errors = []
+        self.warnings = []
+        self.parcels = ParcelIndex()
+        self.changes = ChangeDetector()
+        self.converter = SectCodeConverter(
+            memo_size=memo_size, fuzzy_threshold=fuzzy_threshold
+        )
+        self.memo_size = memo_size
+        self.fuzzy_threshold = fuzzy_threshold
+        self.workers = workers
+        self.chunk_size = chunk_size
 
     def parse_all_sheets(self, xlsx: dict[str, pd.DataFrame]):
-        for sheet_name in sheet_name_list:
-            df = xlsx[sheet_name]
-            violation_list = parse_sheet(df)
-            id_generator = IDGenerator(sheet_name)
-            year = sheet_name[:3]
-            month = sheet_name[3:]
-
-            for violation in violation_list:
-                violation.year = year
-                violation.month = month
-
-                # If the violation is already in the violation_dict, diff it and add to update_list
-                if violation.sectname in self.violation_dict:
-                    violation.id = self.violation_dict[violation.sectname].id
-                    diff = self.violation_dict[violation.sectname].diff(violation)
-                    self.update_list.append(diff)
+        self.parse_sheets(
+            (sheet_name, parse_sheet(xlsx[sheet_name]))
+            for sheet_name in sheet_name_list
+        )
+
+    def parse_workbook(self, file_path: str, sheet_names: list[str] | None = None):
+        self.parse_sheets(stream_xlsx(file_path, sheet_names or sheet_name_list))
+
+    def parse_sheets(self, sheets: Iterable[tuple[str, Iterable[LandUseViolation]]]):
+        changed_sheets = self.changed_sheets(sheets)
+        if self.workers <= 1:
+            for sheet_name, violation_list, sheet_hash in changed_sheets:
+                codes = convert_sectnames(
+                    self.converter, new_sectnames(violation_list, self.violation_dict)
+                )
+                self.merge_sheet(sheet_name, violation_list, codes, sheet_hash)
+        else:
+            self.parse_sheets_parallel(changed_sheets)
+
+    def changed_sheets(
+        self, sheets: Iterable[tuple[str, Iterable[LandUseViolation]]]
+    ) -> Iterator[tuple[str, list[LandUseViolation], str]]:
+        """
+        Yield (sheet_name, violations, hash) for the sheets that still need merging.
+
+        Leading sheets matching the ones already merged (same name and content hash,
+        e.g. from a checkpoint) are skipped. From the first new or modified sheet
+        on, the state merged from that point is rolled back and every sheet is
+        yielded, since later sheets depend on earlier ones.
+        """
+        position = 0
+        diverged = False
+        # Rebuilt from the skipped sheets, so it matches the state rolled back to
+        self.changes.reset()
+        for sheet_name, violations in sheets:
+            # Read whole even when unchanged, the hash is only known at the end and
+            # skipped rows still rebuild the change detector
+            violation_list = list(violations)
+            sheet_hash = hash_sheet(violation_list)
+
+            if not diverged:
+                if (
+                    position < len(self.sheet_states)
+                    and self.sheet_states[position].name == sheet_name
+                    and self.sheet_states[position].hash == sheet_hash
+                ):
+                    self.changes.observe(sheet_name, violation_list)
+                    position += 1
+                    continue
+
+                self.rollback(position)
+                diverged = True
+
+            yield sheet_name, violation_list, sheet_hash
+
+        if not diverged:
+            self.rollback(position)
+
+    def rollback(self, position: int):
+        """Drop everything merged from the sheet at `position` on."""
+        if position >= len(self.sheet_states):
+            return
+
+        state = self.sheet_states[position]
+        dropped = {state.name for state in self.sheet_states[position:]}
+        self.errors = [e for e in self.errors if e.sheet_name not in dropped]
+        self.warnings = [w for w in self.warnings if w.sheet_name not in dropped]
+        self.parcels.remove(
+            violation.id
+            for violation in islice(
+                self.violation_dict.values(), state.violation_offset, None
+            )
+        )
+        self.violation_dict = dict(
+            islice(self.violation_dict.items(), state.violation_offset)
+        )
+        del self.update_list[state.update_offset :]
+        del self.sheet_states[position:]
+        self.parcels.reindex_secondary(self.update_list)
+
+    def parse_sheets_parallel(
+        self, sheets: Iterable[tuple[str, list[LandUseViolation], str]]
+    ):
+        """
+        Convert the sheets in worker processes and merge them in sheet order.
+
+        Only sectnames not seen in an earlier sheet are sent to the workers, in
+        chunks, and at most `workers` sheets are in flight at a time. Merging runs
+        the same code as the serial path, so the result is identical to it.
+        """
+        # Filled once the first sheet arrives, `sheets` may roll the state back
+        seen: set[str] | None = None
+        pending: deque[
+            tuple[str, list[LandUseViolation], str, list[tuple[list[str], Future]]]
+        ] = deque()
+
+        with ProcessPoolExecutor(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(self.memo_size, self.fuzzy_threshold),
+        ) as executor:
+
+            def merge_next():
+                sheet_name, violation_list, sheet_hash, futures = pending.popleft()
+                codes: dict[str, SectCode | ConvertError] = {}
+                for _, future in futures:
+                    codes.update(future.result())
+
+                self.merge_sheet(sheet_name, violation_list, codes, sheet_hash)
+
+            for sheet_name, violation_list, sheet_hash in sheets:
+                if seen is None:
+                    seen = set(self.violation_dict)
+
+                sectnames = new_sectnames(violation_list, seen)
+                seen.update(sectnames)
+
+                futures = []
+                for i in range(0, len(sectnames), self.chunk_size):
+                    chunk = sectnames[i : i + self.chunk_size]
+                    futures.append((chunk, executor.submit(_convert_sectnames, chunk)))
+                pending.append((sheet_name, violation_list, sheet_hash, futures))
+
+                if len(pending) > self.workers:
+                    merge_next()
+
+            while pending:
+                merge_next()
+
+    @STATS.timed("merge_sheet")
+    def merge_sheet(
+        self,
+        sheet_name: str,
+        violation_list: Iterable[LandUseViolation],
+        codes: dict[str, SectCode | ConvertError],
+        sheet_hash: str = "",
+    ):
+        """Merge a sheet, `codes` has the conversion of every sectname new to it."""
+        state = SheetState(
+            sheet_name, sheet_hash, len(self.violation_dict), len(self.update_list)
+        )
+        id_generator = IDGenerator(sheet_name)
+        year = CATEGORY_POOL(sheet_name[:3])
+        month = CATEGORY_POOL(sheet_name[3:])
+
+        violation_list = list(violation_list)
+        new_violations: list[tuple[LandUseViolation, SectCode | None] | None] = []
+        for violation in violation_list:
+            violation.year = year
+            violation.month = month
+
+            original = self.violation_dict.get(violation.sectname)
+            if original is not None:
+                violation.id = original.id
+                new_violations.append(None)
+            else:
+                violation.id = id_generator.generate_id()
+                code = codes[violation.sectname]
+                if isinstance(code, ConvertError):
+                    self.errors.append(
+                        RowError(
+                            sheet_name, violation.id, violation.sectname, code.message
+                        )
+                    )
+                    code = None
                 else:
-                    violation.id = id_generator.generate_id()
-                    code = self.converter.convert(violation.sectname)
                     violation.sectcode = code.sect_code
                     violation.land_numbers = code.land_numbers
-                    self.violation_dict[violation.sectname] = violation
-                    self.update_list.append(violation)
+                    for warning in code.warnings:
+                        self.warnings.append(
+                            RowError(
+                                sheet_name, violation.id, violation.sectname, warning
+                            )
+                        )
+                self.violation_dict[violation.sectname] = violation
+                new_violations.append((violation, code))
+
+        # Repeated rows only add an update when something changed since last month
+        updates = self.changes.detect(violation_list)
+        for i, new in enumerate(new_violations):
+            if new is None:
+                update = updates.get(i)
+                if update is None:
+                    continue
+                self.update_list.append(update)
+                self.parcels.add_update(update)
+            else:
+                violation, code = new
+                self.update_list.append(violation)
+                self.parcels.add(violation, code)
+
+        self.sheet_states.append(state)
+
+    def save_checkpoint(self, file_path: str):
+        checkpoint = {
+            "version": CHECKPOINT_VERSION,
+            "sheets": [state.to_dict() for state in self.sheet_states],
+            "violations": [
+                violation.to_dict(land_ranges=True)
+                for violation in self.violation_dict.values()
+            ],
+            "updates": [
+                violation.to_dict(land_ranges=True) for violation in self.update_list
+            ],
+            "errors": [error.to_dict() for error in self.errors],
+            "warnings": [warning.to_dict() for warning in self.warnings],
+            "parcels": self.parcels.to_dict(),
+        }
 
-    def save(self, file_path: str):
-        # Save violation_dict to json
-        violation_json_list = [
-            violation.to_dict() for _, violation in self.violation_dict.items()
-        ]
-        update_json_list = [violation.to_dict() for violation in self.update_list]
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_path, file_path)
 
+    def load_checkpoint(self, file_path: str) -> bool:
+        """Restore the state saved by save_checkpoint, False if there is none."""
+        if not os.path.exists(file_path):
+            return False
+
+        with open(file_path) as f:
+            checkpoint = json.load(f)
+
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(
+                f"Unsupported checkpoint version {checkpoint.get('version')} "
+                f"in {file_path}"
+            )
+
+        self.sheet_states = [SheetState.from_dict(d) for d in checkpoint["sheets"]]
+        self.violation_dict = {}
+        for d in checkpoint["violations"]:
+            violation = LandUseViolation.from_dict(d)
+            self.violation_dict[violation.sectname] = violation
+        self.update_list = [
+            LandUseViolation.from_dict(d) for d in checkpoint["updates"]
+        ]
+        self.errors = [RowError.from_dict(d) for d in checkpoint.get("errors", [])]
+        self.warnings = [RowError.from_dict(d) for d in checkpoint.get("warnings", [])]
+        self.parcels = ParcelIndex.from_dict(checkpoint["parcels"])
+        return True
+
+    @STATS.timed(
+        "save",
+        rows=_saved_rows,
+        bytes=_file_size("file_path"),
+        arguments=("self", "file_path"),
+    )
+    def save(self, file_path: str, indent: int | None = 4, land_ranges: bool = False):
+        # Save violation_dict to json, records are encoded one by one as written
         with open(file_path, "w") as f:
-            json.dump(
+            write_json(
+                f,
                 {
-                    "violations": violation_json_list,
-                    "updates": update_json_list,
+                    "violations": (
+                        violation.to_dict(land_ranges)
+                        for violation in self.violation_dict.values()
+                    ),
+                    "updates": (
+                        violation.to_dict(land_ranges) for violation in self.update_list
+                    ),
                 },
+                indent=indent,
+            )
+
+    @STATS.timed(
+        "save_ndjson",
+        rows=_saved_rows,
+        bytes=_file_size("violations_path", "updates_path"),
+        arguments=("self", "violations_path", "updates_path"),
+    )
+    def save_ndjson(
+        self, violations_path: str, updates_path: str, land_ranges: bool = False
+    ):
+        with open(violations_path, "w") as f:
+            write_ndjson(
                 f,
-                ensure_ascii=False,
-                indent=4,
+                (
+                    violation.to_dict(land_ranges)
+                    for violation in self.violation_dict.values()
+                ),
+            )
+
+        with open(updates_path, "w") as f:
+            write_ndjson(
+                f, (violation.to_dict(land_ranges) for violation in self.update_list)
             )
 
 
 if __name__ == "__main__":
-    parser = Parser()
-    xlsx = open_xlsx("112.xlsx", sheet_name_list)
-    parser.parse_all_sheets(xlsx)
-    parser.save("112.json")
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="convert sheets in this many worker processes",
+    )
+    arg_parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="load the whole workbook with pandas instead of streaming rows",
+    )
+    arg_parser.add_argument(
+        "--checkpoint",
+        help=(
+            "resume from this checkpoint and update it, only new or changed sheets "
+            "are processed"
+        ),
+    )
+    arg_parser.add_argument(
+        "--format",
+        choices=["json", "compact", "ndjson"],
+        default="json",
+        help="indented JSON, compact JSON, or NDJSON violations and updates files",
+    )
+    arg_parser.add_argument(
+        "--land-ranges",
+        action="store_true",
+        help='write runs of land numbers as "first~last" ranges instead of every code',
+    )
+    arg_parser.add_argument(
+        "--parcels",
+        help="also save the parcel index to this file, query it with parcels.py",
+    )
+    arg_parser.add_argument(
+        "--fuzzy",
+        type=float,
+        default=0.0,
+        metavar="THRESHOLD",
+        help="resolve unknown section names to their best fuzzy match scoring at "
+        "least THRESHOLD (0 to 1), when unambiguous",
+    )
+    arg_parser.add_argument(
+        "--stats",
+        nargs="?",
+        const="-",
+        help="time every stage and write the stats as JSON to this file, "
+        "or print a table without one",
+    )
+    args = arg_parser.parse_args()
+
+    if args.stats:
+        STATS.enable()
+        if args.stats == "-":
+            STATS.add_sink(print_sink)
+
+    parser = Parser(workers=args.workers, fuzzy_threshold=args.fuzzy)
+    if args.checkpoint:
+        parser.load_checkpoint(args.checkpoint)
+
+    if args.no_stream:
+        parser.parse_all_sheets(open_xlsx("112.xlsx", sheet_name_list))
+    else:
+        parser.parse_workbook("112.xlsx")
+
+    if args.checkpoint:
+        parser.save_checkpoint(args.checkpoint)
+
+    if parser.errors:
+        print(f"{len(parser.errors)} rows could not be converted:")
+        for error in parser.errors:
+            print(f"  {error}")
+
+    if parser.warnings:
+        print(f"{len(parser.warnings)} rows were converted with warnings:")
+        for warning in parser.warnings:
+            print(f"  {warning}")
+
+    if args.format == "ndjson":
+        parser.save_ndjson(
+            "112.violations.ndjson", "112.updates.ndjson", args.land_ranges
+        )
+    else:
+        parser.save("112.json", 4 if args.format == "json" else None, args.land_ranges)
+
+    if args.parcels:
+        parser.parcels.save(args.parcels)
+
+    if args.stats:
+        if args.stats != "-":
+            STATS.dump(args.stats)
+        STATS.flush()
 
 # if __name__ == "__main__":
 # converter = SectCodeConverter()
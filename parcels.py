@@ -0,0 +1,290 @@
+import argparse
+import json
+import os
+from bisect import bisect_right
+from typing import Iterable
+
+from sect.landnumber import LandNumberSet, split_code
+from sect.sectcode import SectCode
+
+PARCELS_VERSION = 1
+
+# Fields with a secondary index, ids are kept per distinct value
+SECONDARY_FIELDS = ("city", "usage_zone", "status")
+
+SectionKey = tuple[str, str, str]
+
+
+class SectionRuns:
+    """
+    The parcels of one section as disjoint runs sorted by (sub, first), each with
+    the positions in the section's bucket of the violations covering it.
+    """
+
+    starts: list[tuple[int, int]]
+    lasts: list[int]
+    positions: list[tuple[int, ...]]
+
+    def __init__(self, bucket: list[tuple[str, LandNumberSet]]):
+        self.starts = []
+        self.lasts = []
+        self.positions = []
+
+        # Violations starting and ending at each boundary, by sub number
+        events: dict[int, dict[int, tuple[list[int], list[int]]]] = {}
+        for position, (_, land_numbers) in enumerate(bucket):
+            for sub, first, last in land_numbers.runs:
+                bounds = events.setdefault(sub, {})
+                bounds.setdefault(first, ([], []))[0].append(position)
+                bounds.setdefault(last + 1, ([], []))[1].append(position)
+
+        for sub in sorted(events):
+            bounds = events[sub]
+            active: dict[int, int] = {}
+            start = 0
+            for bound in sorted(bounds):
+                if active:
+                    self._append(sub, start, bound - 1, tuple(sorted(active)))
+                started, ended = bounds[bound]
+                for position in ended:
+                    active[position] -= 1
+                    if not active[position]:
+                        del active[position]
+                for position in started:
+                    active[position] = active.get(position, 0) + 1
+                start = bound
+
+    def _append(self, sub: int, first: int, last: int, positions: tuple[int, ...]):
+        # Neighbouring runs covered by the same violations are merged
+        if (
+            self.starts
+            and self.starts[-1][0] == sub
+            and self.lasts[-1] == first - 1
+            and self.positions[-1] == positions
+        ):
+            self.lasts[-1] = last
+            return
+        self.starts.append((sub, first))
+        self.lasts.append(last)
+        self.positions.append(positions)
+
+    def covering(self, sub: int, first: int, last: int) -> set[int]:
+        """Positions of the violations covering any of main numbers first..last."""
+        starts = self.starts
+        i = bisect_right(starts, (sub, first))
+        if i and starts[i - 1][0] == sub and self.lasts[i - 1] >= first:
+            i -= 1
+
+        found: set[int] = set()
+        end = (sub, last)
+        while i < len(starts) and starts[i] <= end:
+            found.update(self.positions[i])
+            i += 1
+        return found
+
+
+class ParcelIndex:
+    """
+    Violation ids by parcel, city, usage zone and status.
+
+    Parcels are bucketed by (county_code, town_code, sect_code), each bucket
+    holding the (id, LandNumberSet) of the violations in that section. A
+    section's parcels are also kept as a SectionRuns, built on first lookup,
+    so a lookup is a dict lookup plus a binary search however many violations
+    the section has, and land number ranges are never expanded.
+
+    `city` and `usage_zone` come from the violation as first reported, `status`
+    collects every status a violation has been reported with, including later
+    updates.
+    """
+
+    sections: dict[SectionKey, list[tuple[str, LandNumberSet]]]
+    secondary: dict[str, dict[str, dict[str, None]]]
+    # Section of every indexed id, to remove it again
+    id_sections: dict[str, SectionKey]
+    # Built from `sections` when first looked up, dropped when the section changes
+    section_runs: dict[SectionKey, SectionRuns]
+
+    def __init__(self):
+        self.sections = {}
+        self.secondary = {field: {} for field in SECONDARY_FIELDS}
+        self.id_sections = {}
+        self.section_runs = {}
+
+    def __len__(self) -> int:
+        return len(self.id_sections)
+
+    def add(self, violation, code: SectCode | None):
+        """Index a new violation, `code` is None when its sectname failed to convert."""
+        if code is not None and code.sect_code:
+            key = (code.county_code, code.town_code, code.sect_code)
+            self.sections.setdefault(key, []).append(
+                (violation.id, violation.land_numbers)
+            )
+            self.id_sections[violation.id] = key
+            self.section_runs.pop(key, None)
+
+        self._add_secondary("city", violation.city, violation.id)
+        self._add_secondary("usage_zone", violation.usage_zone, violation.id)
+        self.add_update(violation)
+
+    def add_update(self, update):
+        for status in update.status:
+            self._add_secondary("status", status, update.id)
+
+    def _add_secondary(self, field: str, value: str, id: str):
+        if value:
+            self.secondary[field].setdefault(value, {})[id] = None
+
+    def remove(self, ids: Iterable[str]):
+        """Drop the parcels of the given violation ids."""
+        for id in ids:
+            key = self.id_sections.pop(id, None)
+            if key is None:
+                continue
+            self.section_runs.pop(key, None)
+            bucket = [entry for entry in self.sections[key] if entry[0] != id]
+            if bucket:
+                self.sections[key] = bucket
+            else:
+                del self.sections[key]
+
+    def reindex_secondary(self, records: Iterable):
+        """
+        Rebuild the secondary indexes from Parser.update_list, which lists every
+        violation where it was first reported, followed by its updates.
+        """
+        self.secondary = {field: {} for field in SECONDARY_FIELDS}
+        for record in records:
+            # Updates never repeat the sectname
+            if record.sectname:
+                self._add_secondary("city", record.city, record.id)
+                self._add_secondary("usage_zone", record.usage_zone, record.id)
+            self.add_update(record)
+
+    def _runs(self, key: SectionKey) -> SectionRuns:
+        runs = self.section_runs.get(key)
+        if runs is None:
+            runs = SectionRuns(self.sections[key])
+            self.section_runs[key] = runs
+        return runs
+
+    def lookup(
+        self, county_code: str, town_code: str, sect_code: str, land_number: str
+    ) -> list[str]:
+        """Ids of the violations covering one parcel, land_number is an 8-digit code."""
+        key = (county_code, town_code, sect_code)
+        bucket = self.sections.get(key)
+        if not bucket:
+            return []
+        main, sub = split_code(land_number)
+        return [bucket[i][0] for i in sorted(self._runs(key).covering(sub, main, main))]
+
+    def lookup_code(self, code: SectCode) -> list[str]:
+        """
+        Ids of the violations covering any parcel of a converted address, or of
+        every violation in its section when it has no land numbers.
+        """
+        key = (code.county_code, code.town_code, code.sect_code)
+        bucket = self.sections.get(key)
+        if not bucket:
+            return []
+        if not code.land_numbers:
+            return [id for id, _ in bucket]
+
+        runs = self._runs(key)
+        found: set[int] = set()
+        for sub, first, last in code.land_numbers.runs:
+            found |= runs.covering(sub, first, last)
+        return [bucket[i][0] for i in sorted(found)]
+
+    def query(
+        self, city: str = "", usage_zone: str = "", status: str = ""
+    ) -> list[str]:
+        """Ids matching every given field, in the order they were indexed."""
+        result: dict[str, None] | None = None
+        for field, value in zip(SECONDARY_FIELDS, (city, usage_zone, status)):
+            if not value:
+                continue
+            ids = self.secondary[field].get(value, {})
+            if result is None:
+                result = ids
+            else:
+                result = {id: None for id in result if id in ids}
+        return list(result) if result is not None else []
+
+    def to_dict(self) -> dict:
+        return {
+            "version": PARCELS_VERSION,
+            "sections": [
+                [*key, id, land_numbers.to_list()]
+                for key, bucket in self.sections.items()
+                for id, land_numbers in bucket
+            ],
+            "secondary": {
+                field: {value: list(ids) for value, ids in values.items()}
+                for field, values in self.secondary.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ParcelIndex":
+        if d.get("version") != PARCELS_VERSION:
+            raise ValueError(f"Unsupported parcel index version {d.get('version')}")
+
+        parcel_index = cls()
+        for county_code, town_code, sect_code, id, land_numbers in d["sections"]:
+            key = (county_code, town_code, sect_code)
+            parcel_index.sections.setdefault(key, []).append(
+                (id, LandNumberSet.from_list(land_numbers))
+            )
+            parcel_index.id_sections[id] = key
+
+        for field, values in d["secondary"].items():
+            parcel_index.secondary[field] = {
+                value: dict.fromkeys(ids) for value, ids in values.items()
+            }
+        return parcel_index
+
+    def save(self, file_path: str):
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> "ParcelIndex":
+        with open(file_path) as f:
+            return cls.from_dict(json.load(f))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Query the parcel index written by main.py --parcels"
+    )
+    arg_parser.add_argument("index", nargs="?", default="112.parcels.json")
+    arg_parser.add_argument("--address", help="land address, e.g. 烏日區北里段277地號")
+    arg_parser.add_argument(
+        "--parcel",
+        nargs=4,
+        metavar=("COUNTY", "TOWN", "SECT", "LAND"),
+        help="codes of one parcel, LAND is 8 digits",
+    )
+    arg_parser.add_argument("--city", default="")
+    arg_parser.add_argument("--usage-zone", default="")
+    arg_parser.add_argument("--status", default="")
+    args = arg_parser.parse_args()
+
+    parcel_index = ParcelIndex.load(args.index)
+    if args.address:
+        from sect.sectcode import SectCodeConverter
+
+        print(parcel_index.lookup_code(SectCodeConverter().convert(args.address)))
+    elif args.parcel:
+        county_code, town_code, sect_code, land_number = args.parcel
+        # Accept 1234 or 1234-5 as well as the 8-digit code
+        if not land_number.isdigit() or len(land_number) != 8:
+            land_number = next(iter(LandNumberSet.parse(land_number)), land_number)
+        print(parcel_index.lookup(county_code, town_code, sect_code, land_number))
+    else:
+        print(parcel_index.query(args.city, args.usage_zone, args.status))
@@ -0,0 +1,224 @@
+import json
+import socket
+from collections import deque
+from typing import Iterable
+from urllib.parse import quote
+
+from .landnumber import LandNumberSet
+from .sectcode import ConvertError, SectCode
+from .service import DEFAULT_HOST, DEFAULT_PORT
+
+# Requests of these methods are safe to send twice, see RFC 9110 9.2.2
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+def code_from_dict(d: dict) -> SectCode:
+    return SectCode(
+        d["county_code"],
+        d["town_code"],
+        d["sect_code"],
+        LandNumberSet.from_list(d["land_numbers"]),
+        tuple(d.get("warnings", ())),
+    )
+
+
+class ServiceError(Exception):
+    status: int
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status} {message}")
+        self.status = status
+
+
+class ServiceClient:
+    """
+    Blocking client for sect.service, over one kept-alive connection.
+
+    `convert` and `convert_many` mirror SectCodeConverter, a failed single
+    conversion raises ValueError like the converter does. `convert_pipelined`
+    sends up to `depth` requests before reading the first response.
+    """
+
+    host: str
+    port: int
+    unix: str
+    timeout: float
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix: str = "",
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.unix = unix
+        self.timeout = timeout
+        self.sock: socket.socket | None = None
+        self.stream = None
+
+    def _connect(self):
+        if self.unix:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.unix)
+        else:
+            sock = socket.create_connection((self.host, self.port), self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.stream = sock.makefile("rb")
+
+    def close(self):
+        if self.sock is not None:
+            self.stream.close()
+            self.sock.close()
+            self.sock = None
+            self.stream = None
+
+    def __enter__(self) -> "ServiceClient":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request_bytes(self, method: str, target: str, payload: dict | None) -> bytes:
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        head = (
+            f"{method} {target} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+        )
+        if body:
+            head += "Content-Type: application/json\r\n"
+        return (head + "\r\n").encode("latin-1") + body
+
+    def _send(self, data: bytes):
+        if self.sock is None:
+            self._connect()
+        self.sock.sendall(data)
+
+    def _read_response(self) -> tuple[int, dict]:
+        status_line = self.stream.readline()
+        if not status_line:
+            self.close()
+            raise ConnectionError("connection closed by the service")
+
+        status = int(status_line.split()[1])
+        length = 0
+        close = False
+        while True:
+            line = self.stream.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and value.strip().lower() == "close":
+                close = True
+
+        payload = json.loads(self.stream.read(length)) if length else {}
+        if close:
+            self.close()
+        return status, payload
+
+    def request(
+        self,
+        method: str,
+        target: str,
+        payload: dict | None = None,
+        idempotent: bool | None = None,
+    ) -> dict:
+        """
+        Send one request, raising ServiceError unless it returns 200 or 422.
+
+        An `idempotent` request, by default one with an idempotent method, is
+        retried once on a new connection if the connection fails. Any other may
+        have reached the service already and the ConnectionError is raised.
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+
+        data = self._request_bytes(method, target, payload)
+        try:
+            self._send(data)
+            status, response = self._read_response()
+        except ConnectionError:
+            self.close()
+            if not idempotent:
+                raise
+            # The service may have dropped an idle connection, retry once on a new one
+            self._send(data)
+            status, response = self._read_response()
+
+        if status not in (200, 422):
+            raise ServiceError(status, response.get("error", ""))
+        return response
+
+    def convert(self, address: str) -> SectCode:
+        # Conversion has no side effects, it is safe to retry over POST too
+        response = self.request(
+            "POST", "/convert", {"address": address}, idempotent=True
+        )
+        if "error" in response:
+            raise ValueError(response["error"])
+        return code_from_dict(response["result"])
+
+    def convert_many(
+        self, addresses: Iterable[str]
+    ) -> tuple[list[SectCode | None], list[ConvertError]]:
+        response = self.request(
+            "POST", "/convert_many", {"addresses": list(addresses)}, idempotent=True
+        )
+        return (
+            [code_from_dict(d) if d else None for d in response["results"]],
+            [
+                ConvertError(d["index"], d["address"], d["message"])
+                for d in response["errors"]
+            ],
+        )
+
+    def convert_pipelined(
+        self, addresses: Iterable[str], depth: int = 64
+    ) -> tuple[list[SectCode | None], list[ConvertError]]:
+        """
+        convert_many as single-address requests, with up to `depth` in flight.
+
+        Useful when addresses arrive one by one, the round trip is paid once
+        per `depth` addresses instead of once per address.
+        """
+        results: list[SectCode | None] = []
+        errors = []
+        in_flight: deque[str] = deque()
+
+        def read_next():
+            address = in_flight.popleft()
+            status, response = self._read_response()
+            if status == 200:
+                results.append(code_from_dict(response["result"]))
+            elif status == 422:
+                errors.append(ConvertError(len(results), address, response["error"]))
+                results.append(None)
+            else:
+                raise ServiceError(status, response.get("error", ""))
+
+        if self.sock is None:
+            self._connect()
+        for address in addresses:
+            self._send(
+                self._request_bytes("GET", "/convert?address=" + quote(address), None)
+            )
+            in_flight.append(address)
+            if len(in_flight) >= depth:
+                read_next()
+        while in_flight:
+            read_next()
+        return results, errors
+
+    def reload(self) -> int:
+        """Reload the service's reference data, returns its new generation."""
+        return self.request("POST", "/reload")["generation"]
+
+    def stats(self) -> dict:
+        return self.request("GET", "/stats")
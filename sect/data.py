@@ -1,130 +1,317 @@
+import dbm.dumb
+import glob
 import os
+import re
 import shelve
-import xml.etree.ElementTree as ET
-from typing import KeysView, ValuesView
+from typing import TYPE_CHECKING, Iterable, KeysView, Mapping, ValuesView
 
-import requests
+if TYPE_CHECKING:
+    from .downloader import Downloader
 
 ROOT_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(ROOT_DIR, "data")
 
-COUNTY_CODE_API = "https://api.nlsc.gov.tw/other/ListCounty"
+API_BASE_URL = "https://api.nlsc.gov.tw/other"
+
+COUNTY_CODE_PATH = "/ListCounty"
+COUNTY_CODE_API = API_BASE_URL + COUNTY_CODE_PATH
 COUNTY_DB_PATH = os.path.join(DATA_DIR, "county")
 
-TOWN_CODE_API = "https://api.nlsc.gov.tw/other/ListTown/{county}"
+TOWN_CODE_PATH = "/ListTown/{county}"
+TOWN_CODE_API = API_BASE_URL + TOWN_CODE_PATH
 TOWN_DB_PATH = os.path.join(DATA_DIR, "town")
 TOWN_CODE_TO_COUNTY_CODE_DB_PATH = os.path.join(DATA_DIR, "towncode_to_countycode")
+TOWN_CODE_TO_TOWN_NAME_DB_PATH = os.path.join(DATA_DIR, "towncode_to_townname")
+
+LAND_SECTION_PATH = "/ListLandSection/{county}/{town}"
+LAND_SECTION_API = API_BASE_URL + LAND_SECTION_PATH
+
+# Files dbm.dumb writes for a shelf
+SHELF_SUFFIXES = (".dat", ".dir", ".bak")
+
+# A rewritten shelf is stored under a new versioned name, e.g. county.v2, and
+# the pointer file county.current names the version to open
+SHELF_POINTER_SUFFIX = ".current"
+SHELF_VERSION_RE = re.compile(r"\.v(\d+)$")
+
+
+def _default_downloader() -> "Downloader":
+    from .downloader import Downloader
+
+    return Downloader()
+
+
+def parse_items(text: str) -> list[dict[str, str]]:
+    """Turn an API response into one {tag: text} dict per item."""
+    # Only needed when downloading, keep it out of the converter's startup
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(text)
+    return [{item.tag: item.text for item in element} for element in root]
+
+
+def shelf_path(file_path: str) -> str:
+    """The path the shelf at file_path is currently stored under."""
+    try:
+        with open(file_path + SHELF_POINTER_SUFFIX) as f:
+            return os.path.join(os.path.dirname(file_path), f.read().strip())
+    except FileNotFoundError:
+        # Shelves that were never rewritten, like the ones shipped in the repo
+        return file_path
 
-LAND_SECTION_API = "https://api.nlsc.gov.tw/other/ListLandSection/{county}/{town}"
 
+def open_shelf(file_path: str) -> shelve.Shelf:
+    return shelve.Shelf(dbm.dumb.open(shelf_path(file_path), "c"))
 
-def download_county_data(file_path: str):
-    resp = requests.get(COUNTY_CODE_API)
-    root = ET.fromstring(resp.text)
 
-    result = shelve.open(file_path, writeback=True)
-    for countyItem in root:
-        countyJson = {}
-        for item in countyItem:
-            countyJson[item.tag] = item.text
+def _shelf_versions(file_path: str) -> list[str]:
+    paths = (
+        path[: -len(".dat")] for path in glob.glob(glob.escape(file_path) + ".v*.dat")
+    )
+    return [path for path in paths if SHELF_VERSION_RE.search(path)]
+
+
+def _remove_shelf_files(path: str):
+    for suffix in SHELF_SUFFIXES:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
 
-        result[countyJson["countyname"]] = countyJson["countycode"]
 
+def write_shelf(file_path: str, items: dict):
+    """
+    Write items to a fresh shelf at file_path.
+
+    The shelf is written as a new version, then the pointer file naming it is
+    moved over the old pointer with os.replace, so readers open either the old
+    shelf or the new one, never a mix of their files. The previous version is
+    kept for readers that still have it open, older ones are removed.
+    """
+    current = shelf_path(file_path)
+    m = SHELF_VERSION_RE.search(current)
+    new_path = f"{file_path}.v{int(m.group(1)) + 1 if m else 1}"
+
+    # Always dbm.dumb, whichever dbm module shelve.open would pick
+    result = shelve.Shelf(dbm.dumb.open(new_path, "n"))
+    for key, value in items.items():
+        result[key] = value
     result.close()
 
+    tmp_path = file_path + SHELF_POINTER_SUFFIX + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(os.path.basename(new_path))
+    os.replace(tmp_path, file_path + SHELF_POINTER_SUFFIX)
+
+    for path in _shelf_versions(file_path):
+        if path not in (new_path, current):
+            _remove_shelf_files(path)
+
+
+def remove_shelf(file_path: str):
+    """Remove the shelf at file_path with every version of it."""
+    if os.path.exists(file_path + SHELF_POINTER_SUFFIX):
+        os.remove(file_path + SHELF_POINTER_SUFFIX)
+    for path in _shelf_versions(file_path):
+        _remove_shelf_files(path)
+    _remove_shelf_files(file_path)
+
+
+def county_items(text: str) -> dict[str, str]:
+    return {item["countyname"]: item["countycode"] for item in parse_items(text)}
+
 
-def load_county_data() -> shelve.Shelf[str]:
-    return shelve.open(COUNTY_DB_PATH, writeback=False)
+def download_county_data(file_path: str, downloader: "Downloader | None" = None):
+    downloader = downloader or _default_downloader()
+    write_shelf(file_path, county_items(downloader.get(COUNTY_CODE_PATH)))
+
+
+def load_county_data(file_path: str = COUNTY_DB_PATH) -> shelve.Shelf[str]:
+    return open_shelf(file_path)
+
+
+def merge_town_items(
+    responses: Iterable[tuple[str, str]],
+) -> tuple[dict[str, str], dict[str, str], dict[str, str]]:
+    """
+    Build townname_to_towncode, towncode_to_countycode and towncode_to_townname
+    from (county_code, text).
+
+    Responses are merged in the order given, so with the counties in their usual
+    order a duplicated town name resolves as it always did in
+    townname_to_towncode. Only towncode_to_townname keeps every town of a name
+    shared by several counties, e.g. 中正區.
+    """
+    townname_to_towncode = {}
+    towncode_to_county_code = {}
+    towncode_to_townname = {}
+    for code, text in responses:
+        for item in parse_items(text):
+            townname_to_towncode[item["townname"]] = item["towncode"]
+            towncode_to_county_code[item["towncode"]] = code
+            towncode_to_townname[item["towncode"]] = item["townname"]
+    return townname_to_towncode, towncode_to_county_code, towncode_to_townname
+
+
+def town_entries(
+    townname_to_towncode: Mapping[str, str],
+    towncode_to_countycode: Mapping[str, str],
+    towncode_to_townname: Mapping[str, str],
+) -> list[tuple[str, str, str]]:
+    """
+    Every town as (town_name, town_code, county_code).
+
+    Of the towns sharing a name, the one townname_to_towncode has comes first,
+    so it stays the town an address without a county resolves to. Data
+    downloaded before towncode_to_townname existed has an empty one, the towns
+    then come from townname_to_towncode alone, which lost the others.
+    """
+    if towncode_to_townname:
+        towns = [
+            (name, code, towncode_to_countycode.get(code, ""))
+            for code, name in towncode_to_townname.items()
+        ]
+        # A stable sort, towns keep their order otherwise
+        towns.sort(key=lambda town: townname_to_towncode.get(town[0]) != town[1])
+        return towns
+    return [
+        (name, code, towncode_to_countycode.get(code, ""))
+        for name, code in townname_to_towncode.items()
+    ]
 
 
 def download_town_data(
-    county_code_list: KeysView[str] | ValuesView[str], file_path: str
+    county_code_list: KeysView[str] | ValuesView[str] | Iterable[str],
+    file_path: str,
+    downloader: "Downloader | None" = None,
+    towncode_file_path: str = TOWN_CODE_TO_COUNTY_CODE_DB_PATH,
+    townname_file_path: str = TOWN_CODE_TO_TOWN_NAME_DB_PATH,
 ):
-    townname_to_towncode = shelve.open(file_path, writeback=True)
-    towncode_to_county_code = shelve.open(
-        TOWN_CODE_TO_COUNTY_CODE_DB_PATH, writeback=True
+    downloader = downloader or _default_downloader()
+    paths = {TOWN_CODE_PATH.format(county=code): code for code in county_code_list}
+
+    responses = dict(downloader.get_many(paths))
+    townname_to_towncode, towncode_to_county_code, towncode_to_townname = (
+        merge_town_items((code, responses[path]) for path, code in paths.items())
     )
-    for code in county_code_list:
-        url = TOWN_CODE_API.format(county=code)
-        resp = requests.get(url)
 
-        root = ET.fromstring(resp.text)
-        for townItem in root:
-            townJson = {}
-            for item in townItem:
-                townJson[item.tag] = item.text
+    write_shelf(file_path, townname_to_towncode)
+    write_shelf(towncode_file_path, towncode_to_county_code)
+    write_shelf(townname_file_path, towncode_to_townname)
 
-            townname_to_towncode[townJson["townname"]] = townJson["towncode"]
-            towncode_to_county_code[townJson["towncode"]] = code
 
-    townname_to_towncode.close()
-    towncode_to_county_code.close()
+def load_town_data(file_path: str = TOWN_DB_PATH) -> shelve.Shelf[str]:
+    return open_shelf(file_path)
 
 
-def load_town_data() -> shelve.Shelf[str]:
-    return shelve.open(TOWN_DB_PATH, writeback=False)
+def load_towncode_to_countycode(
+    file_path: str = TOWN_CODE_TO_COUNTY_CODE_DB_PATH,
+) -> shelve.Shelf[str]:
+    return open_shelf(file_path)
 
 
-def load_towncode_to_countycode() -> shelve.Shelf[str]:
-    return shelve.open(TOWN_CODE_TO_COUNTY_CODE_DB_PATH, writeback=False)
+def load_towncode_to_townname(
+    file_path: str = TOWN_CODE_TO_TOWN_NAME_DB_PATH,
+) -> shelve.Shelf[str]:
+    return open_shelf(file_path)
 
 
-def load_sectname_to_sectcode(county_code: str, town_code: str) -> shelve.Shelf[dict]:
-    return shelve.open(
-        generate_land_section_file_path(county_code, town_code), writeback=False
-    )
+def load_sectname_to_sectcode(
+    county_code: str, town_code: str, data_dir: str = DATA_DIR
+) -> shelve.Shelf[dict]:
+    return open_shelf(generate_land_section_file_path(county_code, town_code, data_dir))
 
 
-def download_sect_land_data(county_code: str, town_code: str, file_path: str):
-    url = LAND_SECTION_API.format(county=county_code, town=town_code)
-    resp = requests.get(url)
+def sect_land_items(text: str) -> dict[str, dict]:
+    return {item["sectstr"]: item for item in parse_items(text)}
 
-    root = ET.fromstring(resp.text)
-    result = shelve.open(file_path, writeback=True)
 
-    for landSectionItem in root:
-        landSectionJson = {}
-        for item in landSectionItem:
-            landSectionJson[item.tag] = item.text
+def download_sect_land_data(
+    county_code: str,
+    town_code: str,
+    file_path: str,
+    downloader: "Downloader | None" = None,
+):
+    downloader = downloader or _default_downloader()
+    path = LAND_SECTION_PATH.format(county=county_code, town=town_code)
+    write_shelf(file_path, sect_land_items(downloader.get(path)))
 
-        result[landSectionJson["sectstr"]] = landSectionJson
 
-    result.close()
+def download_sect_land_data_many(
+    towns: Iterable[tuple[str, str]],
+    data_dir: str = DATA_DIR,
+    downloader: "Downloader | None" = None,
+):
+    """Download the land sections of many (county_code, town_code) concurrently."""
+    downloader = downloader or _default_downloader()
+    paths = {
+        LAND_SECTION_PATH.format(county=county_code, town=town_code): (
+            county_code,
+            town_code,
+        )
+        for county_code, town_code in towns
+    }
+
+    for path, text in downloader.get_many(paths):
+        county_code, town_code = paths[path]
+        write_shelf(
+            generate_land_section_file_path(county_code, town_code, data_dir),
+            sect_land_items(text),
+        )
 
 
-def generate_land_section_file_path(county_code: str, town_code: str) -> str:
-    return os.path.join(DATA_DIR, f"{county_code}_{town_code}")
+def generate_land_section_file_path(
+    county_code: str, town_code: str, data_dir: str = DATA_DIR
+) -> str:
+    return os.path.join(data_dir, f"{county_code}_{town_code}")
 
 
 def check_db_exists(db_path: str) -> bool:
-    db_data_path = db_path + ".dat"
+    db_data_path = shelf_path(db_path) + ".dat"
     if os.path.exists(db_data_path):
         return True
 
     return False
 
 
-def init():
-    os.makedirs(DATA_DIR, exist_ok=True)
-    if not check_db_exists(COUNTY_DB_PATH):
-        download_county_data(COUNTY_DB_PATH)
+def init(downloader: "Downloader | None" = None, data_dir: str = DATA_DIR):
+    from . import index
 
-    county_code_list = load_county_data().values()
+    downloader = downloader or _default_downloader()
+    county_db_path = os.path.join(data_dir, "county")
+    town_db_path = os.path.join(data_dir, "town")
+    towncode_db_path = os.path.join(data_dir, "towncode_to_countycode")
+    townname_db_path = os.path.join(data_dir, "towncode_to_townname")
 
-    if not check_db_exists(TOWN_DB_PATH):
-        download_town_data(county_code_list, TOWN_DB_PATH)
+    os.makedirs(data_dir, exist_ok=True)
+    if not check_db_exists(county_db_path):
+        download_county_data(county_db_path, downloader)
 
-    town_data = load_town_data()
+    county_code_list = list(load_county_data(county_db_path).values())
 
-    for town_code in town_data.values():
-        county_code = town_code[:1]
-        file_path = generate_land_section_file_path(county_code, town_code)
+    # Data from before towncode_to_townname existed is downloaded again for it
+    if not check_db_exists(town_db_path) or not check_db_exists(townname_db_path):
+        download_town_data(
+            county_code_list,
+            town_db_path,
+            downloader,
+            towncode_db_path,
+            townname_db_path,
+        )
+
+    towncode_data = load_towncode_to_countycode(towncode_db_path)
+
+    # Every town code, town names shared by several counties included
+    missing_towns = []
+    for town_code, county_code in towncode_data.items():
+        file_path = generate_land_section_file_path(county_code, town_code, data_dir)
         if not check_db_exists(file_path):
-            download_sect_land_data(
-                county_code,
-                town_code,
-                file_path,
-            )
+            missing_towns.append((county_code, town_code))
+
+    download_sect_land_data_many(missing_towns, data_dir, downloader)
+
+    # Compile every shelf into the single-file index used by SectCodeConverter
+    index.build_index(
+        os.path.join(data_dir, os.path.basename(index.INDEX_PATH)), data_dir
+    )
 
 
 def get_tokenlize_regex():
@@ -0,0 +1,131 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator
+from urllib.parse import urlsplit
+
+import requests
+
+from .data import API_BASE_URL
+
+# Responses worth retrying, everything else non-2xx fails right away
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Spaces calls to `wait` at least 1 / rate seconds apart, across threads."""
+
+    interval: float
+    next_time: float
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if self.interval == 0:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+
+        if start > now:
+            time.sleep(start - now)
+
+
+class Downloader:
+    """
+    Fetches reference data XML with bounded concurrency.
+
+    Every request goes through a per-host rate limiter and is retried with
+    exponential backoff on connection errors, timeouts and 429/5xx responses.
+    """
+
+    base_url: str
+    concurrency: int
+    rate_limit: float
+    retries: int
+    backoff: float
+    timeout: float
+    requests: int
+    failures: int
+
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        concurrency: int = 8,
+        rate_limit: float = 20.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.requests = 0
+        self.failures = 0
+        self.limiters: dict[str, RateLimiter] = {}
+        self.lock = threading.Lock()
+        # requests.Session is not thread-safe, each worker thread gets its own
+        self.local = threading.local()
+
+    def _limiter(self, url: str) -> RateLimiter:
+        host = urlsplit(url).netloc
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limiter = RateLimiter(self.rate_limit)
+                self.limiters[host] = limiter
+            return limiter
+
+    def _session(self) -> requests.Session:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self.local.session = session
+        return session
+
+    def get(self, path: str) -> str:
+        url = self.base_url + path
+        limiter = self._limiter(url)
+
+        for attempt in range(self.retries + 1):
+            limiter.wait()
+            with self.lock:
+                self.requests += 1
+
+            try:
+                resp = self._session().get(url, timeout=self.timeout)
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    resp.raise_for_status()
+                    return resp.text
+                error: Exception = requests.HTTPError(
+                    f"{resp.status_code} for {url}", response=resp
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            with self.lock:
+                self.failures += 1
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2**attempt)
+
+        raise error
+
+    def get_many(self, paths: Iterable[str]) -> Iterator[tuple[str, str]]:
+        """Yield (path, text) as the responses arrive, at most `concurrency` at once."""
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            futures = {executor.submit(self.get, path): path for path in paths}
+            try:
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
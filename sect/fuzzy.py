@@ -0,0 +1,163 @@
+import heapq
+from typing import Iterable, NamedTuple
+
+from .normalizer import Normalizer
+
+# Scores at or above this are accepted when the match is also unambiguous
+DEFAULT_THRESHOLD = 0.8
+
+# The best score must beat the runner-up by this much to be unambiguous
+DEFAULT_MARGIN = 0.1
+
+# Variant glyphs the reference data and the sheets disagree on, folded on both
+# sides before matching
+VARIANTS = str.maketrans({"脚": "腳", "犂": "犁"})
+
+# Pads a name so its first and last characters get a bigram of their own
+BOUNDARY = "\x00"
+
+
+class Candidate(NamedTuple):
+    sectstr: str
+    sect_code: str
+    # Dice coefficient of the bigram sets, 1.0 for names equal once normalized
+    score: float
+
+
+def bigrams(text: str) -> set[str]:
+    padded = BOUNDARY + text.translate(VARIANTS) + BOUNDARY
+    return {padded[i : i + 2] for i in range(len(padded) - 1)}
+
+
+class SectionMatcher:
+    """
+    Bigram index over the land section names of one town.
+
+    Names are normalized like addresses, so 台/臺, a few variant glyphs and stray
+    spaces in the reference data do not count as differences. A query only scores
+    the sections sharing a bigram with it, found through the inverted index, so a
+    lookup costs the postings of its own bigrams rather than a scan of the town.
+    """
+
+    normalizer: Normalizer
+    sections: list[tuple[str, str]]
+    sizes: list[int]
+    postings: dict[str, list[int]]
+
+    def __init__(
+        self, sections: Iterable[tuple[str, str]], normalizer: Normalizer | None = None
+    ):
+        """`sections` are (sectstr, sect_code) pairs."""
+        self.normalizer = normalizer or Normalizer()
+        self.sections = []
+        self.sizes = []
+        self.postings = {}
+        for sectstr, sect_code in sections:
+            grams = bigrams(self.normalizer.execute(sectstr))
+            i = len(self.sections)
+            self.sections.append((sectstr, sect_code))
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    @classmethod
+    def from_table(
+        cls, table, normalizer: Normalizer | None = None
+    ) -> "SectionMatcher":
+        """Build from a land section shelf or index table, sectstr to section dict."""
+        return cls(
+            (
+                (sectstr, section.get("sectcode", ""))
+                for sectstr, section in table.items()
+            ),
+            normalizer,
+        )
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def match(self, sect: str, k: int = 5) -> list[Candidate]:
+        """The k best sections for a normalized section name, best first."""
+        grams = bigrams(sect)
+        shared: dict[int, int] = {}
+        for gram in grams:
+            for i in self.postings.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+
+        size = len(grams)
+        best = heapq.nsmallest(
+            k,
+            (
+                (-2 * count / (size + self.sizes[i]), self.sections[i])
+                for i, count in shared.items()
+            ),
+        )
+        return [
+            Candidate(sectstr, sect_code, -score)
+            for score, (sectstr, sect_code) in best
+        ]
+
+    def accept(
+        self,
+        sect: str,
+        threshold: float = DEFAULT_THRESHOLD,
+        margin: float = DEFAULT_MARGIN,
+    ) -> Candidate | None:
+        """
+        The best match when it scores at least `threshold` and leads the next
+        section with another code by at least `margin`, otherwise None.
+        """
+        # A few more than two, sections sharing a code do not compete
+        candidates = self.match(sect, k=4)
+        if not candidates or candidates[0].score < threshold:
+            return None
+
+        best = candidates[0]
+        for candidate in candidates[1:]:
+            if (
+                candidate.sect_code != best.sect_code
+                and best.score - candidate.score < margin
+            ):
+                return None
+        return best
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from .sectcode import SectCodeConverter
+
+    arg_parser = argparse.ArgumentParser(
+        description="Suggest land sections for addresses whose section is not found"
+    )
+    arg_parser.add_argument("addresses", nargs="*")
+    arg_parser.add_argument(
+        "--json", help="suggest for every violation with an empty sectcode in this file"
+    )
+    arg_parser.add_argument("-k", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    addresses = list(args.addresses)
+    if args.json:
+        with open(args.json) as f:
+            addresses += [
+                violation["sectname"]
+                for violation in json.load(f)["violations"]
+                if not violation["sectcode"]
+            ]
+
+    converter = SectCodeConverter()
+    for address in addresses:
+        try:
+            candidates = converter.suggest_sections(address, args.k)
+        except ValueError as e:
+            print(f"{address}\t{e}")
+            continue
+        print(
+            address
+            + "\t"
+            + ", ".join(
+                f"{c.sectstr.strip()} {c.sect_code} {c.score:.2f}" for c in candidates
+            )
+        )
@@ -0,0 +1,253 @@
+import mmap
+import os
+import struct
+from typing import Iterator
+
+from . import data
+
+INDEX_PATH = os.path.join(data.DATA_DIR, "sect.idx")
+
+INDEX_MAGIC = b"SECTIDX\x00"
+INDEX_VERSION = 2
+
+# Fields of a land section record, in the order they are stored in the index
+SECTION_FIELDS = ("office", "officestr", "sectcode", "sectstr")
+
+KEY_SEPARATOR = "\x1f"
+
+# magic, version, then (offset, count) of the county, town, towncode, town name
+# and section tables
+HEADER = struct.Struct("<8sI10I")
+RECORD_SPAN = struct.Struct("<II")
+KEY_LENGTH = struct.Struct("<H")
+
+
+def section_key(county_code: str, town_code: str, sectstr: str = "") -> str:
+    return KEY_SEPARATOR.join([county_code, town_code, sectstr])
+
+
+class IndexTable:
+    """Read-only sorted key/value table living inside the memory-mapped index."""
+
+    buffer: mmap.mmap
+    offset: int
+    lo: int
+    hi: int
+
+    def __init__(self, buffer: mmap.mmap, offset: int, lo: int, hi: int):
+        self.buffer = buffer
+        self.offset = offset
+        self.lo = lo
+        self.hi = hi
+
+    def _record_span(self, i: int) -> tuple[int, int]:
+        return RECORD_SPAN.unpack_from(self.buffer, self.offset + i * RECORD_SPAN.size)
+
+    def _key_at(self, i: int) -> bytes:
+        start, _ = self._record_span(i)
+        (key_length,) = KEY_LENGTH.unpack_from(self.buffer, start)
+        start += KEY_LENGTH.size
+        return self.buffer[start : start + key_length]
+
+    def _value_at(self, i: int) -> str:
+        start, end = self._record_span(i)
+        (key_length,) = KEY_LENGTH.unpack_from(self.buffer, start)
+        return self.buffer[start + KEY_LENGTH.size + key_length : end].decode("utf-8")
+
+    def _bisect(self, key: bytes, lo: int, hi: int) -> int:
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find(self, key: str) -> int:
+        encoded = key.encode("utf-8")
+        i = self._bisect(encoded, self.lo, self.hi)
+        if i < self.hi and self._key_at(i) == encoded:
+            return i
+        return -1
+
+    def _decode_value(self, value: str):
+        return value
+
+    def get(self, key: str, default=None):
+        i = self._find(key)
+        if i < 0:
+            return default
+        return self._decode_value(self._value_at(i))
+
+    def __getitem__(self, key: str):
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self._decode_value(self._value_at(i))
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) >= 0
+
+    def __len__(self) -> int:
+        return self.hi - self.lo
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def keys(self) -> list[str]:
+        return [self._key_at(i).decode("utf-8") for i in range(self.lo, self.hi)]
+
+    def values(self) -> list:
+        return [self._decode_value(self._value_at(i)) for i in range(self.lo, self.hi)]
+
+    def items(self) -> list[tuple]:
+        return list(zip(self.keys(), self.values()))
+
+    def close(self):
+        # The mapping is owned by SectIndex, a table view has nothing to release
+        pass
+
+
+class SectionTable(IndexTable):
+    """The land sections of a single town, keyed by sectstr."""
+
+    prefix: str
+
+    def __init__(self, buffer: mmap.mmap, offset: int, lo: int, hi: int, prefix: str):
+        super().__init__(buffer, offset, lo, hi)
+        self.prefix = prefix
+
+    def _find(self, key: str) -> int:
+        return super()._find(self.prefix + key)
+
+    def _decode_value(self, value: str) -> dict[str, str]:
+        return dict(zip(SECTION_FIELDS, value.split(KEY_SEPARATOR)))
+
+    def keys(self) -> list[str]:
+        return [key[len(self.prefix) :] for key in super().keys()]
+
+
+class SectIndex:
+    """
+    Single-file replacement for the county, town and per-town land section shelves.
+
+    Build it with `build_index` (or `python -m sect.index`). The file is memory-mapped
+    once, every lookup is a binary search over the mapping.
+    """
+
+    path: str
+    countyname_to_countycode: IndexTable
+    townname_to_towncode: IndexTable
+    towncode_to_countycode: IndexTable
+    towncode_to_townname: IndexTable
+    sections: IndexTable
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, *tables = HEADER.unpack_from(self.buffer, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} sect index")
+
+        county, town, towncode, townname, sections = [
+            IndexTable(self.buffer, offset, 0, count)
+            for offset, count in zip(tables[::2], tables[1::2])
+        ]
+        self.countyname_to_countycode = county
+        self.townname_to_towncode = town
+        self.towncode_to_countycode = towncode
+        self.towncode_to_townname = townname
+        self.sections = sections
+
+    def section_table(self, county_code: str, town_code: str) -> SectionTable:
+        prefix = section_key(county_code, town_code)
+        encoded = prefix.encode("utf-8")
+        # The separator is the smallest byte used in keys, so "\x20" ends the
+        # prefix range
+        lo = self.sections._bisect(encoded, 0, len(self.sections))
+        hi = self.sections._bisect(encoded[:-1] + b"\x20", lo, len(self.sections))
+        return SectionTable(self.buffer, self.sections.offset, lo, hi, prefix)
+
+    def close(self):
+        self.buffer.close()
+
+
+def exists(path: str = INDEX_PATH) -> bool:
+    return os.path.exists(path)
+
+
+def build_index(path: str = INDEX_PATH, data_dir: str = data.DATA_DIR):
+    tables = []
+    for load, name in [
+        (data.load_county_data, "county"),
+        (data.load_town_data, "town"),
+        (data.load_towncode_to_countycode, "towncode_to_countycode"),
+        (data.load_towncode_to_townname, "towncode_to_townname"),
+    ]:
+        file_path = os.path.join(data_dir, name)
+        if not data.check_db_exists(file_path):
+            # Only towncode_to_townname can be missing, from data downloaded
+            # before it existed
+            tables.append({})
+            continue
+        shelf = load(file_path)
+        tables.append(dict(shelf))
+        shelf.close()
+
+    county, town, towncode, townname = tables
+
+    sections: dict[str, str] = {}
+    for town_code, county_code in towncode.items():
+        file_path = data.generate_land_section_file_path(
+            county_code, town_code, data_dir
+        )
+        if not data.check_db_exists(file_path):
+            continue
+
+        sectname_to_sectcode = data.load_sectname_to_sectcode(
+            county_code, town_code, data_dir
+        )
+        for sectstr, section in sectname_to_sectcode.items():
+            key = section_key(county_code, town_code, sectstr)
+            sections[key] = KEY_SEPARATOR.join(
+                section[field] or "" for field in SECTION_FIELDS
+            )
+        sectname_to_sectcode.close()
+
+    tables.append(sections)
+
+    body = bytearray()
+    header_fields = []
+    for table in tables:
+        records = sorted(
+            (key.encode("utf-8"), value.encode("utf-8")) for key, value in table.items()
+        )
+        offset = HEADER.size + len(body)
+        header_fields.extend([offset, len(records)])
+
+        # A table is an array of absolute (start, end) record spans followed by
+        # the records themselves: key length, key, value
+        blob_start = offset + len(records) * RECORD_SPAN.size
+        spans = bytearray()
+        blob = bytearray()
+        for key, value in records:
+            start = blob_start + len(blob)
+            blob += KEY_LENGTH.pack(len(key)) + key + value
+            spans += RECORD_SPAN.pack(start, blob_start + len(blob))
+
+        body += spans + blob
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, *header_fields))
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    build_index()
+    index = SectIndex()
+    print(f"{index.path}: {len(index.sections)} land sections")
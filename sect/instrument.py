@@ -0,0 +1,340 @@
+import functools
+import inspect
+import json
+import random
+import time
+from typing import Any, Callable, Iterator, NamedTuple
+
+from . import landparser
+from .landparser import LandDescription
+from .normalizer import Normalizer
+from .sectcode import SectCodeConverter
+from .tokenlizer import DictTokenlizer
+
+# Latency samples kept per stage for the percentiles, by reservoir sampling
+SAMPLE_SIZE = 4096
+
+PERCENTILES = (50, 90, 99)
+
+
+class Stage(NamedTuple):
+    """
+    A function timed as one pipeline stage while instrumentation is enabled.
+
+    `rows` and `bytes` get (arguments, result) and return what the call
+    processed. `arguments` maps each parameter named in `arguments` to its value
+    however it was passed, defaults included, and is empty when none are named.
+    A `generator` stage is timed across every `next` of the generator it
+    returns, with one row per item.
+    """
+
+    name: str
+    owner: Any
+    attr: str
+    rows: Callable[[dict[str, Any], Any], int] | None = None
+    bytes: Callable[[dict[str, Any], Any], int] | None = None
+    generator: bool = False
+    arguments: tuple[str, ...] = ()
+
+
+def _utf8_length(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _one(arguments: dict[str, Any], result: Any) -> int:
+    return 1
+
+
+def _argument_positions(
+    func: Callable, names: tuple[str, ...]
+) -> list[tuple[str, int, Any]]:
+    """
+    (name, position, default) of the parameters `names` of func, resolved once
+    so a call never binds its arguments. Keyword-only parameters get a position
+    no call reaches, and a parameter without a default gets None.
+    """
+    parameters = list(inspect.signature(func).parameters.values())
+    positions = []
+    for name in names:
+        for i, parameter in enumerate(parameters):
+            if parameter.name == name:
+                break
+        else:
+            raise ValueError(f"{func.__qualname__} has no parameter {name}")
+
+        if parameter.kind is not parameter.POSITIONAL_OR_KEYWORD:
+            i = len(parameters)
+        default = None if parameter.default is parameter.empty else parameter.default
+        positions.append((name, i, default))
+    return positions
+
+
+CONVERTER_STAGES = [
+    Stage("convert", SectCodeConverter, "convert", rows=_one),
+    Stage(
+        "convert_many",
+        SectCodeConverter,
+        "convert_many",
+        rows=lambda arguments, result: len(result[0]),
+    ),
+    Stage(
+        "normalize",
+        Normalizer,
+        "execute",
+        rows=_one,
+        bytes=lambda arguments, result: _utf8_length(arguments["address"]),
+        arguments=("address",),
+    ),
+    Stage(
+        "normalize_many",
+        Normalizer,
+        "normalize_many",
+        rows=lambda arguments, result: len(result),
+        bytes=lambda arguments, result: sum(map(_utf8_length, result)),
+    ),
+    Stage("tokenize", DictTokenlizer, "execute", rows=_one),
+    Stage("resolve", SectCodeConverter, "_resolve", rows=_one),
+    Stage("section_table", SectCodeConverter, "load_section_table"),
+    Stage(
+        "land_parse",
+        landparser,
+        "parse_land",
+        rows=_one,
+        bytes=lambda arguments, result: _utf8_length(arguments["text"]),
+        arguments=("text",),
+    ),
+    Stage("land_numbers", LandDescription, "land_numbers", rows=_one),
+]
+
+
+class StageStats:
+    count: int
+    total: float
+    max: float
+    rows: int
+    bytes: int
+    samples: list[float]
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.samples = []
+
+    def to_dict(self) -> dict[str, float | int]:
+        samples = sorted(self.samples)
+        d: dict[str, float | int] = {
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "max_seconds": self.max,
+        }
+        for percentile in PERCENTILES:
+            d[f"p{percentile}_seconds"] = (
+                samples[min(len(samples) - 1, len(samples) * percentile // 100)]
+                if samples
+                else 0.0
+            )
+        d["rows"] = self.rows
+        d["bytes"] = self.bytes
+        return d
+
+
+class Instrumentation:
+    """
+    Opt-in per-stage timing of the conversion and ingest pipeline.
+
+    `enable` swaps every stage function for a timing wrapper and `disable` puts
+    the originals back, so nothing is measured, and nothing costs anything,
+    while disabled. Functions called a few times per run, like the once per
+    sheet ingest steps, are decorated with `timed` instead. Stats are read with
+    `to_dict`, written with `dump`, or pushed to every registered sink with
+    `flush`.
+
+    Only the current process is measured, conversions done by the worker
+    processes of a parallel Parser are not.
+    """
+
+    enabled: bool
+    stages: dict[str, StageStats]
+    sinks: list[Callable[[dict], None]]
+
+    def __init__(self, seed: int = 0):
+        self.enabled = False
+        self.stages = {}
+        self.sinks = []
+        self.patched: list[tuple[Any, str, Any]] = []
+        self.random = random.Random(seed)
+
+    def record(self, name: str, seconds: float, rows: int = 0, bytes: int = 0):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = StageStats()
+            self.stages[name] = stats
+
+        stats.count += 1
+        stats.total += seconds
+        stats.rows += rows
+        stats.bytes += bytes
+        if seconds > stats.max:
+            stats.max = seconds
+
+        if len(stats.samples) < SAMPLE_SIZE:
+            stats.samples.append(seconds)
+        else:
+            i = self.random.randrange(stats.count)
+            if i < SAMPLE_SIZE:
+                stats.samples[i] = seconds
+
+    def _wrap(self, stage: Stage, func: Callable) -> Callable:
+        record = self.record
+        perf_counter = time.perf_counter
+        name = stage.name
+        rows_of = stage.rows
+        bytes_of = stage.bytes
+        positions = _argument_positions(func, stage.arguments)
+
+        def measure(args: tuple, kwargs: dict, result: Any) -> tuple[int, int]:
+            arguments = {}
+            for argument, i, default in positions:
+                if i < len(args):
+                    arguments[argument] = args[i]
+                else:
+                    arguments[argument] = kwargs.get(argument, default)
+            rows = rows_of(arguments, result) if rows_of else 0
+            size = bytes_of(arguments, result) if bytes_of else 0
+            return rows, size
+
+        if stage.generator:
+
+            def timed_items(args: tuple, kwargs: dict) -> Iterator:
+                items = iter(func(*args, **kwargs))
+                elapsed = 0.0
+                count = 0
+                try:
+                    while True:
+                        start = perf_counter()
+                        try:
+                            item = next(items)
+                        except StopIteration:
+                            return
+                        finally:
+                            elapsed += perf_counter() - start
+                        count += 1
+                        yield item
+                finally:
+                    size = measure(args, kwargs, None)[1] if bytes_of else 0
+                    record(name, elapsed, count, size)
+
+            def generator_wrapper(*args, **kwargs):
+                return timed_items(args, kwargs)
+
+            return generator_wrapper
+
+        if rows_of is None and bytes_of is None:
+
+            def untouched_wrapper(*args, **kwargs):
+                start = perf_counter()
+                result = func(*args, **kwargs)
+                record(name, perf_counter() - start)
+                return result
+
+            return untouched_wrapper
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = perf_counter() - start
+            record(name, elapsed, *measure(args, kwargs, result))
+            return result
+
+        return wrapper
+
+    def enable(self, stages: list[Stage] = CONVERTER_STAGES):
+        if self.enabled:
+            self.disable()
+
+        for stage in stages:
+            original = vars(stage.owner)[stage.attr]
+            if isinstance(original, classmethod):
+                patched = classmethod(self._wrap(stage, original.__func__))
+            else:
+                patched = self._wrap(stage, original)
+            setattr(stage.owner, stage.attr, patched)
+            self.patched.append((stage.owner, stage.attr, original))
+        self.enabled = True
+
+    def timed(
+        self,
+        name: str,
+        rows: Callable[[dict[str, Any], Any], int] | None = None,
+        bytes: Callable[[dict[str, Any], Any], int] | None = None,
+        generator: bool = False,
+        arguments: tuple[str, ...] = (),
+    ) -> Callable[[Callable], Callable]:
+        """
+        Decorator timing the function as stage `name` whenever this instance is
+        enabled, see Stage for the arguments. Disabled, a call costs one check.
+        """
+
+        def decorate(func: Callable) -> Callable:
+            stage = Stage(name, None, func.__name__, rows, bytes, generator, arguments)
+            timed_func = self._wrap(stage, func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    return timed_func(*args, **kwargs)
+                return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def disable(self):
+        for owner, attr, original in reversed(self.patched):
+            setattr(owner, attr, original)
+        self.patched = []
+        self.enabled = False
+
+    def reset(self):
+        self.stages = {}
+
+    def to_dict(self) -> dict[str, dict[str, float | int]]:
+        return {name: stats.to_dict() for name, stats in self.stages.items()}
+
+    def dump(self, file_path: str):
+        with open(file_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def add_sink(self, sink: Callable[[dict], None]):
+        self.sinks.append(sink)
+
+    def flush(self):
+        stats = self.to_dict()
+        for sink in self.sinks:
+            sink(stats)
+
+
+def format_table(stats: dict[str, dict[str, float | int]]) -> str:
+    lines = [
+        f"{'stage':16} {'count':>9} {'total s':>9} {'p50 us':>9} {'p99 us':>9} "
+        f"{'rows':>9} {'MB':>7}"
+    ]
+    for name, d in sorted(stats.items(), key=lambda item: -item[1]["total_seconds"]):
+        lines.append(
+            f"{name:16} {d['count']:9d} {d['total_seconds']:9.3f} "
+            f"{d['p50_seconds'] * 1e6:9.1f} {d['p99_seconds'] * 1e6:9.1f} "
+            f"{d['rows']:9d} {d['bytes'] / 1e6:7.2f}"
+        )
+    return "\n".join(lines)
+
+
+def print_sink(stats: dict[str, dict[str, float | int]]):
+    print(format_table(stats))
+
+
+# The process-wide instance, disabled until enabled
+STATS = Instrumentation()
@@ -0,0 +1,168 @@
+import heapq
+from bisect import bisect_right
+from typing import Iterable, Iterator
+
+# A land number code is the main number and the sub number, 4 digits each
+SUB_SPAN = 10000
+
+# Separates the first and last code of a range in the compact form
+RANGE_SEPARATOR = "~"
+
+
+def split_code(code: str | int) -> tuple[int, int]:
+    """(main, sub) of an 8-digit land number code."""
+    return divmod(int(code), SUB_SPAN)
+
+
+def format_code(main: int, sub: int = 0) -> str:
+    return f"{main:04d}{sub:04d}"
+
+
+class LandNumberSet:
+    """
+    Immutable sorted set of land number codes, stored as intervals.
+
+    A run (sub, first, last) holds the codes of main numbers first..last that
+    share the sub number, so "956至960" is one run however wide it is. Runs are
+    merged on construction, which makes membership a binary search and union
+    and difference work run by run. Iterating yields the 8-digit codes lazily,
+    in code order.
+    """
+
+    __slots__ = ("runs",)
+
+    runs: tuple[tuple[int, int, int], ...]
+
+    def __init__(self, runs: Iterable[tuple[int, int, int]] = ()):
+        self.runs = _merge_runs(runs)
+
+    @classmethod
+    def from_codes(cls, codes: Iterable[str | int]) -> "LandNumberSet":
+        runs = []
+        for code in codes:
+            main, sub = split_code(code)
+            runs.append((sub, main, main))
+        return cls(runs)
+
+    @classmethod
+    def parse(cls, value: str) -> "LandNumberSet":
+        """
+        Parse the land part of an address, e.g. "12-3、956至960".
+
+        Raises ValueError on an item that is not a land number, see
+        landparser.parse_land for the grammar.
+        """
+        # landparser builds on this module
+        from .landparser import parse_land
+
+        description = parse_land(value)
+        if description.invalid:
+            raise ValueError(description.warnings()[0])
+        return description.land_numbers()
+
+    @classmethod
+    def from_list(cls, tokens: Iterable[str | int]) -> "LandNumberSet":
+        """Inverse of to_list."""
+        runs = []
+        for token in tokens:
+            first, _, last = str(token).partition(RANGE_SEPARATOR)
+            first_main, sub = split_code(first)
+            last_main = split_code(last)[0] if last else first_main
+            runs.append((sub, first_main, last_main))
+        return cls(runs)
+
+    def to_list(self) -> list[str]:
+        """Compact form, one code or "first~last" range per run, in code order."""
+        codes = []
+        for sub, first, last in sorted(self.runs, key=lambda run: (run[1], run[0])):
+            code = format_code(first, sub)
+            if last != first:
+                code += RANGE_SEPARATOR + format_code(last, sub)
+            codes.append(code)
+        return codes
+
+    def __contains__(self, code: str | int) -> bool:
+        main, sub = split_code(code)
+        # The last run of this sub number starting at or before main
+        i = bisect_right(self.runs, (sub, main, float("inf"))) - 1
+        if i < 0:
+            return False
+        run_sub, first, last = self.runs[i]
+        return run_sub == sub and first <= main <= last
+
+    def __iter__(self) -> Iterator[str]:
+        if len(self.runs) == 1:
+            sub, first, last = self.runs[0]
+            return (format_code(main, sub) for main in range(first, last + 1))
+
+        codes = heapq.merge(
+            *(
+                range(first * SUB_SPAN + sub, last * SUB_SPAN + sub + 1, SUB_SPAN)
+                for sub, first, last in self.runs
+            )
+        )
+        return (f"{code:08d}" for code in codes)
+
+    def __len__(self) -> int:
+        return sum(last - first + 1 for _, first, last in self.runs)
+
+    def __bool__(self) -> bool:
+        return bool(self.runs)
+
+    def __or__(self, other: "LandNumberSet") -> "LandNumberSet":
+        return LandNumberSet(self.runs + other.runs)
+
+    def __sub__(self, other: "LandNumberSet") -> "LandNumberSet":
+        if not self.runs or not other.runs:
+            return self
+
+        removed: dict[int, list[tuple[int, int]]] = {}
+        for sub, first, last in other.runs:
+            removed.setdefault(sub, []).append((first, last))
+
+        runs = []
+        for sub, first, last in self.runs:
+            for removed_first, removed_last in removed.get(sub, ()):
+                if removed_last < first or removed_first > last:
+                    continue
+                if removed_first > first:
+                    runs.append((sub, first, removed_first - 1))
+                first = removed_last + 1
+                if first > last:
+                    break
+            if first <= last:
+                runs.append((sub, first, last))
+        return LandNumberSet(runs)
+
+    def __and__(self, other: "LandNumberSet") -> "LandNumberSet":
+        return self - (self - other)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LandNumberSet):
+            return NotImplemented
+        return self.runs == other.runs
+
+    def __hash__(self) -> int:
+        return hash(self.runs)
+
+    def __repr__(self):
+        return f"LandNumberSet({self.to_list()!r})"
+
+
+def _merge_runs(
+    runs: Iterable[tuple[int, int, int]],
+) -> tuple[tuple[int, int, int], ...]:
+    merged: list[tuple[int, int, int]] = []
+    for sub, first, last in sorted(runs):
+        # An inverted range such as 960至956 holds nothing
+        if first > last:
+            continue
+        if merged and merged[-1][0] == sub and first <= merged[-1][2] + 1:
+            if last > merged[-1][2]:
+                merged[-1] = (sub, merged[-1][1], last)
+            continue
+        merged.append((sub, first, last))
+    return tuple(merged)
+
+
+EMPTY = LandNumberSet()
@@ -0,0 +1,286 @@
+import re
+from typing import NamedTuple
+
+from .landnumber import LandNumberSet
+
+# Largest main or sub number, both are 4 digits in a land number code
+MAX_NUMBER = 9999
+
+# Every alternative is a fixed string or a single character class run, so the
+# scan never backtracks and finditer is linear in the input
+LAND_TOKEN_RE = re.compile(
+    r"""
+    (?P<number>\d+)
+    |(?P<unit>地號|號)
+    |(?P<open>[(（])
+    |(?P<close>[)）])
+    |(?P<range>至)
+    |(?P<hyphen>-)
+    |(?P<separator>[、,，\s及與和])
+    |(?P<other>.)
+    """,
+    re.X | re.S,
+)
+
+# The common case, a 、 separated list of parcels and ranges then the unit. A
+# digit can never match what follows a number, so a failed attempt gives up
+# after one step per character and the match stays linear too
+SIMPLE_LAND_RE = re.compile(
+    r"""
+    (?P<value>
+        \d+(?:-\d+)?(?:至\d+(?:-\d+)?)?
+        (?:、\d+(?:-\d+)?(?:至\d+(?:-\d+)?)?)*
+    )
+    (?P<unit>地號|號|\Z)
+    """,
+    re.X,
+)
+
+
+class LandRange(NamedTuple):
+    """Parcels main-sub through last_main-last_sub, a single parcel when equal."""
+
+    main: int
+    sub: int
+    last_main: int
+    last_sub: int
+
+    def runs(self) -> list[tuple[int, int, int]]:
+        """(sub, first, last) runs of LandNumberSet."""
+        if self.sub == self.last_sub:
+            return [(self.sub, self.main, self.last_main)]
+        # Only a range of sub numbers of one main number gets here
+        return [
+            (sub, self.main, self.main) for sub in range(self.sub, self.last_sub + 1)
+        ]
+
+
+class LandDescription(NamedTuple):
+    # The land list as written, without annotations or unit, e.g. "12-3、956至960"
+    value: str
+    unit: str
+    ranges: tuple[LandRange, ...]
+    # Parenthetical notes and whatever follows the unit, e.g. "(1680地號西側建物)"
+    annotation: str
+    # Items that are not a land number, a range or a sub-numbered parcel
+    invalid: tuple[str, ...]
+
+    def land_numbers(self) -> LandNumberSet:
+        """The parcels as a LandNumberSet, items in `invalid` are left out."""
+        runs = []
+        for land_range in self.ranges:
+            if land_range.sub == land_range.last_sub:
+                runs.append((land_range.sub, land_range.main, land_range.last_main))
+            else:
+                runs.extend(land_range.runs())
+        return LandNumberSet(runs)
+
+    def warnings(self) -> tuple[str, ...]:
+        """A message for the items left out of land_numbers, if there are any."""
+        if not self.invalid:
+            return ()
+        return (f"Invalid land number {'、'.join(self.invalid)}",)
+
+
+EMPTY_DESCRIPTION = LandDescription("", "", (), "", ())
+
+
+def _number(digits: str) -> int:
+    # Anything past 4 digits is out of range, and int() of a long run is not cheap
+    return int(digits) if len(digits.lstrip("0")) <= 4 else MAX_NUMBER + 1
+
+
+def _land_range(numbers: list[int], ranged: bool) -> LandRange | None:
+    """
+    Build a range from the numbers of one item, None when their shape is invalid.
+
+    `numbers` holds main and sub, then last main and last sub for a range, with
+    -1 for a sub that was not given.
+    """
+    if any(n > MAX_NUMBER for n in numbers):
+        return None
+
+    if not ranged:
+        main, sub = numbers
+        return LandRange(main, max(sub, 0), main, max(sub, 0))
+
+    main, sub, last_main, last_sub = numbers
+    sub = max(sub, 0)
+    last_sub = max(last_sub, 0)
+    # 956至960 or 12-3至15-3 step the main number, 12-3至12-5 steps the sub number,
+    # either counting up
+    if sub == last_sub and main <= last_main:
+        return LandRange(main, sub, last_main, last_sub)
+    if main == last_main and sub <= last_sub:
+        return LandRange(main, sub, last_main, last_sub)
+    return None
+
+
+def _item_range(item: str) -> LandRange | None:
+    if "至" not in item:
+        main, _, sub = item.partition("-")
+        if len(main) <= 4 and len(sub) <= 4:
+            main_number = int(main)
+            sub_number = int(sub) if sub else 0
+            return LandRange(main_number, sub_number, main_number, sub_number)
+
+    numbers = []
+    for part in item.split("至"):
+        main, _, sub = part.partition("-")
+        numbers.append(_number(main))
+        numbers.append(_number(sub) if sub else -1)
+    return _land_range(numbers, len(numbers) == 4)
+
+
+def parse_land(text: str, require_unit: bool = False) -> LandDescription:
+    """
+    Parse a normalized land description in linear time, e.g. "12-3、956至960地號".
+
+    Items are separated by 、 or commas, an item is a number with an optional
+    "-sub", or two of those joined by 至. Parsing stops at the first 地號 or 號,
+    and what follows it is kept as the annotation, as are parenthesized notes
+    anywhere before it. An item of any other shape is reported in `invalid`
+    instead of raising, so one bad item does not lose the rest.
+
+    Plain lists are matched by SIMPLE_LAND_RE, anything else is scanned token by
+    token with a small state machine.
+
+    With `require_unit`, text without a unit describes no land at all, matching
+    how addresses were tokenized.
+    """
+    m = SIMPLE_LAND_RE.match(text)
+    if m is not None:
+        value, unit = m.groups()
+        if require_unit and not unit:
+            return EMPTY_DESCRIPTION
+
+        items = tuple(map(_item_range, value.split("、")))
+        # Out of range numbers and ranges stepping both numbers take the long way
+        if None not in items:
+            end = m.end()
+            annotation = text[end:].strip() if end < len(text) else ""
+            return LandDescription(value, unit, items, annotation, ())
+
+    ranges: list[LandRange] = []
+    invalid: list[str] = []
+    value_parts: list[str] = []
+    annotations: list[str] = []
+    unit = ""
+
+    # Numbers of the current item, see _land_range
+    numbers: list[int] = []
+    ranged = False
+    # The next token of the item: "main" and "sub" need a number, after a main
+    # number "any" allows -, 至 or the end of the item, after a sub "range" allows
+    # 至 or the end
+    expect = "main"
+    item_start = -1
+    bad = False
+
+    depth = 0
+    note_start = 0
+    value_start = 0
+    end = len(text)
+
+    def finish_item(position: int):
+        nonlocal numbers, ranged, expect, item_start, bad
+        if item_start >= 0:
+            item = text[item_start:position]
+            land_range = None
+            if not bad and expect in ("any", "range"):
+                if len(numbers) % 2:
+                    numbers.append(-1)
+                land_range = _land_range(numbers, ranged)
+            if land_range is None:
+                invalid.append(item)
+            else:
+                ranges.append(land_range)
+        numbers = []
+        ranged = False
+        expect = "main"
+        item_start = -1
+        bad = False
+
+    for m in LAND_TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        start = m.start()
+
+        if depth:
+            if kind == "open":
+                depth += 1
+            elif kind == "close":
+                depth -= 1
+                if depth == 0:
+                    annotations.append(text[note_start : m.end()])
+                    value_start = m.end()
+            continue
+
+        if kind == "number":
+            if item_start < 0:
+                item_start = start
+            if expect == "main":
+                numbers.append(_number(m.group()))
+                expect = "any"
+            elif expect == "sub":
+                numbers.append(_number(m.group()))
+                expect = "range"
+            else:
+                bad = True
+        elif kind == "hyphen":
+            if item_start < 0:
+                item_start = start
+            if expect == "any":
+                expect = "sub"
+            else:
+                bad = True
+        elif kind == "range":
+            if item_start < 0:
+                item_start = start
+            if expect in ("any", "range") and not ranged:
+                if len(numbers) % 2:
+                    numbers.append(-1)
+                ranged = True
+                expect = "main"
+            else:
+                bad = True
+        elif kind == "separator":
+            finish_item(start)
+        elif kind == "unit":
+            finish_item(start)
+            value_parts.append(text[value_start:start])
+            unit = m.group()
+            end = m.end()
+            break
+        elif kind == "open":
+            finish_item(start)
+            value_parts.append(text[value_start:start])
+            depth = 1
+            note_start = start
+        else:
+            # A stray closing parenthesis or any other character spoils the item
+            if item_start < 0:
+                item_start = start
+            bad = True
+    else:
+        if depth:
+            # An unclosed parenthesis runs to the end of the text
+            annotations.append(text[note_start:])
+        else:
+            finish_item(len(text))
+            value_parts.append(text[value_start:])
+        end = len(text)
+
+    if require_unit and not unit:
+        return EMPTY_DESCRIPTION
+
+    trailing = text[end:].strip()
+    if trailing:
+        annotations.append(trailing)
+
+    return LandDescription(
+        "".join(value_parts).strip(),
+        unit,
+        tuple(ranges),
+        "".join(annotations),
+        tuple(invalid),
+    )
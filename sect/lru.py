@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Size-bounded mapping that evicts the least recently used entry.
+
+    `on_evict(key, value)` is called for every value leaving the cache, by
+    eviction, by `clear` or replaced by `put`, so cached resources can be released.
+    """
+
+    maxsize: int
+    on_evict: Callable[[K, V], None] | None
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, maxsize: int, on_evict: Callable[[K, V], None] | None = None):
+        if maxsize < 1:
+            raise ValueError(f"LRUCache size must be positive, got {maxsize}")
+
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V):
+        if key in self.entries:
+            old_value = self.entries[key]
+            self.entries.move_to_end(key)
+            self.entries[key] = value
+            # The replaced value leaves the cache too
+            if old_value is not value and self.on_evict is not None:
+                self.on_evict(key, old_value)
+            return
+
+        self.entries[key] = value
+        while len(self.entries) > self.maxsize:
+            old_key, old_value = self.entries.popitem(last=False)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(old_key, old_value)
+
+    def clear(self):
+        while self.entries:
+            key, value = self.entries.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(key, value)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
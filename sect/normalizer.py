@@ -1,4 +1,5 @@
 import re
+from typing import Iterable
 
 # the strs matched but not in here will be removed
 TO_REPLACE_MAP = {
@@ -30,87 +31,166 @@ TO_REPLACE_MAP = {
 
 CHINESE_NUMERALS_SET = set("一二三四五六七八九")
 
+# Removed from the address, on top of the characters replaced by TO_REPLACE_MAP
+REMOVED_CHARS = " 　"
+
+# A Chinese numeral is only converted when followed by one of these, or at the end
+NUMERAL_TERMINATORS = ("-", "號", "地號", "、")
+
+CHINESE_NUMERAL_RUN_RE = re.compile("[一二三四五六七八九十]+")
+
+
+def build_translate_table(
+    replace_map: dict[str, str], removed_chars: str = REMOVED_CHARS
+) -> dict[int, str | None]:
+    # Chinese numerals depend on their context, convert_chinese_numerals handles them
+    table = {
+        char: to for char, to in replace_map.items() if char not in CHINESE_NUMERALS_SET
+    }
+    table.update(dict.fromkeys(removed_chars))
+    return str.maketrans(table)
+
+
+def _numeral_suffix_length(run: str) -> int:
+    # Longest suffix matching [一-九]?[一-九]?十?[一-九], the regex form of 一 to 九十九
+    if run[-1] not in CHINESE_NUMERALS_SET:
+        return 0
+
+    length = 1
+    i = len(run) - 2
+    if i >= 0 and run[i] == "十":
+        length += 1
+        i -= 1
+    for _ in range(2):
+        if i < 0 or run[i] not in CHINESE_NUMERALS_SET:
+            break
+        length += 1
+        i -= 1
+    return length
+
+
+def _replace_numeral(found: str, replace_map: dict[str, str]) -> str:
+    if found in replace_map:
+        return replace_map[found]
+
+    if found[0] in CHINESE_NUMERALS_SET:
+        len_found = len(found)
+        if len_found == 2:
+            return "1" + replace_map[found[1]]
+        if len_found == 3:
+            return replace_map[found[0]] + replace_map[found[2]]
+
+    return ""
+
+
+def _convert_numeral_run(run: str, replace_map: dict[str, str]) -> str:
+    # A replacement ending in digits stops further matches in the run, an empty one
+    # exposes the rest of the run to the same terminator again
+    while run:
+        length = _numeral_suffix_length(run)
+        if length == 0:
+            return run
+
+        replaced = _replace_numeral(run[-length:], replace_map)
+        run = run[:-length]
+        if replaced:
+            return run + replaced
+
+    return run
+
+
+def convert_chinese_numerals(
+    address: str,
+    replace_map: dict[str, str] = TO_REPLACE_MAP,
+    terminators: tuple[str, ...] = NUMERAL_TERMINATORS,
+) -> str:
+    """
+    Convert Chinese numerals followed by a terminator in a single scan.
+
+    Gives the same result as substituting
+    `[一-九]?[一-九]?十?[一-九](?=terminator|$)` until nothing changes.
+    """
+    if not CHINESE_NUMERAL_RUN_RE.search(address):
+        return address
 
-class Normalizer:
-    global_replace_re: re.Pattern
-    no_hyphen_replace_re: re.Pattern
-    no_num_replace_re: re.Pattern
-
-    def __init__(self):
-        self.global_replace_re = re.compile(
-            """
-                [ 　台]
-                |
-                [０-９]    
-            """,
-            re.X,
-        )
-
-        self.no_hyphen_replace_re = re.compile(
-            """
-            [之–—.]
-        """,
-            re.X,
-        )
-
-        self.no_num_replace_re = re.compile(
-            """
-            (?:
-                [一二三四五六七八九]?
-                [一二三四五六七八九]?
-                十?
-                [一二三四五六七八九]
-            )
-            (?=-|號|地號|、|$)
-        """,
-            re.X,
-        )
+    runs = list(CHINESE_NUMERAL_RUN_RE.finditer(address))
 
-    def execute(self, address: str) -> str:
+    # Runs are converted right to left, so the text following a run is final when
+    # the run is looked at. Only its first few characters matter, they are kept in
+    # `tail`, which is the whole following text when shorter than `head_length`.
+    head_length = max(map(len, terminators), default=0) + 1
+    pieces = []
+    kept = len(address)
+    tail = ""
+    for m in reversed(runs):
+        start, end = m.span()
+        gap = address[end:kept]
+        after = (gap + tail)[:head_length]
 
-        if isinstance(address, bytes):
-            address = address.decode("utf-8")
+        run = m.group()
+        # `$` matches at the end and before a trailing newline
+        if after in ("", "\n") or after.startswith(terminators):
+            run = _convert_numeral_run(run, replace_map)
 
-        def replace(m):
+        pieces.append(gap)
+        pieces.append(run)
+        tail = (run + after)[:head_length]
+        kept = start
 
-            found = m.group()
+    pieces.append(address[:kept])
+    return "".join(reversed(pieces))
 
-            if found in TO_REPLACE_MAP:
-                return TO_REPLACE_MAP[found]
 
-            return ""
-
-        def replace_num(m):
-
-            found = m.group()
+class Normalizer:
+    translate_table: dict[int, str | None]
+    translate_re: re.Pattern
+    replace_map: dict[str, str]
+    numeral_terminators: tuple[str, ...]
+
+    def __init__(
+        self,
+        replace_map: dict[str, str] = TO_REPLACE_MAP,
+        removed_chars: str = REMOVED_CHARS,
+        numeral_terminators: tuple[str, ...] = NUMERAL_TERMINATORS,
+    ):
+        self.translate_table = build_translate_table(replace_map, removed_chars)
+        # str.translate is slow on CJK text, most addresses have nothing to translate
+        self.translate_re = re.compile(
+            f"[{re.escape(''.join(map(chr, self.translate_table)))}]"
+        )
+        self.replace_map = replace_map
+        self.numeral_terminators = numeral_terminators
 
-            if found in TO_REPLACE_MAP:
-                return TO_REPLACE_MAP[found]
+    def execute(self, address: str) -> str:
 
-            if found[0] in CHINESE_NUMERALS_SET:
-                len_found = len(found)
-                if len_found == 2:
-                    return "1" + TO_REPLACE_MAP[found[1]]
-                if len_found == 3:
-                    return TO_REPLACE_MAP[found[0]] + TO_REPLACE_MAP[found[2]]
+        if isinstance(address, bytes):
+            address = address.decode("utf-8")
 
-            return ""
+        if self.translate_re.search(address):
+            address = address.translate(self.translate_table)
 
-        address = self.global_replace_re.sub(replace, address)
-        address = self.no_hyphen_replace_re.sub(replace, address)
+        return convert_chinese_numerals(
+            address, self.replace_map, self.numeral_terminators
+        )
 
-        while True:
-            replaced = self.no_num_replace_re.sub(replace_num, address)
-            if address == replaced:
-                break
-            address = replaced
+    def normalize_many(self, addresses: Iterable[str]) -> list[str]:
+        table = self.translate_table
+        needs_translate = self.translate_re.search
+        replace_map = self.replace_map
+        terminators = self.numeral_terminators
 
-        return address
+        result = []
+        for address in addresses:
+            if isinstance(address, bytes):
+                address = address.decode("utf-8")
+            if needs_translate(address):
+                address = address.translate(table)
+            result.append(convert_chinese_numerals(address, replace_map, terminators))
+        return result
 
 
 if __name__ == "__main__":
     address = "雲林縣口湖鄉梧北段二五四之四十三、二五四之四十六地號"
 
     normalizer = Normalizer()
-    tokens = normalizer.no_num_replace_re.findall(address)
     print(normalizer.execute(address))
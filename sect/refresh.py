@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING, Iterable
+
+from . import data
+
+if TYPE_CHECKING:
+    from .downloader import Downloader
+
+# sha256 of every API payload the data directory was last built from
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def payload_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def manifest_path(data_dir: str = data.DATA_DIR) -> str:
+    return os.path.join(data_dir, MANIFEST_NAME)
+
+
+def load_manifest(data_dir: str = data.DATA_DIR) -> dict[str, str]:
+    try:
+        with open(manifest_path(data_dir)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest["payloads"]
+
+
+def save_manifest(payloads: dict[str, str], data_dir: str = data.DATA_DIR):
+    path = manifest_path(data_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(
+            {"version": MANIFEST_VERSION, "payloads": payloads},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+    os.replace(tmp_path, path)
+
+
+class TableDiff:
+    """Keys added, removed and changed in one shelf by a refresh."""
+
+    name: str
+    added: list[str]
+    removed: list[str]
+    changed: list[str]
+
+    def __init__(self, name: str, old: dict, new: dict):
+        self.name = name
+        self.added = sorted(new.keys() - old.keys())
+        self.removed = sorted(old.keys() - new.keys())
+        self.changed = sorted(k for k in new.keys() & old.keys() if old[k] != new[k])
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return (
+            f"{self.name}: +{len(self.added)} -{len(self.removed)} "
+            f"~{len(self.changed)}"
+        )
+
+
+class RefreshSummary:
+    tables: list[TableDiff]
+    deleted: list[str]
+    unchanged: int
+    requests: int
+
+    def __init__(self):
+        self.tables = []
+        self.deleted = []
+        self.unchanged = 0
+        self.requests = 0
+
+    @property
+    def modified(self) -> bool:
+        return bool(self.tables or self.deleted)
+
+    def __str__(self):
+        lines = [
+            f"{self.requests} requests, {len(self.tables)} tables rewritten, "
+            f"{len(self.deleted)} deleted, {self.unchanged} unchanged"
+        ]
+        for table in self.tables:
+            lines.append(f"  {table}")
+            for label, keys in [
+                ("+", table.added),
+                ("-", table.removed),
+                ("~", table.changed),
+            ]:
+                lines.extend(f"    {label} {key}" for key in keys)
+        lines.extend(f"  deleted {name}" for name in self.deleted)
+        return "\n".join(lines)
+
+
+def _load_shelf(file_path: str) -> dict:
+    if not data.check_db_exists(file_path):
+        return {}
+
+    shelf = data.open_shelf(file_path)
+    items = dict(shelf)
+    shelf.close()
+    return items
+
+
+class Refresher:
+    """
+    Re-downloads every payload and rewrites only the shelves whose content changed.
+
+    A payload whose hash matches the manifest is skipped without opening its shelf.
+    Otherwise, e.g. on the first refresh after `data.init`, the parsed payload is
+    compared against the shelf, which is rewritten only when they differ.
+    """
+
+    downloader: "Downloader"
+    data_dir: str
+    manifest: dict[str, str]
+    payloads: dict[str, str]
+    summary: RefreshSummary
+
+    def __init__(
+        self, downloader: "Downloader | None" = None, data_dir: str = data.DATA_DIR
+    ):
+        self.downloader = downloader or data._default_downloader()
+        self.data_dir = data_dir
+        self.manifest = load_manifest(data_dir)
+        self.payloads = {}
+        self.summary = RefreshSummary()
+
+    def _unchanged(self, paths: Iterable[str]) -> bool:
+        return all(
+            path in self.manifest and self.manifest[path] == self.payloads[path]
+            for path in paths
+        )
+
+    def _update(self, name: str, new: dict) -> bool:
+        """Rewrite shelf `name` if new differs from it, return whether it did."""
+        file_path = os.path.join(self.data_dir, name)
+        diff = TableDiff(name, _load_shelf(file_path), new)
+        if not diff and data.check_db_exists(file_path):
+            self.summary.unchanged += 1
+            return False
+
+        data.write_shelf(file_path, new)
+        self.summary.tables.append(diff)
+        return True
+
+    def _fetch(self, paths: list[str]) -> dict[str, str]:
+        texts = dict(self.downloader.get_many(paths))
+        self.summary.requests += len(paths)
+        for path, text in texts.items():
+            self.payloads[path] = payload_hash(text)
+        return texts
+
+    def run(self) -> RefreshSummary:
+        from . import index
+
+        os.makedirs(self.data_dir, exist_ok=True)
+
+        county_path = data.COUNTY_CODE_PATH
+        county_text = self._fetch([county_path])[county_path]
+        county = data.county_items(county_text)
+        if self._unchanged([county_path]):
+            self.summary.unchanged += 1
+        else:
+            self._update("county", county)
+
+        town_paths = {
+            data.TOWN_CODE_PATH.format(county=code): code for code in county.values()
+        }
+        town_texts = self._fetch(list(town_paths))
+        town, towncode, townname = data.merge_town_items(
+            (code, town_texts[path]) for path, code in town_paths.items()
+        )
+        # Data from before towncode_to_townname existed lacks it, payloads or not
+        if self._unchanged(town_paths) and data.check_db_exists(
+            os.path.join(self.data_dir, "towncode_to_townname")
+        ):
+            self.summary.unchanged += 3
+        else:
+            self._update("town", town)
+            self._update("towncode_to_countycode", towncode)
+            self._update("towncode_to_townname", townname)
+
+        # Same town list as data.init, every town code with its county
+        towns = {
+            data.LAND_SECTION_PATH.format(county=county_code, town=town_code): (
+                county_code,
+                town_code,
+            )
+            for town_code, county_code in towncode.items()
+        }
+        section_texts = self._fetch(list(towns))
+        for path, (county_code, town_code) in towns.items():
+            if self._unchanged([path]):
+                self.summary.unchanged += 1
+                continue
+            self._update(
+                f"{county_code}_{town_code}", data.sect_land_items(section_texts[path])
+            )
+
+        self._delete_stale_sections({f"{c}_{t}" for c, t in towns.values()})
+
+        if self.summary.modified or not index.exists(self._index_path()):
+            index.build_index(self._index_path(), self.data_dir)
+        save_manifest(self.payloads, self.data_dir)
+        return self.summary
+
+    def _index_path(self) -> str:
+        from . import index
+
+        return os.path.join(self.data_dir, os.path.basename(index.INDEX_PATH))
+
+    def _delete_stale_sections(self, names: set[str]):
+        """Remove the land section shelves of towns no longer listed."""
+        reference = {
+            "county",
+            "town",
+            "towncode_to_countycode",
+            "towncode_to_townname",
+        }
+        stale = set()
+        for file_name in os.listdir(self.data_dir):
+            name, ext = os.path.splitext(file_name)
+            if ext not in (".dat", data.SHELF_POINTER_SUFFIX):
+                continue
+            # Without the version of a rewritten shelf, e.g. A_A01.v2
+            name = name.split(".")[0]
+            if name not in reference and name not in names and "_" in name:
+                stale.add(name)
+
+        for name in sorted(stale):
+            data.remove_shelf(os.path.join(self.data_dir, name))
+            self.summary.deleted.append(name)
+
+
+def refresh(
+    downloader: "Downloader | None" = None, data_dir: str = data.DATA_DIR
+) -> RefreshSummary:
+    return Refresher(downloader, data_dir).run()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .downloader import Downloader
+
+    arg_parser = argparse.ArgumentParser(
+        description="Refresh the reference data, rewriting only what changed"
+    )
+    arg_parser.add_argument("--base-url", default=data.API_BASE_URL)
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    print(refresh(Downloader(args.base_url, concurrency=args.concurrency)))
@@ -1,47 +1,222 @@
 import shelve
+import time
+from typing import Iterable, NamedTuple
 
-from . import data
+from . import data, index, snapshot
+from .fuzzy import Candidate, SectionMatcher
+from .landnumber import LandNumberSet
+from .lru import LRUCache
 from .normalizer import Normalizer
-from .tokenlizer import Tokenlizer
+from .tokenlizer import AddressToken, DictTokenlizer
 
 
-class SectCode:
+class SectCode(NamedTuple):
     county_code: str
     town_code: str
     sect_code: str
-    land_numbers: list[str]
+    land_numbers: LandNumberSet
+    # Problems that did not stop the conversion, e.g. land number items left out
+    warnings: tuple[str, ...] = ()
 
-    def __init__(self, county_code, town_code, sect_code, land_numbers):
-        self.county_code = county_code
-        self.town_code = town_code
-        self.sect_code = sect_code
-        self.land_numbers = land_numbers
+
+class MemoEntry(NamedTuple):
+    code: SectCode
+    # Seconds it took to compute `code` from the cached key
+    cost: float
+
+
+class ConvertError(NamedTuple):
+    # Position of the address in the convert_many input
+    index: int
+    address: str
+    message: str
 
 
 class SectCodeConverter:
     normalizer: Normalizer
-    tokenlizer: Tokenlizer
-    towncode_to_countycode: shelve.Shelf[str]
-    countyname_to_countycode: shelve.Shelf[str]
+    tokenlizer: DictTokenlizer
+    sect_index: index.SectIndex | None
+    towncode_to_countycode: shelve.Shelf[str] | dict[str, str]
+    countyname_to_countycode: shelve.Shelf[str] | dict[str, str]
+    townname_to_towncode: shelve.Shelf[str] | dict[str, str]
+    section_tables: LRUCache[tuple[str, str], shelve.Shelf[dict] | index.SectionTable]
 
-    def __init__(self):
+    raw_memo: LRUCache[str, MemoEntry] | None
+    normalized_memo: LRUCache[str, MemoEntry] | None
+    time_saved: float
+
+    # Unknown section names take the best fuzzy match scoring at least this, 0
+    # keeps them unresolved
+    fuzzy_threshold: float
+    section_matchers: dict[tuple[str, str], SectionMatcher]
+
+    def __init__(
+        self,
+        use_index: bool = True,
+        table_cache_size: int = 64,
+        memo_size: int = 0,
+        use_snapshot: bool = True,
+        fuzzy_threshold: float = 0.0,
+    ):
         self.normalizer = Normalizer()
+        self.fuzzy_threshold = fuzzy_threshold
+        # Built on the first miss in a town, kept for the converter's lifetime
+        self.section_matchers = {}
+
+        # Results memoized by raw address and by normalized address, 0 disables it
+        self.raw_memo = LRUCache(memo_size) if memo_size > 0 else None
+        self.normalized_memo = LRUCache(memo_size) if memo_size > 0 else None
+        self.time_saved = 0.0
+
+        # Open section tables keyed by (county_code, town_code), closed on eviction
+        self.section_tables = LRUCache(
+            table_cache_size, on_evict=lambda _, table: table.close()
+        )
+
+        # Prefer a snapshot of the consolidated index, fall back to the per-town
+        # shelves
+        if use_index and index.exists():
+            self.sect_index = index.SectIndex()
+            if use_snapshot:
+                tables = snapshot.load_or_build(self.sect_index)
+            else:
+                tables = snapshot.ConverterSnapshot.from_index(self.sect_index)
+
+            self.countyname_to_countycode = tables.countyname_to_countycode
+            self.townname_to_towncode = tables.townname_to_towncode
+            self.towncode_to_countycode = tables.towncode_to_countycode
+            self.tokenliizer = tables.tokenlizer
+        else:
+            self.sect_index = None
+            self.countyname_to_countycode = data.load_county_data()
+            self.townname_to_towncode = data.load_town_data()
+            self.towncode_to_countycode = data.load_towncode_to_countycode()
+
+            towncode_to_townname = {}
+            if data.check_db_exists(data.TOWN_CODE_TO_TOWN_NAME_DB_PATH):
+                shelf = data.load_towncode_to_townname()
+                towncode_to_townname = dict(shelf)
+                shelf.close()
+            towns = data.town_entries(
+                self.townname_to_towncode,
+                self.towncode_to_countycode,
+                towncode_to_townname,
+            )
+            self.tokenliizer = DictTokenlizer(
+                dict(self.countyname_to_countycode), towns
+            )
+
+    def load_section_table(
+        self, county_code: str, town_code: str
+    ) -> shelve.Shelf[dict] | index.SectionTable:
+        key = (county_code, town_code)
+        table = self.section_tables.get(key)
+        if table is not None:
+            return table
+
+        if self.sect_index is not None:
+            table = self.sect_index.section_table(county_code, town_code)
+        else:
+            table = data.load_sectname_to_sectcode(county_code, town_code)
+
+        self.section_tables.put(key, table)
+        return table
+
+    def section_matcher(self, county_code: str, town_code: str) -> SectionMatcher:
+        key = (county_code, town_code)
+        matcher = self.section_matchers.get(key)
+        if matcher is None:
+            matcher = SectionMatcher.from_table(
+                self.load_section_table(county_code, town_code), self.normalizer
+            )
+            self.section_matchers[key] = matcher
+        return matcher
+
+    def lookup_sect_code(self, county_code: str, town_code: str, sect: str) -> str:
+        """Sect code of a normalized section name, "" when it is not found."""
+        section = self.load_section_table(county_code, town_code).get(sect)
+        if section is not None:
+            return section.get("sectcode", "")
+        if self.fuzzy_threshold > 0:
+            candidate = self.section_matcher(county_code, town_code).accept(
+                sect, self.fuzzy_threshold
+            )
+            if candidate is not None:
+                return candidate.sect_code
+        return ""
+
+    def suggest_sections(self, address: str, k: int = 5) -> list[Candidate]:
+        """The k sections of the address's town closest to its section name."""
+        address_tokens, county_code, town_code = self._resolve(
+            self.normalizer.execute(address)
+        )
+        return self.section_matcher(county_code, town_code).match(
+            address_tokens.sect, k
+        )
 
-        self.countyname_to_countycode = data.load_county_data()
-        self.townname_to_towncode = data.load_town_data()
-        self.towncode_to_countycode = data.load_towncode_to_countycode()
+    def table_cache_stats(self) -> dict[str, int]:
+        return self.section_tables.stats()
 
-        city_list = list(self.countyname_to_countycode.keys())
-        town_list = list(self.townname_to_towncode.keys())
+    def clear_memo(self):
+        if self.raw_memo is not None and self.normalized_memo is not None:
+            self.raw_memo.clear()
+            self.normalized_memo.clear()
 
-        self.tokenliizer = Tokenlizer(city_list, town_list)
+    def close(self):
+        self.clear_memo()
+        self.section_tables.clear()
+
+        if self.sect_index is not None:
+            self.sect_index.close()
+        else:
+            self.countyname_to_countycode.close()
+            self.townname_to_towncode.close()
+            self.towncode_to_countycode.close()
+
+    def memo_stats(self) -> dict:
+        if self.raw_memo is None or self.normalized_memo is None:
+            return {}
+
+        return {
+            "raw": self.raw_memo.stats(),
+            "normalized": self.normalized_memo.stats(),
+            "hits": self.raw_memo.hits + self.normalized_memo.hits,
+            # A raw miss is either a normalized hit or a miss of both
+            "misses": self.normalized_memo.misses,
+            "time_saved": self.time_saved,
+        }
 
     def convert(self, address: str) -> SectCode:
-        address = self.normalizer.execute(address)
+        if self.raw_memo is None or self.normalized_memo is None:
+            return self.convert_normalized(self.normalizer.execute(address))
+
+        entry = self.raw_memo.get(address)
+        if entry is not None:
+            self.time_saved += entry.cost
+            return entry.code
+
+        start = time.perf_counter()
+        normalized = self.normalizer.execute(address)
+        normalize_cost = time.perf_counter() - start
+
+        entry = self.normalized_memo.get(normalized)
+        if entry is not None:
+            self.time_saved += entry.cost
+        else:
+            start = time.perf_counter()
+            code = self.convert_normalized(normalized)
+            entry = MemoEntry(code, time.perf_counter() - start)
+            self.normalized_memo.put(normalized, entry)
+
+        self.raw_memo.put(address, MemoEntry(entry.code, normalize_cost + entry.cost))
+        return entry.code
+
+    def _resolve(self, address: str) -> tuple[AddressToken, str, str]:
+        """Tokenize a normalized address, with its county and town codes."""
         address_tokens = self.tokenliizer.execute(address)
 
-        county_code = self.countyname_to_countycode.get(address_tokens.county, "")
-        town_code = self.townname_to_towncode.get(address_tokens.town, "")
+        county_code = address_tokens.county_code
+        town_code = address_tokens.town_code
 
         if county_code == "" and town_code:
             county_code = self.towncode_to_countycode.get(town_code, "")
@@ -51,30 +226,125 @@ class SectCodeConverter:
                 f"{address} City code {address_tokens.county} or town code {address_tokens.town} is not found"
             )
 
-        sectname_to_sectcode = data.load_sectname_to_sectcode(county_code, town_code)
-        sect_code = sectname_to_sectcode.get(address_tokens.sect, {}).get(
-            "sectcode", ""
+        return address_tokens, county_code, town_code
+
+    def convert_normalized(self, address: str) -> SectCode:
+        address_tokens, county_code, town_code = self._resolve(address)
+        land_description = address_tokens.land_description
+
+        return SectCode(
+            county_code,
+            town_code,
+            self.lookup_sect_code(county_code, town_code, address_tokens.sect),
+            land_description.land_numbers(),
+            land_description.warnings(),
         )
 
-        land_numbers = []
-        land_tokens = address_tokens.land.value.split("、")
+    def convert_many(
+        self, addresses: Iterable[str]
+    ) -> tuple[list[SectCode | None], list[ConvertError]]:
+        """
+        Convert a batch of addresses without raising on bad ones.
+
+        Distinct addresses are normalized and tokenized together, then grouped by
+        (county_code, town_code) so every section table is loaded once per
+        batch. Both memos are checked and filled like convert does. Results are in
+        input order, None where the address failed, and the failures are listed by
+        input position. Land number items that are not valid are left out of a
+        result and noted in its warnings.
+        """
+        addresses = list(addresses)
+        positions: dict[str, list[int]] = {}
+        for i, address in enumerate(addresses):
+            positions.setdefault(address, []).append(i)
 
-        for token in land_tokens:
-            if token == "":
+        memoize = self.raw_memo is not None and self.normalized_memo is not None
+        results: list[SectCode | None] = [None] * len(addresses)
+        pending = []
+        for address, indexes in positions.items():
+            entry = self.raw_memo.get(address) if memoize else None
+            if entry is None:
+                pending.append(address)
                 continue
+            self.time_saved += entry.cost
+            for i in indexes:
+                results[i] = entry.code
+
+        # Per-address costs are not measured, batch times are spread evenly
+        start = time.perf_counter()
+        normalized_addresses = self.normalizer.normalize_many(pending)
+        normalize_cost = (time.perf_counter() - start) / max(len(pending), 1)
 
-            # Special case for 956至960
-            if "至" in token:
-                start, end = token.split("至")
-                land_numbers.extend([i for i in range(int(start), int(end) + 1)])
+        start = time.perf_counter()
+        # By normalized address, None where it failed
+        converted: dict[str, SectCode | None] = {}
+        failures: dict[str, str] = {}
+        costs: dict[str, float] = {}
+        groups: dict[
+            tuple[str, str], list[tuple[str, str, LandNumberSet, tuple[str, ...]]]
+        ] = {}
+        for normalized in normalized_addresses:
+            if normalized in converted:
                 continue
 
-            digits = token.split("-")
-            if len(digits) == 2:
-                land_numbers.append(f"{int(digits[0]):04d}{int(digits[1]):04d}")
-            elif len(digits) == 1:
-                land_numbers.append(f"{int(digits[0]):04d}0000")
-            else:
-                print(f"Invalid land number {token}")
+            entry = self.normalized_memo.get(normalized) if memoize else None
+            if entry is not None:
+                self.time_saved += entry.cost
+                converted[normalized] = entry.code
+                costs[normalized] = entry.cost
+                continue
+
+            converted[normalized] = None
+            try:
+                address_tokens, county_code, town_code = self._resolve(normalized)
+            except ValueError as e:
+                failures[normalized] = str(e)
+                continue
+
+            land_description = address_tokens.land_description
+            groups.setdefault((county_code, town_code), []).append(
+                (
+                    normalized,
+                    address_tokens.sect,
+                    land_description.land_numbers(),
+                    land_description.warnings(),
+                )
+            )
+
+        for (county_code, town_code), items in groups.items():
+            for normalized, sect, land_numbers, warnings in items:
+                converted[normalized] = SectCode(
+                    county_code,
+                    town_code,
+                    self.lookup_sect_code(county_code, town_code, sect),
+                    land_numbers,
+                    warnings,
+                )
+
+        if memoize and groups:
+            cost = (time.perf_counter() - start) / sum(map(len, groups.values()))
+            for items in groups.values():
+                for normalized, *_ in items:
+                    costs[normalized] = cost
+                    self.normalized_memo.put(
+                        normalized, MemoEntry(converted[normalized], cost)
+                    )
+
+        errors = []
+        for address, normalized in zip(pending, normalized_addresses):
+            code = converted[normalized]
+            if code is None:
+                errors.extend(
+                    ConvertError(i, address, failures[normalized])
+                    for i in positions[address]
+                )
+                continue
+
+            for i in positions[address]:
+                results[i] = code
+            if memoize:
+                cost = normalize_cost + costs[normalized]
+                self.raw_memo.put(address, MemoEntry(code, cost))
 
-        return SectCode(county_code, town_code, sect_code, land_numbers)
+        errors.sort()
+        return results, errors
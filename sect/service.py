@@ -0,0 +1,290 @@
+import asyncio
+import json
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from . import index
+from .sectcode import ConvertError, SectCode, SectCodeConverter
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Memo entries kept by the resident converter, repeated lookups skip conversion
+DEFAULT_MEMO_SIZE = 65536
+
+# Requests larger than this are refused, a batch of a few thousand addresses fits
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+}
+
+
+def code_to_dict(code: SectCode) -> dict[str, str | list[str]]:
+    return {
+        "county_code": code.county_code,
+        "town_code": code.town_code,
+        "sect_code": code.sect_code,
+        "land_numbers": code.land_numbers.to_list(),
+        "warnings": list(code.warnings),
+    }
+
+
+def error_to_dict(error: ConvertError) -> dict[str, str | int]:
+    return {"index": error.index, "address": error.address, "message": error.message}
+
+
+def _index_fingerprint() -> tuple[int, int] | None:
+    try:
+        stat = os.stat(index.INDEX_PATH)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class BadRequest(Exception):
+    status: int
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class ConverterService:
+    """
+    Resident sectname to sect code lookup over HTTP/1.1, on TCP or a Unix socket.
+
+    One warm SectCodeConverter serves every connection. Connections are kept
+    alive and pipelined requests are answered in order. Conversion runs on the
+    event loop, a request never waits on another one's I/O.
+
+    Endpoints:
+        GET  /convert?address=...    one address
+        POST /convert                {"address": ...}
+        POST /convert_many           {"addresses": [...]}, same shape as convert_many
+        POST /reload                 reload the reference data
+        GET  /stats                  generation, request count and cache stats
+
+    Reloading builds a new converter in a thread and swaps it in once ready, so
+    requests keep being served from the old one meanwhile. With `watch_interval`
+    the sect index is checked that often and reloaded when it is rebuilt, e.g.
+    by `python -m sect.refresh`.
+    """
+
+    converter: SectCodeConverter
+    memo_size: int
+    watch_interval: float
+    generation: int
+    loaded_at: float
+    requests: int
+
+    def __init__(self, memo_size: int = DEFAULT_MEMO_SIZE, watch_interval: float = 0.0):
+        self.memo_size = memo_size
+        self.watch_interval = watch_interval
+        self.converter = SectCodeConverter(memo_size=memo_size)
+        self.fingerprint = _index_fingerprint()
+        self.generation = 1
+        self.loaded_at = time.time()
+        self.requests = 0
+        self.reload_lock: asyncio.Lock | None = None
+
+    async def reload(self) -> int:
+        """Swap in a converter built from the current reference data."""
+        if self.reload_lock is None:
+            self.reload_lock = asyncio.Lock()
+
+        async with self.reload_lock:
+            fingerprint = _index_fingerprint()
+            converter = await asyncio.get_running_loop().run_in_executor(
+                None, SectCodeConverter, True, 64, self.memo_size
+            )
+            old, self.converter = self.converter, converter
+            # Conversions never await, nothing can still be using the old one
+            old.close()
+            self.fingerprint = fingerprint
+            self.generation += 1
+            self.loaded_at = time.time()
+            return self.generation
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            if _index_fingerprint() != self.fingerprint:
+                await self.reload()
+
+    def convert(self, address) -> tuple[int, dict]:
+        if not isinstance(address, str):
+            raise BadRequest("address must be a string")
+
+        results, errors = self.converter.convert_many([address])
+        if errors:
+            return 422, {"error": errors[0].message}
+        return 200, {"result": code_to_dict(results[0])}
+
+    def convert_many(self, addresses) -> tuple[int, dict]:
+        if not isinstance(addresses, list) or not all(
+            isinstance(address, str) for address in addresses
+        ):
+            raise BadRequest("addresses must be a list of strings")
+
+        results, errors = self.converter.convert_many(addresses)
+        return 200, {
+            "results": [code_to_dict(code) if code else None for code in results],
+            "errors": [error_to_dict(error) for error in errors],
+        }
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "loaded_at": self.loaded_at,
+            "requests": self.requests,
+            "memo": self.converter.memo_stats(),
+            "table_cache": self.converter.table_cache_stats(),
+        }
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> tuple[int, dict]:
+        url = urlsplit(target)
+
+        if url.path == "/convert" and method == "GET":
+            address = parse_qs(url.query).get("address")
+            if not address:
+                raise BadRequest("address is required")
+            return self.convert(address[0])
+
+        if url.path in ("/convert", "/convert_many") and method == "POST":
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise BadRequest("body is not valid JSON")
+            if not isinstance(payload, dict):
+                raise BadRequest("body must be a JSON object")
+            if url.path == "/convert":
+                return self.convert(payload.get("address"))
+            return self.convert_many(payload.get("addresses"))
+
+        if url.path == "/reload" and method == "POST":
+            return 200, {"generation": await self.reload()}
+
+        if url.path == "/stats" and method == "GET":
+            return 200, self.stats()
+
+        if url.path in ("/convert", "/convert_many", "/reload", "/stats"):
+            raise BadRequest(f"{method} is not allowed on {url.path}", 405)
+        raise BadRequest(f"{url.path} not found", 404)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+
+                keep_alive = True
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        name, _, value = line.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = (
+                        connection != "close"
+                        if version == "HTTP/1.1"
+                        else connection == "keep-alive"
+                    )
+
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY_SIZE:
+                        keep_alive = False
+                        raise BadRequest("request body is too large", 413)
+                    body = await reader.readexactly(length) if length else b""
+                except BadRequest as e:
+                    status, payload = e.status, {"error": str(e)}
+                except ValueError:
+                    # A malformed request line or Content-Length leaves the stream
+                    # unusable
+                    status, payload = 400, {"error": "malformed request"}
+                    keep_alive = False
+                else:
+                    self.requests += 1
+                    try:
+                        status, payload = await self.dispatch(method, target, body)
+                    except BadRequest as e:
+                        status, payload = e.status, {"error": str(e)}
+                    except Exception as e:
+                        # The body was read whole, the connection stays usable
+                        status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                        "Content-Type: application/json; charset=utf-8\r\n"
+                        f"Content-Length: {len(content)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                        "\r\n"
+                    ).encode("latin-1")
+                    + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(
+        self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix: str = ""
+    ):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+
+        watcher = asyncio.create_task(self.watch()) if self.watch_interval > 0 else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self.converter.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Serve sectname to sect code conversion from a warm converter"
+    )
+    arg_parser.add_argument("--host", default=DEFAULT_HOST)
+    arg_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    arg_parser.add_argument(
+        "--unix", default="", help="listen on this Unix socket instead"
+    )
+    arg_parser.add_argument("--memo-size", type=int, default=DEFAULT_MEMO_SIZE)
+    arg_parser.add_argument(
+        "--watch",
+        type=float,
+        default=5.0,
+        help="seconds between checks for a rebuilt sect index, 0 disables reloading",
+    )
+    args = arg_parser.parse_args()
+
+    service = ConverterService(args.memo_size, args.watch)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
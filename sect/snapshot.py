@@ -0,0 +1,128 @@
+import os
+import pickle
+import struct
+import tempfile
+
+from . import data, index
+from .tokenlizer import DictTokenlizer
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(index.INDEX_PATH), "converter.snapshot")
+
+SNAPSHOT_MAGIC = b"SECTSNAP"
+# Bump whenever the pickled classes or the snapshot layout change
+SNAPSHOT_VERSION = 4
+
+# magic, version, then size and mtime of the index the snapshot was built from
+HEADER = struct.Struct("<8sIqq")
+
+
+def index_fingerprint(sect_index: index.SectIndex) -> tuple[int, int]:
+    # A stat is enough, hashing the index would cost more than the snapshot saves
+    stat = os.stat(sect_index.path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ConverterSnapshot:
+    """
+    SectCodeConverter lookup tables and tokenizer, ready to use.
+
+    Building them from the index means a binary search per town; the snapshot
+    pickles the finished objects and is tied to the index file it was built from.
+    """
+
+    countyname_to_countycode: dict[str, str]
+    townname_to_towncode: dict[str, str]
+    towncode_to_countycode: dict[str, str]
+    tokenlizer: DictTokenlizer
+
+    def __init__(
+        self,
+        countyname_to_countycode: dict[str, str],
+        townname_to_towncode: dict[str, str],
+        towncode_to_countycode: dict[str, str],
+        towncode_to_townname: dict[str, str],
+    ):
+        self.countyname_to_countycode = countyname_to_countycode
+        self.townname_to_towncode = townname_to_towncode
+        self.towncode_to_countycode = towncode_to_countycode
+
+        towns = data.town_entries(
+            townname_to_towncode, towncode_to_countycode, towncode_to_townname
+        )
+        self.tokenlizer = DictTokenlizer(countyname_to_countycode, towns)
+
+    @classmethod
+    def from_index(cls, sect_index: index.SectIndex) -> "ConverterSnapshot":
+        return cls(
+            dict(sect_index.countyname_to_countycode.items()),
+            dict(sect_index.townname_to_towncode.items()),
+            dict(sect_index.towncode_to_countycode.items()),
+            dict(sect_index.towncode_to_townname.items()),
+        )
+
+
+def save_snapshot(
+    snapshot: ConverterSnapshot,
+    fingerprint: tuple[int, int],
+    path: str = SNAPSHOT_PATH,
+):
+    # Converters in other processes can save at the same time, each writes its own
+    # temporary file and the last replace wins
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, *fingerprint))
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(
+    fingerprint: tuple[int, int], path: str = SNAPSHOT_PATH
+) -> ConverterSnapshot | None:
+    """The snapshot at path, or None if it is missing, stale or of another version."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size:
+                return None
+
+            magic, version, *snapshot_fingerprint = HEADER.unpack(header)
+            if (
+                magic != SNAPSHOT_MAGIC
+                or version != SNAPSHOT_VERSION
+                or tuple(snapshot_fingerprint) != fingerprint
+            ):
+                return None
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, AttributeError, EOFError):
+        return None
+
+
+def load_or_build(
+    sect_index: index.SectIndex, path: str = SNAPSHOT_PATH
+) -> ConverterSnapshot:
+    """Load the snapshot of sect_index, rebuilding and saving it when stale."""
+    fingerprint = index_fingerprint(sect_index)
+    snapshot = load_snapshot(fingerprint, path)
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = ConverterSnapshot.from_index(sect_index)
+    try:
+        save_snapshot(snapshot, fingerprint, path)
+    except OSError:
+        # A read-only install still works, it just builds the tables every time
+        pass
+    return snapshot
+
+
+if __name__ == "__main__":
+    sect_index = index.SectIndex()
+    save_snapshot(
+        ConverterSnapshot.from_index(sect_index), index_fingerprint(sect_index)
+    )
+    sect_index.close()
+    print(f"Wrote {SNAPSHOT_PATH}")
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import data, index
+
+# Same prefix as data.API_BASE_URL, so Downloader paths map onto fixture files
+URL_PREFIX = "/other"
+
+
+def _items_to_xml(root_tag: str, item_tag: str, items: list[dict[str, str]]) -> str:
+    root = ET.Element(root_tag)
+    for item in items:
+        element = ET.SubElement(root, item_tag)
+        for tag, text in item.items():
+            ET.SubElement(element, tag).text = text
+    return ET.tostring(root, encoding="unicode")
+
+
+def _write(file_path: str, text: str):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def record_fixtures(fixtures_dir: str) -> int:
+    """
+    Render the local reference data as API responses under fixtures_dir.
+
+    Returns the number of files written. Town names are ambiguous in the town
+    table, so towns are grouped by county through data.town_entries.
+    """
+    sect_index = index.SectIndex() if index.exists() else None
+    if sect_index is not None:
+        county = dict(sect_index.countyname_to_countycode)
+        town = dict(sect_index.townname_to_towncode)
+        towncode = dict(sect_index.towncode_to_countycode)
+        townname = dict(sect_index.towncode_to_townname)
+    else:
+        county = dict(data.load_county_data())
+        town = dict(data.load_town_data())
+        towncode = dict(data.load_towncode_to_countycode())
+        townname = {}
+        if data.check_db_exists(data.TOWN_CODE_TO_TOWN_NAME_DB_PATH):
+            townname = dict(data.load_towncode_to_townname())
+
+    count = 0
+    _write(
+        os.path.join(fixtures_dir, "ListCounty.xml"),
+        _items_to_xml(
+            "countyItems",
+            "countyItem",
+            [{"countycode": c, "countyname": n} for n, c in county.items()],
+        ),
+    )
+    count += 1
+
+    towns_by_county: dict[str, list[dict[str, str]]] = {c: [] for c in county.values()}
+    for name, code, county_code in data.town_entries(town, towncode, townname):
+        towns_by_county.setdefault(county_code or code[:1], []).append(
+            {"towncode": code, "townname": name}
+        )
+
+    for county_code, towns in towns_by_county.items():
+        _write(
+            os.path.join(fixtures_dir, "ListTown", f"{county_code}.xml"),
+            _items_to_xml("townItems", "townItem", towns),
+        )
+        count += 1
+
+        for item in towns:
+            town_code = item["towncode"]
+            if sect_index is not None:
+                table = sect_index.section_table(county_code, town_code)
+            else:
+                file_path = data.generate_land_section_file_path(county_code, town_code)
+                if not data.check_db_exists(file_path):
+                    continue
+                table = data.load_sectname_to_sectcode(county_code, town_code)
+
+            sections = [dict(section) for section in table.values()]
+            table.close()
+            if not sections:
+                continue
+
+            _write(
+                os.path.join(
+                    fixtures_dir, "ListLandSection", county_code, f"{town_code}.xml"
+                ),
+                _items_to_xml("sectItems", "sectItem", sections),
+            )
+            count += 1
+
+    if sect_index is not None:
+        sect_index.close()
+    return count
+
+
+class StubServer:
+    """
+    Local stand-in for the NLSC API, serving the files written by record_fixtures.
+
+    `latency` seconds are slept before every response and the first `fail_first`
+    requests of each path are answered with 503, to exercise retries.
+    """
+
+    fixtures_dir: str
+    latency: float
+    fail_first: int
+    requests: int
+
+    def __init__(
+        self,
+        fixtures_dir: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        fail_first: int = 0,
+    ):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.fail_first = fail_first
+        self.requests = 0
+        self.attempts: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{URL_PREFIX}"
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        with self.lock:
+            self.requests += 1
+            attempt = self.attempts.get(handler.path, 0) + 1
+            self.attempts[handler.path] = attempt
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if attempt <= self.fail_first:
+            handler.send_response(503)
+            handler.end_headers()
+            return
+
+        path = handler.path
+        file_path = ""
+        if path.startswith(URL_PREFIX + "/"):
+            file_path = os.path.join(
+                self.fixtures_dir, *path[len(URL_PREFIX) + 1 :].split("/")
+            )
+            file_path += ".xml"
+
+        if not file_path or not os.path.isfile(file_path):
+            # The API answers unknown towns with an empty list
+            body = b"<sectItems></sectItems>" if "ListLandSection" in path else b""
+            status = 200 if body else 404
+        else:
+            with open(file_path, "rb") as f:
+                body = f.read()
+            status = 200
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/xml; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self) -> "StubServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Serve recorded API fixtures")
+    arg_parser.add_argument("fixtures_dir")
+    arg_parser.add_argument("--port", type=int, default=8000)
+    arg_parser.add_argument("--latency", type=float, default=0.0)
+    arg_parser.add_argument("--record", action="store_true")
+    args = arg_parser.parse_args()
+
+    if args.record:
+        print(f"Recorded {record_fixtures(args.fixtures_dir)} fixtures")
+
+    server = StubServer(args.fixtures_dir, port=args.port, latency=args.latency)
+    print(f"Serving {server.base_url}")
+    server.server.serve_forever()
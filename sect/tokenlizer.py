@@ -1,7 +1,13 @@
 import re
+from typing import Iterable, Mapping
+
+from . import landparser
+from .landparser import EMPTY_DESCRIPTION, LandDescription
 
 
 class Token:
+    __slots__ = ("value", "unit")
+
     value: str
     unit: str
 
@@ -14,23 +20,101 @@ class Token:
 
 
 class AddressToken:
+    __slots__ = (
+        "county",
+        "town",
+        "sect",
+        "land_text",
+        "parsed_land",
+        "county_code",
+        "town_code",
+    )
+
     county: str
     town: str
     sect: str
-    land: Token
+    # The text after the section, parsed into land_description on first use
+    land_text: str
+    parsed_land: LandDescription | None
+    county_code: str
+    town_code: str
 
     def __init__(self):
         self.county = ""
         self.town = ""
         self.sect = ""
-        self.land = Token()
+        self.land_text = ""
+        self.parsed_land = EMPTY_DESCRIPTION
+        self.county_code = ""
+        self.town_code = ""
+
+    @property
+    def land_description(self) -> LandDescription:
+        description = self.parsed_land
+        if description is None:
+            description = landparser.parse_land(self.land_text, require_unit=True)
+            self.parsed_land = description
+        return description
+
+    @property
+    def land(self) -> Token:
+        description = self.land_description
+        return Token(description.value, description.unit)
 
     def __repr__(self):
+        land = self.land
         return ",".join(
-            [self.county, self.town, self.sect, self.land.value, self.land.unit]
+            [self.county, self.town, self.sect, land.value, land.unit]
         ).strip()
 
 
+def set_land(address_token: AddressToken, text: str):
+    """
+    Set the land part of an address, the text after its section. Tokenizing
+    does not need it parsed, so that is left to the first land_description.
+    """
+    address_token.land_text = text
+    address_token.parsed_land = None
+
+
+def split_sect(text: str) -> tuple[str, str]:
+    """
+    Split text after its section name, which ends with the last 段, into the
+    section and the land part. A 段 inside a parenthesized note, e.g.
+    "(含鹽埔段1389地號)", does not end the section.
+    """
+    end = len(text)
+    for paren in "(（":
+        i = text.find(paren, 0, end)
+        if i >= 0:
+            end = i
+
+    sect_end = text.rfind("段", 0, end)
+    if sect_end < 1:
+        sect_end = text.rfind("段")
+    if sect_end < 1:
+        return "", text
+    return text[: sect_end + 1], text[sect_end + 1 :]
+
+
+def split_sect_lines(text: str) -> tuple[str, str]:
+    """
+    split_sect for text that may span lines. Every line loses its section, and
+    the section of the last line that has one is returned.
+    """
+    if "\n" not in text:
+        return split_sect(text)
+
+    sect = ""
+    lands = []
+    for line in text.split("\n"):
+        line_sect, land = split_sect(line)
+        if line_sect:
+            sect = line_sect
+        lands.append(land)
+    return sect, "\n".join(lands)
+
+
 class Tokenlizer:
     token_regex: re.Pattern
 
@@ -45,16 +129,6 @@ class Tokenlizer:
             re.X,
         )
 
-        self.sect_token_regex = re.compile(
-            f"""(?P<value>.+)(?P<unit>地段|小段|區段|鎮段|段)""",
-            re.X,
-        )
-
-        self.land_token_regex = re.compile(
-            f"""(?P<value>.+?)(?P<unit>地號|號)""",
-            re.X,
-        )
-
     def execute(self, text) -> AddressToken:
         address_token = AddressToken()
 
@@ -69,20 +143,160 @@ class Tokenlizer:
 
             return ""
 
-        def replace_sect_token(m: re.Match):
-            if m.groups():
-                address_token.sect = m.group("value") + m.group("unit")
-            return ""
-
-        def replace_land_token(m: re.Match):
-            if m.groups() and address_token.land.value == "":
-                address_token.land.value = m.group("value")
-                address_token.land.unit = m.group("unit")
-            return ""
-
         sub_address = self.county_token_regex.sub(replace_county_token, text)
         sub_address = self.town_token_regex.sub(replace_town_token, sub_address)
-        sub_address = self.sect_token_regex.sub(replace_sect_token, sub_address)
-        sub_address = self.land_token_regex.sub(replace_land_token, sub_address)
+        # Every unit a section name ends with ends with 段, so the last 段 of a
+        # line ends its section
+        address_token.sect, land = split_sect_lines(sub_address)
+        set_land(address_token, land)
+
+        return address_token
+
+
+class CountyWord:
+    name: str
+    code: str
+    is_county = True
+
+    def __init__(self, name: str, code: str):
+        self.name = name
+        self.code = code
+
+
+class TownWord:
+    name: str
+    # The code of the first town of this name, for addresses without a county
+    default_code: str
+    code_by_county: dict[str, str]
+    is_county = False
+
+    def __init__(self, name: str, code: str):
+        self.name = name
+        self.default_code = code
+        self.code_by_county = {}
+
+    def resolve(self, county_code: str) -> str:
+        """The town's code in county_code, "" when that county has no such town."""
+        if not county_code:
+            return self.default_code
+        return self.code_by_county.get(county_code, "")
+
+
+class DictTokenlizer:
+    """
+    Dictionary version of Tokenlizer.
+
+    Every county and town name is kept in one dict, built once. Names are found by
+    looking up the characters before each character a name can end with (縣, 市,
+    區, ...), so an address is scanned once in C and only a handful of dict lookups
+    run per address. The result matches Tokenlizer, with `county_code` and
+    `town_code` filled in as well.
+
+    Town entries keep their codes per county. A town name shared by several
+    counties (e.g. 中正區) takes the code of the county found in the same
+    address, or of the first town given when there is none. A town not in the
+    county found gets no code, so the address fails to convert rather than
+    taking another county's town.
+    """
+
+    words: dict[str, "CountyWord | TownWord"]
+    word_lengths: list[int]
+    word_end_regex: re.Pattern
+
+    def __init__(
+        self,
+        countyname_to_countycode: Mapping[str, str],
+        towns: Iterable[tuple[str, str, str]],
+    ):
+        """`towns` yields (town_name, town_code, county_code), see data.town_entries."""
+        self.words = {}
+
+        for name, town_code, county_code in towns:
+            word = self.words.get(name)
+            if word is None:
+                word = TownWord(name, town_code)
+                self.words[name] = word
+            word.code_by_county.setdefault(county_code, town_code)
+
+        # Counties take precedence over towns of the same name (嘉義市, 新竹市)
+        for name, code in countyname_to_countycode.items():
+            self.words[name] = CountyWord(name, code)
+
+        self.word_lengths = sorted({len(name) for name in self.words}, reverse=True)
+        end_chars = "".join(sorted({name[-1] for name in self.words}))
+        self.word_end_regex = re.compile(f"[{re.escape(end_chars)}]")
+
+    def _find_words(self, text: str) -> list[tuple[int, int, "CountyWord | TownWord"]]:
+        """Every (start, end, word) occurrence in text, sorted by start."""
+        words = self.words
+        found = []
+        for m in self.word_end_regex.finditer(text):
+            end = m.end()
+            for length in self.word_lengths:
+                start = end - length
+                if start < 0:
+                    continue
+                word = words.get(text[start:end])
+                if word is not None:
+                    found.append((start, end, word))
+
+        if len(found) > 1:
+            found.sort(key=lambda item: item[0])
+        return found
+
+    def _take_words(
+        self,
+        text: str,
+        found: list[tuple[int, int, "CountyWord | TownWord"]],
+        address_token: AddressToken,
+    ) -> str:
+        # Counties are taken out first, leftmost first and without overlaps, then
+        # towns from whatever is left
+        counties = []
+        county_end = 0
+        for start, end, word in found:
+            if word.is_county and start >= county_end:
+                address_token.county = word.name
+                address_token.county_code = word.code
+                counties.append((start, end))
+                county_end = end
+
+        removed = counties
+        town = None
+        town_end = 0
+        for start, end, word in found:
+            if word.is_county or start < town_end:
+                continue
+            if counties and any(s < end and start < e for s, e in counties):
+                continue
+            town = word
+            removed = removed + [(start, end)]
+            town_end = end
+
+        if town is not None:
+            address_token.town = town.name
+            address_token.town_code = town.resolve(address_token.county_code)
+
+        if len(removed) == 1:
+            start, end = removed[0]
+            return text[:start] + text[end:]
+
+        rest = []
+        kept = 0
+        for start, end in sorted(removed):
+            rest.append(text[kept:start])
+            kept = end
+        rest.append(text[kept:])
+        return "".join(rest)
+
+    def execute(self, text) -> AddressToken:
+        address_token = AddressToken()
+
+        found = self._find_words(text)
+        sub_address = text
+        if found:
+            sub_address = self._take_words(text, found, address_token)
 
+        address_token.sect, land = split_sect_lines(sub_address)
+        set_land(address_token, land)
         return address_token
@@ -1,6 +1,8 @@
 import re
 from collections import namedtuple
 
+from sect.normalizer import Normalizer
+
 
 class Address(object):
     TOKEN_RE = re.compile(
@@ -22,35 +24,6 @@ class Address(object):
     VALUE = 0
     UNIT = 1
 
-    GLOBAL_REPLACE_RE = re.compile(
-        """
-        [ 　台]
-        |
-        [０-９]    
-    """,
-        re.X,
-    )
-
-    NO_HYPHEN_REPLACE_RE = re.compile(
-        """
-        [之–—]
-    """,
-        re.X,
-    )
-
-    NO_NUM_REPLACE_RE = re.compile(
-        """
-        (?:
-            [一二三四五六七八九]?
-            [一二三四五六七八九]?
-            十?
-            [一二三四五六七八九]
-        )
-        (?=-|號|地號|$)
-    """,
-        re.X,
-    )
-
     # the strs matched but not in here will be removed
     TO_REPLACE_MAP = {
         "之": "-",
@@ -80,52 +53,12 @@ class Address(object):
 
     CHINESE_NUMERALS_SET = set("一二三四五六七八九")
 
+    # Unlike sect.normalizer, "." is kept and "、" does not end a numeral
+    NORMALIZER = Normalizer(TO_REPLACE_MAP, numeral_terminators=("-", "號", "地號"))
+
     @staticmethod
     def normalize(s):
-
-        if isinstance(s, bytes):
-            s = s.decode("utf-8")
-
-        def replace(m):
-
-            found = m.group()
-
-            if found in Address.TO_REPLACE_MAP:
-                return Address.TO_REPLACE_MAP[found]
-
-            return ""
-
-        def replace_num(m):
-
-            found = m.group()
-
-            if found in Address.TO_REPLACE_MAP:
-                return Address.TO_REPLACE_MAP[found]
-
-            if found[0] in Address.CHINESE_NUMERALS_SET:
-                # for '十一' to '九十九'
-                len_found = len(found)
-                if len_found == 2:
-                    return "1" + Address.TO_REPLACE_MAP[found[1]]
-                if len_found == 3:
-                    return (
-                        Address.TO_REPLACE_MAP[found[0]]
-                        + Address.TO_REPLACE_MAP[found[2]]
-                    )
-
-            return ""
-
-        s = Address.GLOBAL_REPLACE_RE.sub(replace, s)
-
-        s = Address.NO_HYPHEN_REPLACE_RE.sub(replace, s)
-
-        while True:
-            replaced = Address.NO_NUM_REPLACE_RE.sub(replace_num, s)
-            if s == replaced:
-                break
-            s = replaced
-
-        return s
+        return Address.NORMALIZER.execute(s)
 
     @staticmethod
     def tokenize(addr_str, normalize=True):
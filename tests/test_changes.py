@@ -0,0 +1,104 @@
+import random
+
+from main import ChangeDetector, LandUseViolation
+from sect.landnumber import EMPTY
+
+CITIES = ["新北市", "彰化縣"]
+ZONES = ["一般農業區", "特定農業區"]
+USES = ["農牧用地", "養殖用地"]
+STATUSES = ["裁處罰鍰", "已停止供水供電", "已自行拆除"]
+
+
+def violation(sectname: str, number: str, city: str, zone: str, use: str, status):
+    return LandUseViolation(
+        "", "", "", number, city, sectname, "", EMPTY, zone, use, list(status)
+    )
+
+
+def old_diff(before: LandUseViolation, after: LandUseViolation) -> dict:
+    """The field by field diff LandUseViolation.diff used to compute."""
+    return {
+        "year": after.year if before.year != after.year else "",
+        "month": after.month if before.month != after.month else "",
+        "number": after.number if before.number != after.number else "",
+        "city": after.city if before.city != after.city else "",
+        "usage_zone": after.usage_zone if before.usage_zone != after.usage_zone else "",
+        "use": after.use if before.use != after.use else "",
+        "status": [status for status in after.status if status not in before.status],
+    }
+
+
+def random_sheet(rng: random.Random, sectnames: list[str], name: str):
+    rows = []
+    for sectname in rng.sample(sectnames, len(sectnames) // 2):
+        row = violation(
+            sectname,
+            str(rng.randint(1, 3)),
+            rng.choice(CITIES),
+            rng.choice(ZONES),
+            rng.choice(USES),
+            rng.sample(STATUSES, rng.randint(0, 2)),
+        )
+        row.id = sectname
+        row.year = name[:3]
+        row.month = name[3:]
+        rows.append(row)
+    return rows
+
+
+def test_detect_matches_the_old_diff():
+    rng = random.Random(0)
+    sectnames = [f"北里段{i}地號" for i in range(200)]
+    detector = ChangeDetector()
+    last_seen: dict[str, LandUseViolation] = {}
+
+    for month in range(1, 13):
+        rows = random_sheet(rng, sectnames, f"112{month:02d}")
+        updates = detector.detect(rows)
+
+        for i, row in enumerate(rows):
+            previous = last_seen.get(row.sectname)
+            last_seen[row.sectname] = row
+            if previous is None:
+                assert i not in updates
+                continue
+
+            # A status dropped or reordered counts as a change too, its update
+            # then only carries the new year and month
+            fields = ("number", "city", "usage_zone", "use", "status")
+            if all(getattr(previous, f) == getattr(row, f) for f in fields):
+                assert i not in updates
+                continue
+
+            diff = old_diff(previous, row)
+            update = updates[i]
+            assert update.id == row.id
+            assert update.sectname == "" and update.land_numbers is EMPTY
+            assert {field: getattr(update, field) for field in diff} == diff
+
+
+def test_observe_seeds_the_last_seen_rows():
+    row = violation(
+        "北里段1地號", "1", "新北市", "一般農業區", "農牧用地", ["裁處罰鍰"]
+    )
+    detector = ChangeDetector()
+    detector.observe("11201", [row])
+
+    same = violation(
+        "北里段1地號", "1", "新北市", "一般農業區", "農牧用地", ["裁處罰鍰"]
+    )
+    same.year, same.month = "112", "02"
+    assert detector.detect([same]) == {}
+
+    changed = violation(
+        "北里段1地號",
+        "1",
+        "新北市",
+        "一般農業區",
+        "農牧用地",
+        ["裁處罰鍰", "已自行拆除"],
+    )
+    changed.year, changed.month = "112", "03"
+    update = detector.detect([changed])[0]
+    assert update.status == ["已自行拆除"]
+    assert (update.year, update.month, update.city) == ("", "03", "")
@@ -0,0 +1,163 @@
+import json
+import os
+
+import pytest
+
+from main import EMPTY, LandUseViolation, Parser
+
+WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(__file__)), "112.xlsx")
+
+ROWS = {
+    "11201": [
+        ("1", "烏日區北里段277地號", ["裁處罰鍰"]),
+        ("2", "烏日區北里段278、x地號", ["裁處罰鍰"]),
+        ("3", "不存在的地址", []),
+    ],
+    "11202": [
+        ("1", "烏日區北里段277地號", ["裁處罰鍰", "已停止供水供電"]),
+        ("2", "烏日區北里段279至281地號", ["裁處罰鍰"]),
+    ],
+    "11203": [
+        ("1", "烏日區北里段277地號", ["裁處罰鍰", "已停止供水供電"]),
+        ("2", "烏日區北里段282地號", []),
+    ],
+}
+
+
+def sheet(name: str, rows=None) -> tuple[str, list[LandUseViolation]]:
+    # Merging fills in ids and codes, every parse gets fresh rows
+    return name, [
+        LandUseViolation(
+            "",
+            "",
+            "",
+            number,
+            "臺中市",
+            sectname,
+            "",
+            EMPTY,
+            "一般農業區",
+            "農牧用地",
+            status,
+        )
+        for number, sectname, status in (rows or ROWS[name])
+    ]
+
+
+def state(parser: Parser) -> dict:
+    return json.loads(
+        json.dumps(
+            {
+                "sheets": [s.to_dict() for s in parser.sheet_states],
+                "violations": [v.to_dict() for v in parser.violation_dict.values()],
+                "updates": [v.to_dict() for v in parser.update_list],
+                "errors": [e.to_dict() for e in parser.errors],
+                "warnings": [w.to_dict() for w in parser.warnings],
+                "parcels": parser.parcels.to_dict(),
+            }
+        )
+    )
+
+
+def parsed(*sheets) -> Parser:
+    parser = Parser()
+    parser.parse_sheets(sheets)
+    return parser
+
+
+def test_errors_and_warnings_are_recorded():
+    parser = parsed(sheet("11201"))
+
+    assert [e.sectname for e in parser.errors] == ["不存在的地址"]
+    assert [w.message for w in parser.warnings] == ["Invalid land number x"]
+    assert parser.violation_dict["烏日區北里段278、x地號"].land_numbers.to_list() == [
+        "02780000"
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 256])
+def test_parallel_parse_matches_serial(chunk_size):
+    sheets = [sheet(name) for name in ROWS]
+    parallel = Parser(workers=2, chunk_size=chunk_size)
+    parallel.parse_sheets(sheets)
+    assert state(parallel) == state(parsed(*(sheet(name) for name in ROWS)))
+
+
+def test_parallel_parse_of_the_workbook_matches_serial():
+    serial = Parser()
+    serial.parse_workbook(WORKBOOK)
+    parallel = Parser(workers=2, chunk_size=64)
+    parallel.parse_workbook(WORKBOOK)
+    assert state(parallel) == state(serial)
+
+
+def test_resume_from_a_checkpoint(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    parsed(sheet("11201"), sheet("11202")).save_checkpoint(path)
+
+    parser = Parser()
+    assert parser.load_checkpoint(path)
+    parser.parse_sheets([sheet("11201"), sheet("11202"), sheet("11203")])
+
+    expected = parsed(sheet("11201"), sheet("11202"), sheet("11203"))
+    assert state(parser) == state(expected)
+
+
+def test_unchanged_sheets_are_not_merged_again(tmp_path, monkeypatch):
+    path = str(tmp_path / "checkpoint.json")
+    expected = parsed(sheet("11201"), sheet("11202"))
+    expected.save_checkpoint(path)
+
+    merged = []
+    original = Parser.merge_sheet
+    monkeypatch.setattr(
+        Parser,
+        "merge_sheet",
+        lambda self, name, *args: merged.append(name) or original(self, name, *args),
+    )
+    parser = Parser()
+    parser.load_checkpoint(path)
+    parser.parse_sheets([sheet("11201"), sheet("11202")])
+
+    assert merged == []
+    assert state(parser) == state(expected)
+
+
+def test_a_modified_sheet_rolls_back_what_followed(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    parsed(sheet("11201"), sheet("11202"), sheet("11203")).save_checkpoint(path)
+
+    modified = [("1", "烏日區北里段277地號", []), ("2", "烏日區北里段290地號", [])]
+    parser = Parser()
+    parser.load_checkpoint(path)
+    parser.parse_sheets([sheet("11201"), sheet("11202", modified), sheet("11203")])
+
+    expected = parsed(sheet("11201"), sheet("11202", modified), sheet("11203"))
+    assert state(parser) == state(expected)
+
+
+def test_fewer_sheets_roll_back_the_rest(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    parsed(sheet("11201"), sheet("11202"), sheet("11203")).save_checkpoint(path)
+
+    parser = Parser()
+    parser.load_checkpoint(path)
+    parser.parse_sheets([sheet("11201")])
+
+    assert state(parser) == state(parsed(sheet("11201")))
+    assert (
+        parser.parcels.lookup_code(parser.converter.convert("烏日區北里段280地號"))
+        == []
+    )
+
+
+def test_missing_checkpoint(tmp_path):
+    assert not Parser().load_checkpoint(str(tmp_path / "missing.json"))
+
+
+def test_unsupported_checkpoint_version(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    path.write_text(json.dumps({"version": 0}))
+
+    with pytest.raises(ValueError, match="Unsupported checkpoint version"):
+        Parser().load_checkpoint(str(path))
@@ -0,0 +1,47 @@
+import socket
+import threading
+
+import pytest
+
+from sect.client import ServiceClient
+
+
+@pytest.fixture
+def dropping_server():
+    """A server that reads one request per connection and closes it unanswered."""
+    listener = socket.create_server(("127.0.0.1", 0))
+    listener.settimeout(0.05)
+    requests: list[bytes] = []
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                continue
+            with conn:
+                requests.append(conn.recv(65536).split(b"\r\n", 1)[0])
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield listener.getsockname()[1], requests
+    stop.set()
+    thread.join()
+    listener.close()
+
+
+def test_get_is_retried_once(dropping_server):
+    port, requests = dropping_server
+    with ServiceClient(port=port) as client:
+        with pytest.raises(ConnectionError):
+            client.stats()
+    assert requests == [b"GET /stats HTTP/1.1"] * 2
+
+
+def test_reload_is_not_retried(dropping_server):
+    port, requests = dropping_server
+    with ServiceClient(port=port) as client:
+        with pytest.raises(ConnectionError):
+            client.reload()
+    assert requests == [b"POST /reload HTTP/1.1"]
@@ -0,0 +1,211 @@
+import os
+
+import pytest
+
+from sect import data, index, refresh, snapshot
+from sect.downloader import Downloader
+from sect.stub_server import StubServer, _items_to_xml, _write
+
+COUNTIES = {"B": "臺中市", "N": "彰化縣"}
+TOWNS = {"B": {"B23": "烏日區", "B01": "中區"}, "N": {"N02": "鹿港鎮"}}
+SECTIONS = {
+    "B23": [("北里段", "7316"), ("溪南段", "7317")],
+    "B01": [("公園段", "0001")],
+    "N02": [("郭厝段", "0384")],
+}
+
+
+def write_fixtures(fixtures_dir: str, towns=TOWNS, sections=SECTIONS):
+    _write(
+        os.path.join(fixtures_dir, "ListCounty.xml"),
+        _items_to_xml(
+            "countyItems",
+            "countyItem",
+            [{"countycode": c, "countyname": n} for c, n in COUNTIES.items()],
+        ),
+    )
+    for county_code, county_towns in towns.items():
+        _write(
+            os.path.join(fixtures_dir, "ListTown", f"{county_code}.xml"),
+            _items_to_xml(
+                "townItems",
+                "townItem",
+                [{"towncode": c, "townname": n} for c, n in county_towns.items()],
+            ),
+        )
+        for town_code in county_towns:
+            _write(
+                os.path.join(
+                    fixtures_dir, "ListLandSection", county_code, f"{town_code}.xml"
+                ),
+                _items_to_xml(
+                    "sectItems",
+                    "sectItem",
+                    [
+                        {
+                            "office": "BA",
+                            "officestr": "事務所",
+                            "sectcode": code,
+                            "sectstr": name,
+                        }
+                        for name, code in sections[town_code]
+                    ],
+                ),
+            )
+
+
+@pytest.fixture
+def stub(tmp_path):
+    fixtures_dir = str(tmp_path / "fixtures")
+    write_fixtures(fixtures_dir)
+    with StubServer(fixtures_dir) as server:
+        server.fixtures_dir = fixtures_dir
+        yield server
+
+
+def downloader(stub: StubServer) -> Downloader:
+    return Downloader(stub.base_url, rate_limit=1000.0, backoff=0.0)
+
+
+def test_write_shelf_round_trip(tmp_path):
+    path = str(tmp_path / "table")
+    assert not data.check_db_exists(path)
+
+    data.write_shelf(path, {"a": {"x": 1}, "b": "2"})
+    assert data.check_db_exists(path)
+    shelf = data.open_shelf(path)
+    assert dict(shelf) == {"a": {"x": 1}, "b": "2"}
+    shelf.close()
+
+
+def test_write_shelf_swaps_versions(tmp_path):
+    path = str(tmp_path / "table")
+    data.write_shelf(path, {"a": "1"})
+    reader = data.open_shelf(path)
+
+    data.write_shelf(path, {"a": "2"})
+    # A reader of the previous version keeps working
+    assert reader["a"] == "1"
+    reader.close()
+    assert data.open_shelf(path)["a"] == "2"
+
+    data.write_shelf(path, {"a": "3"})
+    data.write_shelf(path, {"a": "4"})
+    assert data.open_shelf(path)["a"] == "4"
+    # The current and the previous version, plus the pointer
+    assert sorted(
+        name for name in os.listdir(tmp_path) if name.endswith((".dat", ".current"))
+    ) == ["table.current", "table.v3.dat", "table.v4.dat"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_write_shelf_over_an_unversioned_shelf(tmp_path):
+    path = str(tmp_path / "table")
+    shelf = data.open_shelf(path)
+    shelf["a"] = "old"
+    shelf.close()
+
+    data.write_shelf(path, {"a": "new"})
+    data.write_shelf(path, {"a": "newer"})
+    assert data.open_shelf(path)["a"] == "newer"
+
+    data.remove_shelf(path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_init_downloads_every_table(stub, tmp_path):
+    data_dir = str(tmp_path / "data")
+    data.init(downloader(stub), data_dir)
+
+    assert dict(data.load_county_data(os.path.join(data_dir, "county"))) == {
+        "臺中市": "B",
+        "彰化縣": "N",
+    }
+    sections = data.load_sectname_to_sectcode("B", "B23", data_dir)
+    assert {name: section["sectcode"] for name, section in sections.items()} == {
+        "北里段": "7316",
+        "溪南段": "7317",
+    }
+
+    sect_index = index.SectIndex(os.path.join(data_dir, "sect.idx"))
+    assert sect_index.section_table("N", "N02")["郭厝段"]["sectcode"] == "0384"
+    sect_index.close()
+
+
+def test_towns_sharing_a_name_resolve_by_county(tmp_path):
+    towns = {"B": {"B02": "東區", "B23": "烏日區"}, "N": {"N01": "東區"}}
+    sections = dict(SECTIONS, B02=[("旱溪段", "0201")], N01=[("東門段", "0101")])
+    fixtures_dir = str(tmp_path / "fixtures")
+    write_fixtures(fixtures_dir, towns={**TOWNS, **towns}, sections=sections)
+    data_dir = str(tmp_path / "data")
+    with StubServer(fixtures_dir) as stub:
+        data.init(downloader(stub), data_dir)
+
+    # Both towns got their land sections, not just the one the town table kept
+    assert data.check_db_exists(os.path.join(data_dir, "B_B02"))
+    assert data.check_db_exists(os.path.join(data_dir, "N_N01"))
+
+    sect_index = index.SectIndex(os.path.join(data_dir, "sect.idx"))
+    tokenlizer = snapshot.ConverterSnapshot.from_index(sect_index).tokenlizer
+    sect_index.close()
+
+    tokens = tokenlizer.execute("臺中市東區旱溪段1地號")
+    assert (tokens.county_code, tokens.town_code) == ("B", "B02")
+    tokens = tokenlizer.execute("彰化縣東區東門段1地號")
+    assert (tokens.county_code, tokens.town_code) == ("N", "N01")
+    # Without a county, the town the town table kept
+    assert tokenlizer.execute("東區東門段1地號").town_code == "N01"
+    # A county without a town of that name gives no town code
+    assert tokenlizer.execute("臺中市鹿港鎮郭厝段1地號").town_code == ""
+
+
+def test_refresh_rewrites_only_what_changed(stub, tmp_path):
+    data_dir = str(tmp_path / "data")
+    data.init(downloader(stub), data_dir)
+
+    summary = refresh.refresh(downloader(stub), data_dir)
+    # Nothing is in the manifest yet, every table is compared and none differs
+    assert not summary.modified
+    # The county table, the three town tables and three towns
+    assert refresh.refresh(downloader(stub), data_dir).unchanged == 7
+
+    sections = dict(SECTIONS, B23=[("北里段", "7316"), ("新段", "7318")])
+    write_fixtures(stub.fixtures_dir, sections=sections)
+    summary = refresh.refresh(downloader(stub), data_dir)
+
+    assert [table.name for table in summary.tables] == ["B_B23"]
+    assert summary.tables[0].added == ["新段"]
+    assert summary.tables[0].removed == ["溪南段"]
+    sect_index = index.SectIndex(os.path.join(data_dir, "sect.idx"))
+    assert sorted(sect_index.section_table("B", "B23").keys()) == ["北里段", "新段"]
+    sect_index.close()
+
+
+def test_refresh_deletes_towns_no_longer_listed(stub, tmp_path):
+    data_dir = str(tmp_path / "data")
+    data.init(downloader(stub), data_dir)
+    # Rewrite the shelf once, so it has a versioned name
+    write_fixtures(stub.fixtures_dir, sections=dict(SECTIONS, B01=[("公園段", "0002")]))
+    refresh.refresh(downloader(stub), data_dir)
+
+    write_fixtures(stub.fixtures_dir, towns=dict(TOWNS, B={"B23": "烏日區"}))
+    os.remove(os.path.join(stub.fixtures_dir, "ListLandSection", "B", "B01.xml"))
+    summary = refresh.refresh(downloader(stub), data_dir)
+
+    assert summary.deleted == ["B_B01"]
+    assert not data.check_db_exists(os.path.join(data_dir, "B_B01"))
+    assert not [name for name in os.listdir(data_dir) if name.startswith("B_B01")]
+
+
+def test_save_snapshot_leaves_no_temporary_file(tmp_path):
+    sect_index = index.SectIndex(index.INDEX_PATH)
+    converter_snapshot = snapshot.ConverterSnapshot.from_index(sect_index)
+    sect_index.close()
+
+    path = str(tmp_path / "converter.snapshot")
+    snapshot.save_snapshot(converter_snapshot, (1, 2), path)
+    snapshot.save_snapshot(converter_snapshot, (3, 4), path)
+    assert os.listdir(tmp_path) == ["converter.snapshot"]
+    assert snapshot.load_snapshot((1, 2), path) is None
+    loaded = snapshot.load_snapshot((3, 4), path)
+    assert loaded.towncode_to_countycode == converter_snapshot.towncode_to_countycode
@@ -0,0 +1,44 @@
+import openpyxl
+
+from main import ROW_NAME, LandUseViolation, open_xlsx, parse_sheet, stream_xlsx
+
+ROWS = [
+    # id, number, city, sectname, usage_zone, use, status, unused
+    [112010001, 1, "臺北市", "中正段一小段", "住宅區", "建", "已停止供水供電", 1.5],
+    [112010002, None, "臺北市", "中正段一小段", None, "建", None, "x"],
+    [None] * 8,
+    [112010003, 3, "臺北市", "001", "住宅區", 2.5, "已拆除 已停止供水供電", None],
+    ["NA", 4, "新北市", "7", "商業區", "#N/A", "", None],
+    [None] * 8,
+]
+
+
+def fields(violation: LandUseViolation) -> tuple:
+    return tuple(getattr(violation, name) for name in LandUseViolation.__slots__)
+
+
+def test_stream_matches_pandas(tmp_path):
+    path = str(tmp_path / "sheet.xlsx")
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "11201"
+    worksheet.append([*ROW_NAME.values(), "備註"])
+    for row in ROWS:
+        worksheet.append(row)
+    # A short sheet, with the columns in another order
+    worksheet = workbook.create_sheet("11202")
+    worksheet.append(list(reversed(ROW_NAME.values())))
+    worksheet.append(list(reversed(ROWS[0][:7])))
+    workbook.save(path)
+
+    sheet_names = ["11201", "11202"]
+    streamed = {
+        name: list(map(fields, violations))
+        for name, violations in stream_xlsx(path, sheet_names)
+    }
+    read = {
+        name: list(map(fields, parse_sheet(df)))
+        for name, df in open_xlsx(path, sheet_names).items()
+    }
+    assert streamed == read
+    assert [row[3] for row in streamed["11201"]] == ["1.0", "nan", "nan", "3.0", "4.0"]
@@ -0,0 +1,23 @@
+from export import to_columns
+from main import EMPTY, LandUseViolation
+
+
+def test_empty_update_fields_are_null():
+    update = LandUseViolation(
+        "112010001", "112", "", "", "", "", "", EMPTY, "", "", ["已停止供水供電"]
+    )
+    columns = to_columns([update])
+    assert columns["id"] == ["112010001"]
+    assert columns["year"] == [112]
+    for name in (
+        "month",
+        "number",
+        "city",
+        "sectname",
+        "sectcode",
+        "usage_zone",
+        "use",
+    ):
+        assert columns[name] == [None], name
+    assert columns["land_numbers"] == [[]]
+    assert columns["status"] == [["已停止供水供電"]]
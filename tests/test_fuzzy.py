@@ -0,0 +1,45 @@
+import pytest
+
+from sect.fuzzy import SectionMatcher
+
+SECTIONS = [
+    ("東園段", "0001"),
+    ("西園段", "0002"),
+    ("台北段", "0003"),
+    ("台北段 ", "0003"),
+    ("後厝段", "0004"),
+    ("後營段", "0005"),
+    ("腳踏段", "0006"),
+]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return SectionMatcher(SECTIONS)
+
+
+def test_names_equal_once_normalized_score_one(matcher):
+    for sect, sect_code in [("東園段", "0001"), ("臺北段", "0003"), ("脚踏段", "0006")]:
+        best = matcher.accept(sect)
+        assert (best.sect_code, best.score) == (sect_code, 1.0), sect
+    assert matcher.accept("東園段", threshold=1.0).sect_code == "0001"
+
+
+def test_threshold(matcher):
+    # 東園 has 3 bigrams, 東園段 4, and they share 2: 2 * 2 / (3 + 4)
+    assert matcher.match("東園", 1)[0].score == pytest.approx(4 / 7)
+    assert matcher.accept("東園") is None
+    assert matcher.accept("東園", threshold=0.58) is None
+    assert matcher.accept("東園", threshold=0.57).sect_code == "0001"
+    assert matcher.accept("無", threshold=0.0) is None
+
+
+def test_margin(matcher):
+    # 東園段 scores 1.0, 西園段 0.5
+    assert matcher.accept("東園段", margin=0.5).sect_code == "0001"
+    assert matcher.accept("東園段", margin=0.51) is None
+    # Two sections with different codes tie
+    assert matcher.accept("後段", threshold=0.5) is None
+    assert matcher.accept("溪園段", threshold=0.5) is None
+    # Sections sharing a code do not compete
+    assert matcher.accept("北段", threshold=0.5).sect_code == "0003"
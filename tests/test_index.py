@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from main import sheet_name_list, stream_xlsx
+from sect import data, index
+from sect.sectcode import SectCodeConverter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def sect_index(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("index") / "sect.idx")
+    index.build_index(path, data.DATA_DIR)
+    sect_index = index.SectIndex(path)
+    yield sect_index
+    sect_index.close()
+
+
+def test_reference_tables_match_the_shelves(sect_index):
+    for table, load in [
+        (sect_index.countyname_to_countycode, data.load_county_data),
+        (sect_index.townname_to_towncode, data.load_town_data),
+        (sect_index.towncode_to_countycode, data.load_towncode_to_countycode),
+    ]:
+        shelf = load()
+        assert dict(table.items()) == dict(shelf)
+        assert len(table) == len(shelf)
+        shelf.close()
+
+
+def test_section_tables_match_the_shelves(sect_index):
+    towncode_to_countycode = data.load_towncode_to_countycode()
+    for town_code, county_code in towncode_to_countycode.items():
+        table = sect_index.section_table(county_code, town_code)
+        file_path = data.generate_land_section_file_path(county_code, town_code)
+        if not data.check_db_exists(file_path):
+            assert len(table) == 0
+            continue
+
+        shelf = data.load_sectname_to_sectcode(county_code, town_code)
+        expected = {
+            sectstr: {field: section[field] or "" for field in index.SECTION_FIELDS}
+            for sectstr, section in shelf.items()
+        }
+        assert dict(table.items()) == expected
+        for sectstr in expected:
+            assert sectstr in table
+        shelf.close()
+    towncode_to_countycode.close()
+
+
+def test_missing_keys(sect_index):
+    assert sect_index.countyname_to_countycode.get("不存在縣") is None
+    assert "不存在段" not in sect_index.section_table("B", "B23")
+    assert len(sect_index.section_table("Z", "Z99")) == 0
+
+
+def test_converters_agree():
+    sectnames = [
+        violation.sectname
+        for _, violations in stream_xlsx(
+            os.path.join(ROOT_DIR, "112.xlsx"), sheet_name_list
+        )
+        for violation in violations
+    ]
+    with_index = SectCodeConverter(use_snapshot=False)
+    with_shelves = SectCodeConverter(use_index=False)
+
+    assert with_index.convert_many(sectnames) == with_shelves.convert_many(sectnames)
+    with_index.close()
+    with_shelves.close()
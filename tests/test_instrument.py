@@ -0,0 +1,54 @@
+import pytest
+
+from sect.instrument import Instrumentation
+
+
+def test_timed_reads_declared_arguments(tmp_path):
+    stats = Instrumentation()
+
+    @stats.timed(
+        "write",
+        rows=lambda arguments, result: len(arguments["lines"]),
+        bytes=lambda arguments, result: arguments["path"].stat().st_size,
+        arguments=("path", "lines"),
+    )
+    def write(path, lines, suffix="\n"):
+        path.write_text("".join(line + suffix for line in lines))
+
+    path = tmp_path / "out.txt"
+    write(path, ["a", "b"])
+    assert stats.to_dict() == {}
+
+    stats.enabled = True
+    write(path, ["a", "b"])
+    write(lines=["abc"], path=path)
+    d = stats.to_dict()["write"]
+    assert (d["count"], d["rows"], d["bytes"]) == (2, 3, 8)
+
+
+def test_timed_passes_only_declared_arguments():
+    stats = Instrumentation()
+    stats.enabled = True
+    seen = []
+
+    @stats.timed("add", rows=lambda arguments, result: seen.append(arguments) or 1)
+    def add(a, b=2):
+        return a + b
+
+    assert add(1) == 3
+    assert seen == [{}]
+
+    with pytest.raises(ValueError):
+        stats.timed("add", rows=lambda arguments, result: 1, arguments=("c",))(add)
+
+
+def test_timed_generator_counts_items():
+    stats = Instrumentation()
+    stats.enabled = True
+
+    @stats.timed("items", generator=True)
+    def items(n):
+        yield from range(n)
+
+    assert list(items(n=3)) == [0, 1, 2]
+    assert stats.to_dict()["items"]["rows"] == 3
@@ -0,0 +1,75 @@
+import pytest
+
+from sect.landnumber import EMPTY, LandNumberSet
+
+
+def test_parse_lists_ranges_and_subs():
+    land_numbers = LandNumberSet.parse("12-3、956至960、7")
+
+    assert list(land_numbers) == [
+        "00070000",
+        "00120003",
+        "09560000",
+        "09570000",
+        "09580000",
+        "09590000",
+        "09600000",
+    ]
+    assert len(land_numbers) == 7
+
+
+def test_parse_rejects_invalid_items():
+    with pytest.raises(ValueError, match="12a"):
+        LandNumberSet.parse("12a、13")
+
+
+def test_duplicates_are_dropped():
+    land_numbers = LandNumberSet.parse("12-3、12、12-3、12")
+
+    assert land_numbers.to_list() == ["00120000", "00120003"]
+
+
+def test_to_list_writes_runs_as_ranges():
+    land_numbers = LandNumberSet.parse("956至960、12-3")
+
+    assert land_numbers.to_list() == ["00120003", "09560000~09600000"]
+    assert LandNumberSet.from_list(["00120003", "09560000~09600000"]) == land_numbers
+    # The expanded form reads back the same
+    assert LandNumberSet.from_list(list(land_numbers)) == land_numbers
+
+
+def test_runs_are_merged():
+    assert LandNumberSet([(0, 1, 3), (0, 4, 6), (0, 5, 9)]).runs == ((0, 1, 9),)
+    assert LandNumberSet([(0, 1, 3), (1, 4, 6)]).runs == ((0, 1, 3), (1, 4, 6))
+
+
+def test_contains():
+    land_numbers = LandNumberSet.parse("956至960、12-3")
+
+    assert "09580000" in land_numbers
+    assert 9580000 in land_numbers
+    assert "00120003" in land_numbers
+    assert "00120000" not in land_numbers
+    assert "09610000" not in land_numbers
+    assert "00010000" not in EMPTY
+
+
+def test_set_operations():
+    a = LandNumberSet.parse("1至10、5-1")
+    b = LandNumberSet.parse("4至6、20、5-1")
+
+    assert list(a | b) == sorted(set(a) | set(b))
+    assert list(a - b) == sorted(set(a) - set(b))
+    assert list(a & b) == sorted(set(a) & set(b))
+    assert a - EMPTY is a
+    assert not (a - a)
+    assert (a & EMPTY) == EMPTY
+
+
+def test_equality_and_hash():
+    a = LandNumberSet.parse("1、2、3")
+    b = LandNumberSet.parse("1至3")
+
+    assert a == b
+    assert hash(a) == hash(b)
+    assert {a: 1}[b] == 1
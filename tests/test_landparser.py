@@ -0,0 +1,143 @@
+import random
+
+import pytest
+
+from sect.landparser import (
+    EMPTY_DESCRIPTION,
+    LAND_TOKEN_RE,
+    SIMPLE_LAND_RE,
+    LandRange,
+    parse_land,
+)
+
+
+def test_simple_list():
+    description = parse_land("12-3、956至960地號")
+
+    assert description.value == "12-3、956至960"
+    assert description.unit == "地號"
+    assert description.ranges == (LandRange(12, 3, 12, 3), LandRange(956, 0, 960, 0))
+    assert description.annotation == ""
+    assert description.invalid == ()
+
+
+def test_annotations_are_kept_apart():
+    description = parse_land("1780地號(1680地號西側建物)")
+
+    assert description.value == "1780"
+    assert description.annotation == "(1680地號西側建物)"
+    assert list(description.land_numbers()) == ["17800000"]
+
+
+def test_parenthesized_note_before_the_unit():
+    description = parse_land("8、9(部分)、10地號")
+
+    assert description.annotation == "(部分)"
+    assert list(description.land_numbers()) == ["00080000", "00090000", "00100000"]
+
+
+def test_unclosed_parenthesis_runs_to_the_end():
+    description = parse_land("8、9(含10地號")
+
+    assert description.unit == ""
+    assert description.annotation == "(含10地號"
+    assert list(description.land_numbers()) == ["00080000", "00090000"]
+
+
+@pytest.mark.parametrize(
+    "text, value, unit",
+    [
+        ("12號", "12", "號"),
+        ("12地號以東", "12", "地號"),
+        ("12", "12", ""),
+    ],
+)
+def test_units(text, value, unit):
+    description = parse_land(text)
+
+    assert (description.value, description.unit) == (value, unit)
+
+
+def test_require_unit():
+    assert parse_land("12", require_unit=True) is EMPTY_DESCRIPTION
+    assert parse_land("12、a", require_unit=True) is EMPTY_DESCRIPTION
+    assert parse_land("12地號", require_unit=True).value == "12"
+
+
+def test_other_separators():
+    description = parse_land("1, 2，3及4地號")
+
+    assert list(description.land_numbers()) == [f"{n:04d}0000" for n in (1, 2, 3, 4)]
+
+
+def test_sub_number_ranges():
+    description = parse_land("12-3至12-5地號")
+
+    assert list(description.land_numbers()) == ["00120003", "00120004", "00120005"]
+
+
+@pytest.mark.parametrize(
+    "item",
+    [
+        "10000",
+        "1-10000",
+        "9995至10005",
+        "12-3至15-5",
+        "960至956",
+        "12-5至12-3",
+        "1至2至3",
+        "1--2",
+        "-1",
+        "1-",
+        "a1",
+        "1" * 5000,
+    ],
+)
+def test_invalid_items_are_reported(item):
+    description = parse_land(f"7、{item}、8地號")
+
+    assert description.invalid == (item,)
+    assert list(description.land_numbers()) == ["00070000", "00080000"]
+    assert description.warnings() == (f"Invalid land number {item}",)
+
+
+def test_valid_description_has_no_warnings():
+    assert parse_land("7地號").warnings() == ()
+
+
+def test_empty_items_are_skipped():
+    assert list(parse_land("7、、8地號").land_numbers()) == ["00070000", "00080000"]
+    assert parse_land("").land_numbers() == EMPTY_DESCRIPTION.land_numbers()
+
+
+def test_simple_and_general_paths_agree():
+    rng = random.Random(0)
+    alphabet = [
+        "1",
+        "23",
+        "9999",
+        "10000",
+        "-",
+        "至",
+        "、",
+        "地號",
+        "號",
+        "(",
+        ")",
+        "a",
+    ]
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+        if SIMPLE_LAND_RE.match(text) is None:
+            continue
+        # A leading space keeps the fast path from matching
+        slow = parse_land(" " + text)
+        fast = parse_land(text)
+        assert fast.ranges == slow.ranges, text
+        assert fast.invalid == slow.invalid, text
+        assert fast.unit == slow.unit, text
+
+
+def test_tokens_cover_every_character():
+    text = "12-3至4(甲)、5，6 及7地號x"
+    assert "".join(m.group() for m in LAND_TOKEN_RE.finditer(text)) == text
@@ -0,0 +1,57 @@
+import pytest
+
+from sect.lru import LRUCache
+
+
+def test_evicts_the_least_recently_used():
+    evicted = []
+    cache = LRUCache(2, on_evict=lambda key, value: evicted.append((key, value)))
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert evicted == [("b", 2)]
+    assert "b" not in cache and "a" in cache and "c" in cache
+
+    cache.put("a", 1)
+    cache.put("d", 4)
+    assert evicted == [("b", 2), ("c", 3)]
+    assert len(cache) == 2
+
+
+def test_counts_hits_and_misses():
+    cache = LRUCache(1)
+    assert cache.get("a") is None
+    assert cache.get("a", 0) == 0
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    cache.put("b", 2)
+    assert cache.stats() == {
+        "size": 1,
+        "maxsize": 1,
+        "hits": 1,
+        "misses": 2,
+        "evictions": 1,
+    }
+
+
+def test_releases_replaced_and_cleared_values():
+    closed = []
+    cache = LRUCache(2, on_evict=lambda key, value: closed.append(value))
+    old, new = ["old"], ["new"]
+    cache.put("a", old)
+    cache.put("a", old)
+    assert closed == []
+    cache.put("a", new)
+    assert closed == [old]
+    assert cache.get("a") is new
+
+    cache.put("b", ["b"])
+    cache.clear()
+    assert closed == [old, ["new"], ["b"]]
+    assert len(cache) == 0
+
+
+def test_size_must_be_positive():
+    with pytest.raises(ValueError):
+        LRUCache(0)
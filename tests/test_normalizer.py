@@ -0,0 +1,65 @@
+import random
+import re
+
+from sect.normalizer import CHINESE_NUMERALS_SET, TO_REPLACE_MAP, Normalizer
+
+GLOBAL_REPLACE_RE = re.compile("[ 　台]|[０-９]")
+NO_HYPHEN_REPLACE_RE = re.compile("[之–—.]")
+NO_NUM_REPLACE_RE = re.compile(
+    "[一二三四五六七八九]?[一二三四五六七八九]?十?[一二三四五六七八九](?=-|號|地號|、|$)"
+)
+
+
+def old_normalize(address: str) -> str:
+    """What Normalizer.execute gave when it substituted with regexes."""
+
+    def replace(m):
+        return TO_REPLACE_MAP.get(m.group(), "")
+
+    def replace_num(m):
+        found = m.group()
+        if found in TO_REPLACE_MAP:
+            return TO_REPLACE_MAP[found]
+        if found[0] in CHINESE_NUMERALS_SET:
+            if len(found) == 2:
+                return "1" + TO_REPLACE_MAP[found[1]]
+            if len(found) == 3:
+                return TO_REPLACE_MAP[found[0]] + TO_REPLACE_MAP[found[2]]
+        return ""
+
+    address = GLOBAL_REPLACE_RE.sub(replace, address)
+    address = NO_HYPHEN_REPLACE_RE.sub(replace, address)
+    while True:
+        replaced = NO_NUM_REPLACE_RE.sub(replace_num, address)
+        if address == replaced:
+            return address
+        address = replaced
+
+
+ADDRESSES = [
+    "雲林縣口湖鄉梧北段二五四之四十三、二五四之四十六地號",
+    "台中市北屯區廍子段１２３地號",
+    "新北市 樹林區　東園段1130.1131地號",
+    "彰化縣鹿港鎮郭厝段九十九號",
+    "桃園市大園區竹圍段十、二十一之一地號",
+    "五股區十八分段一二三四五地號",
+    "一二十三—九十\n",
+]
+
+
+def test_matches_the_old_regexes():
+    normalizer = Normalizer()
+    for address in ADDRESSES:
+        assert normalizer.execute(address) == old_normalize(address), address
+    assert normalizer.normalize_many(ADDRESSES) == list(map(old_normalize, ADDRESSES))
+
+
+def test_matches_the_old_regexes_on_random_addresses():
+    rng = random.Random(0)
+    alphabet = "一二三四五六七八九十之–—.台１９0 　、-號地段區\n"
+    addresses = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        for _ in range(5000)
+    ]
+    normalizer = Normalizer()
+    assert normalizer.normalize_many(addresses) == list(map(old_normalize, addresses))
@@ -0,0 +1,34 @@
+import io
+import json
+
+import pytest
+
+from main import write_json, write_ndjson
+
+RECORDS = [
+    {"id": "112010001", "land_numbers": ["11300000"], "status": []},
+    {"sectname": "樹林區東園段1130地號", "nested": {"a": [1, {"b": None}]}},
+]
+
+
+@pytest.mark.parametrize("indent", [None, 0, 2, 4])
+@pytest.mark.parametrize(
+    "sections",
+    [{}, {"violations": []}, {"violations": RECORDS, "updates": RECORDS[:1]}],
+)
+def test_write_json_matches_json_dump(sections, indent):
+    f = io.StringIO()
+    # Records may come from generators
+    write_json(f, {name: iter(records) for name, records in sections.items()}, indent)
+
+    if indent is None:
+        expected = json.dumps(sections, ensure_ascii=False, separators=(",", ":"))
+    else:
+        expected = json.dumps(sections, ensure_ascii=False, indent=indent)
+    assert f.getvalue() == expected
+
+
+def test_write_ndjson_writes_a_record_per_line():
+    f = io.StringIO()
+    write_ndjson(f, iter(RECORDS))
+    assert list(map(json.loads, f.getvalue().splitlines())) == RECORDS
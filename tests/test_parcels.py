@@ -0,0 +1,70 @@
+import random
+
+from parcels import ParcelIndex
+from sect.landnumber import LandNumberSet
+from sect.sectcode import SectCode
+
+
+class Violation:
+    def __init__(self, id: str, land_numbers: LandNumberSet):
+        self.id = id
+        self.land_numbers = land_numbers
+        self.city = ""
+        self.usage_zone = ""
+        self.status = []
+
+
+def random_set(rng: random.Random) -> LandNumberSet:
+    runs = []
+    for _ in range(rng.randint(0, 4)):
+        sub = rng.choice([0, 0, 1, 2])
+        first = rng.randint(1, 60)
+        runs.append((sub, first, first + rng.choice([0, 0, 1, 5, 20])))
+    return LandNumberSet(runs)
+
+
+def test_lookups_match_a_scan_of_the_section():
+    rng = random.Random(0)
+    for _ in range(200):
+        parcels = ParcelIndex()
+        ids = []
+        for n in range(rng.randint(1, 30)):
+            land_numbers = random_set(rng)
+            sect_code = rng.choice(["1", "2"])
+            parcels.add(
+                Violation(f"v{n}", land_numbers),
+                SectCode("B", "B23", sect_code, land_numbers),
+            )
+            ids.append(f"v{n}")
+            # Lookups between adds must not see stale runs
+            parcels.lookup("B", "B23", "1", "00050000")
+        if rng.random() < 0.5:
+            parcels.remove(rng.sample(ids, min(3, len(ids))))
+
+        for _ in range(30):
+            sect_code = rng.choice(["1", "2"])
+            bucket = parcels.sections.get(("B", "B23", sect_code), [])
+            code = f"{rng.randint(0, 90):04d}{rng.choice([0, 1, 2]):04d}"
+            assert parcels.lookup("B", "B23", sect_code, code) == [
+                id for id, land_numbers in bucket if code in land_numbers
+            ]
+
+            query = random_set(rng)
+            expected = (
+                [id for id, land_numbers in bucket if land_numbers & query]
+                if query
+                else [id for id, _ in bucket]
+            )
+            code = SectCode("B", "B23", sect_code, query)
+            assert parcels.lookup_code(code) == expected
+
+
+def test_round_trip_keeps_lookups():
+    parcels = ParcelIndex()
+    land_numbers = LandNumberSet.parse("956至960、12-3")
+    parcels.add(Violation("v1", land_numbers), SectCode("B", "B23", "1", land_numbers))
+
+    loaded = ParcelIndex.from_dict(parcels.to_dict())
+    assert loaded.lookup("B", "B23", "1", "09580000") == ["v1"]
+    assert loaded.lookup("B", "B23", "1", "00120000") == []
+    assert loaded.lookup("B", "B23", "2", "09580000") == []
@@ -0,0 +1,81 @@
+import pytest
+
+from sect.sectcode import ConvertError, SectCodeConverter
+
+GOOD = [
+    "新北市樹林區東園段1130地號",
+    "樹林區西園段681地號",
+    "臺中市北屯區廍子段123地號",
+]
+BAD = "不存在的地址"
+
+
+@pytest.fixture
+def converter():
+    converter = SectCodeConverter(memo_size=64)
+    yield converter
+    converter.close()
+
+
+def test_convert_many_keeps_input_order(converter):
+    addresses = [GOOD[2], BAD, GOOD[0], GOOD[2], BAD, GOOD[1]]
+    results, errors = converter.convert_many(addresses)
+
+    expected = [
+        None if address == BAD else converter.convert(address) for address in addresses
+    ]
+    assert results == expected
+    assert [(error.index, error.address) for error in errors] == [(1, BAD), (4, BAD)]
+    assert all(isinstance(error, ConvertError) and error.message for error in errors)
+
+
+def test_convert_many_fills_both_memos(converter):
+    # The two spellings normalize to the same address
+    addresses = ["新北市樹林區東園段1130地號", "新北市樹林區東園段１１３０地號"]
+    assert converter.normalizer.execute(addresses[0]) == converter.normalizer.execute(
+        addresses[1]
+    )
+
+    results, _ = converter.convert_many(addresses + [BAD])
+    assert results[0] == results[1]
+    assert (len(converter.raw_memo), len(converter.normalized_memo)) == (2, 1)
+
+    # Another spelling is a normalized hit, a repeated one a raw hit
+    converter.convert_many(["新北市樹林區東園段1130地號 "])
+    converter.convert_many(addresses)
+    stats = converter.memo_stats()
+    assert (stats["raw"]["hits"], stats["normalized"]["hits"]) == (2, 1)
+    assert stats["time_saved"] > 0
+    assert converter.convert_many(["新北市樹林區東園段1130地號 "])[0] == results[:1]
+
+
+def test_memo_returns_what_conversion_gives():
+    plain = SectCodeConverter()
+    memoized = SectCodeConverter(memo_size=2)
+    addresses = GOOD + ["新北市樹林區東園段１１３０地號"] + GOOD
+
+    assert [memoized.convert(address) for address in addresses] == [
+        plain.convert(address) for address in addresses
+    ]
+    with pytest.raises(ValueError):
+        memoized.convert(BAD)
+    assert plain.memo_stats() == {}
+    plain.close()
+    memoized.close()
+
+
+def test_memo_counts_hits_and_time_saved(converter):
+    converter.convert(GOOD[0])
+    assert converter.memo_stats()["misses"] == 1
+    assert converter.time_saved == 0
+
+    converter.convert(GOOD[0])
+    converter.convert("新北市樹林區東園段１１３０地號")
+    stats = converter.memo_stats()
+    assert (stats["raw"]["hits"], stats["normalized"]["hits"]) == (1, 1)
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["time_saved"] == converter.time_saved > 0
+
+    converter.clear_memo()
+    converter.convert(GOOD[0])
+    assert converter.memo_stats()["misses"] == 2
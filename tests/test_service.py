@@ -0,0 +1,107 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+from urllib.parse import quote
+
+import pytest
+
+from sect.client import ServiceClient, ServiceError
+from sect.sectcode import SectCodeConverter
+from sect.service import ConverterService
+
+ADDRESSES = ["新北市樹林區東園段1130地號", "樹林區西園段681地號", "不存在的地址"]
+
+
+@pytest.fixture
+def service(tmp_path):
+    """A ConverterService on a Unix socket, run on an event loop in a thread."""
+    path = str(tmp_path / "sect.sock")
+    service = ConverterService(memo_size=64)
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(service.serve(unix=path))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield service, path
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join()
+    loop.close()
+
+
+def test_convert_matches_the_converter(service):
+    _, path = service
+    converter = SectCodeConverter()
+    with ServiceClient(unix=path) as client:
+        assert client.convert(ADDRESSES[0]) == converter.convert(ADDRESSES[0])
+        response = client.request("GET", "/convert?address=" + quote(ADDRESSES[1]))
+        assert client.convert(ADDRESSES[1]) == converter.convert(ADDRESSES[1])
+        assert (
+            response["result"]["sect_code"] == converter.convert(ADDRESSES[1]).sect_code
+        )
+        with pytest.raises(ValueError):
+            client.convert(ADDRESSES[2])
+
+        assert client.convert_many(ADDRESSES) == converter.convert_many(ADDRESSES)
+        assert client.convert_pipelined(ADDRESSES) == converter.convert_many(ADDRESSES)
+    converter.close()
+
+
+def test_bad_requests(service):
+    _, path = service
+    with ServiceClient(unix=path) as client:
+        for method, target, payload, status in [
+            ("GET", "/convert", None, 400),
+            ("POST", "/convert", {"address": 1}, 400),
+            ("POST", "/convert_many", {"addresses": "x"}, 400),
+            ("GET", "/reload", None, 405),
+            ("GET", "/missing", None, 404),
+        ]:
+            with pytest.raises(ServiceError) as excinfo:
+                client.request(method, target, payload)
+            assert excinfo.value.status == status, target
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(b"POST /convert HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}")
+        assert sock.makefile("rb").readline() == b"HTTP/1.1 400 Bad Request\r\n"
+
+
+def test_a_failing_handler_answers_500(service, monkeypatch):
+    converter_service, path = service
+
+    def convert_many(addresses):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(converter_service.converter, "convert_many", convert_many)
+    with ServiceClient(unix=path) as client:
+        with pytest.raises(ServiceError) as excinfo:
+            client.convert(ADDRESSES[0])
+        assert excinfo.value.status == 500
+        assert "RuntimeError: broken" in str(excinfo.value)
+        # The connection is still usable
+        assert client.sock is not None
+        assert client.stats()["requests"] == 2
+
+
+def test_stats_and_reload(service):
+    _, path = service
+    with ServiceClient(unix=path) as client:
+        client.convert_many(ADDRESSES)
+        stats = client.stats()
+        assert (stats["generation"], stats["requests"]) == (1, 2)
+        assert set(stats) >= {"memo", "table_cache", "loaded_at"}
+
+        assert client.reload() == 2
+        assert client.stats()["generation"] == 2
+        assert client.convert_many(ADDRESSES)[0][0] is not None